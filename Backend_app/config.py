@@ -15,6 +15,104 @@ class Settings(BaseSettings):
     port: int = Field(8000, env="PORT")
     build_during_deploy: bool = Field(False, env="SCM_DO_BUILD_DURING_DEPLOYMENT")
 
+    # Cola de trabajos de transcripción (services/jobs.py)
+    transcripcion_max_concurrentes: int = Field(2, env="TRANSCRIPCION_MAX_CONCURRENTES")
+    transcripcion_max_en_cola: int = Field(50, env="TRANSCRIPCION_MAX_EN_COLA")
+    transcripcion_jobs_guardados: int = Field(200, env="TRANSCRIPCION_JOBS_GUARDADOS")
+
+    # Cuota de disco para los workspaces por job (services/workspace.py)
+    workspace_cuota_mb: int = Field(4096, env="WORKSPACE_CUOTA_MB")
+
+    # Pools de ejecución y límites por etapa (services/ejecucion.py)
+    ejecucion_hilos: int = Field(16, env="EJECUCION_HILOS")
+    ejecucion_procesos: int = Field(2, env="EJECUCION_PROCESOS")
+    limite_descarga: int = Field(4, env="LIMITE_DESCARGA")
+    limite_conversion: int = Field(2, env="LIMITE_CONVERSION")
+    limite_reconocimiento: int = Field(8, env="LIMITE_RECONOCIMIENTO")
+    limite_sintesis: int = Field(4, env="LIMITE_SINTESIS")
+    limite_resumen: int = Field(4, env="LIMITE_RESUMEN")
+
+    # Tamaño de bloque al pasar uploads a ffmpeg (services/ingesta.py)
+    ingesta_chunk_kb: int = Field(256, env="INGESTA_CHUNK_KB")
+
+    # Segmentación por silencios de audios largos (services/segmentacion.py)
+    segmentacion_duracion_objetivo_s: int = Field(60, env="SEGMENTACION_DURACION_OBJETIVO_S")
+    segmentacion_duracion_max_s: int = Field(90, env="SEGMENTACION_DURACION_MAX_S")
+    segmentacion_sesiones_paralelas: int = Field(4, env="SEGMENTACION_SESIONES_PARALELAS")
+
+    # Recorte de silencios antes del reconocimiento (services/vad.py)
+    vad_habilitado: bool = Field(True, env="VAD_HABILITADO")
+    vad_umbral_db: float = Field(12.0, env="VAD_UMBRAL_DB")
+    vad_margen_ms: int = Field(250, env="VAD_MARGEN_MS")
+    vad_silencio_min_ms: int = Field(1000, env="VAD_SILENCIO_MIN_MS")
+
+    # Caché de resultados de transcripción (services/cache.py)
+    cache_transcripciones_mb: int = Field(512, env="CACHE_TRANSCRIPCIONES_MB")
+    cache_transcripciones_ttl_h: int = Field(168, env="CACHE_TRANSCRIPCIONES_TTL_H")
+
+    # Audio descargado de YouTube, por ID de video (services/youtube.py)
+    cache_youtube_mb: int = Field(2048, env="CACHE_YOUTUBE_MB")
+    cache_youtube_ttl_h: int = Field(24, env="CACHE_YOUTUBE_TTL_H")
+
+    # Transcripción en vivo por websocket (services/transcripcion_vivo.py)
+    vivo_max_sesiones: int = Field(32, env="VIVO_MAX_SESIONES")
+    vivo_cola_frames: int = Field(32, env="VIVO_COLA_FRAMES")
+    vivo_max_frame_kb: int = Field(64, env="VIVO_MAX_FRAME_KB")
+
+    # Plazos por job (services/plazos.py): inicial hasta conocer la duración,
+    # luego base + factor x duración del audio
+    plazo_inicial_s: int = Field(1800, env="PLAZO_INICIAL_S")
+    plazo_base_s: int = Field(120, env="PLAZO_BASE_S")
+    plazo_factor: float = Field(1.5, env="PLAZO_FACTOR")
+
+    # Transcripción por lotes, API REST v3.2 (services/transcripcion_lote.py).
+    # Vacío = https://<AZURE_SPEECH_REGION>.api.cognitive.microsoft.com/speechtotext/v3.2
+    lote_base_url: str = Field("", env="LOTE_BASE_URL")
+    lote_poll_inicial_s: float = Field(5.0, env="LOTE_POLL_INICIAL_S")
+    lote_poll_max_s: float = Field(60.0, env="LOTE_POLL_MAX_S")
+    lote_ttl_h: int = Field(48, env="LOTE_TTL_H")
+    lote_plazo_h: int = Field(12, env="LOTE_PLAZO_H")
+    lote_borrar_al_terminar: bool = Field(True, env="LOTE_BORRAR_AL_TERMINAR")
+    # Cola propia: un lote puede esperar a Azure horas sin ocupar workers de /transcribir
+    lote_max_concurrentes: int = Field(4, env="LOTE_MAX_CONCURRENTES")
+    lote_max_en_cola: int = Field(20, env="LOTE_MAX_EN_COLA")
+
+    # Clientes de Azure Speech compartidos (services/speech_clientes.py): abrir la
+    # conexión al crear el recognizer/sintetizador, antes de que llegue el audio
+    speech_preconectar: bool = Field(True, env="SPEECH_PRECONECTAR")
+    # Pedir tiempos por palabra (OutputFormat.Detailed); los usan los subtítulos SRT/VTT
+    speech_tiempos_palabras: bool = Field(True, env="SPEECH_TIEMPOS_PALABRAS")
+    # Segundos de audio que el push stream puede ir por delante de lo reconocido
+    speech_adelanto_s: float = Field(30.0, env="SPEECH_ADELANTO_S")
+
+    # Subtítulos: una línea no supera estos límites (se corta entre palabras)
+    subtitulos_max_caracteres: int = Field(84, env="SUBTITULOS_MAX_CARACTERES")
+    subtitulos_max_segundos: float = Field(6.0, env="SUBTITULOS_MAX_SEGUNDOS")
+
+    # Cliente async de Azure OpenAI compartido (services/azure_client.py)
+    openai_timeout_s: float = Field(60.0, env="OPENAI_TIMEOUT_S")
+    openai_max_reintentos: int = Field(3, env="OPENAI_MAX_REINTENTOS")
+    openai_max_conexiones: int = Field(20, env="OPENAI_MAX_CONEXIONES")
+    # Cuota del deployment (services/cuota_openai.py); 0 = sin límite del lado del cliente
+    openai_solicitudes_por_minuto: int = Field(180, env="OPENAI_SOLICITUDES_POR_MINUTO")
+    openai_tokens_por_minuto: int = Field(30000, env="OPENAI_TOKENS_POR_MINUTO")
+    openai_backoff_max_s: float = Field(60.0, env="OPENAI_BACKOFF_MAX_S")
+
+    # Caché de /api/generar: LRU en memoria, lo desalojado baja a disco (0 = sin disco)
+    cache_generacion_entradas: int = Field(512, env="CACHE_GENERACION_ENTRADAS")
+    cache_generacion_ttl_h: int = Field(24, env="CACHE_GENERACION_TTL_H")
+    cache_generacion_disco_mb: int = Field(64, env="CACHE_GENERACION_DISCO_MB")
+
+    # Resumen map-reduce (services/resumen.py); tokens estimados
+    resumen_tokens_fragmento: int = Field(3000, env="RESUMEN_TOKENS_FRAGMENTO")
+    resumen_tokens_parcial: int = Field(300, env="RESUMEN_TOKENS_PARCIAL")
+    resumen_tokens_salida: int = Field(500, env="RESUMEN_TOKENS_SALIDA")
+    resumen_concurrentes: int = Field(4, env="RESUMEN_CONCURRENTES")
+
+    # Subida de varios archivos en un request (/api/transcribir-archivo/multiple)
+    multiarchivo_concurrentes: int = Field(4, env="MULTIARCHIVO_CONCURRENTES")
+    multiarchivo_max_archivos: int = Field(50, env="MULTIARCHIVO_MAX_ARCHIVOS")
+
     # work_dir: str = Field(..., env="WORK_DIR")
     # data_work: str = Field(..., env="DATA_WORK")
     # audio_work: str = Field(..., env="AUDIO_WORK")
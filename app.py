@@ -9,6 +9,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from redactor.redactor import router as redactor_router
 from transcriptor.transcriptor import router as transcriptor_router
 from transcriptor.transcribir_archivo import router as transcribir_archivo_router
+from transcriptor.transcribir_lote import router as transcribir_lote_router
+from services.jobs import gestor_jobs, gestor_lotes
+from services.ejecucion import ejecutor
+from services.transcripcion_vivo import atender_websocket
+from services.transcripcion_lote import cliente_lote
+from services.azure_client import openai_async
 from datetime import datetime
 import os
 
@@ -73,6 +79,18 @@ app.include_router(transcriptor_router, prefix="/api")  # ✅ usa /api
 
 app.include_router(transcribir_archivo_router, prefix="/api")
 
+app.include_router(transcribir_lote_router, prefix="/api")
+
+
+@app.on_event("shutdown")
+async def cerrar_recursos():
+    # Detiene los workers de la cola de transcripciones y los pools de ejecución
+    await gestor_jobs.cerrar()
+    await gestor_lotes.cerrar()
+    ejecutor.cerrar()
+    await cliente_lote.cerrar()
+    await openai_async.close()
+
 
 # Puedes tener una forma de mapear job_id a conexiones WebSocket
 # (Esto es una simplificación; en una app real, usarías una cola de mensajes como Redis Pub/Sub)
@@ -83,16 +101,16 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await websocket.accept()
     connections[client_id] = websocket
     try:
-        while True:
-            # Puedes recibir mensajes del cliente si quieres, pero para progreso
-            # el servidor es el que envía.
-            # Este loop evita que la conexión se cierre prematuramente si no hay tráfico del cliente.
-            await websocket.receive_text()
+        # Mantiene la conexión abierta y, si el cliente envía audio (frames
+        # binarios), lo transcribe en vivo. Protocolo en services/transcripcion_vivo.py
+        await atender_websocket(websocket)
+        print(f"Cliente {client_id} desconectado.")
     except WebSocketDisconnect:
-        del connections[client_id]
         print(f"Cliente {client_id} desconectado.")
     except Exception as e:
         print(f"Error en WebSocket para {client_id}: {e}")
+    finally:
+        connections.pop(client_id, None)
 
 # Ruta raíz para probar que el backend funciona
 @app.get("/", response_class=HTMLResponse)
@@ -1,13 +1,20 @@
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import FileResponse
+import httpx
+from openai import APIConnectionError
 from pydantic import BaseModel
-from openai import AsyncAzureOpenAI
 from Backend_app.config import settings
+from services.ejecucion import ejecutor
+from services.cache import cache_generacion, clave_cache, normalizar_texto
+from services.cuota_openai import completar, limitador_openai
+from services.eventos import respuesta_eventos, PATRON_FORMATO
+from services.vuelo_unico import generaciones_en_curso, sintesis_en_curso
 import logging
 import os
 import asyncio
+import time
 from docx import Document
-from azure.cognitiveservices.speech import SpeechConfig, SpeechSynthesizer, AudioConfig
+from services.speech_clientes import sintetizar
 import uuid, os
 
 
@@ -30,11 +37,8 @@ logger.info("🔐 Cargando configuración Azure OpenAI")
 logger.info(f"📍 Endpoint: {AZURE_OPENAI_ENDPOINT}")
 logger.info(f"🚀 Deployment: {AZURE_DEPLOYMENT_NAME}")
 
-client = AsyncAzureOpenAI(
-    api_key=settings.azure_openai_api_key,
-    api_version="2024-02-15-preview",
-    azure_endpoint=AZURE_OPENAI_ENDPOINT
-)
+# Las llamadas van por el cliente compartido con la cuota del deployment
+# (services/cuota_openai.py): turno por prioridad, Retry-After y reintentos
 
 
 # ────────────────────── MODELOS DE DATOS ──────────────────────
@@ -43,6 +47,7 @@ class RedaccionRequest(BaseModel):
     contenido: str
     tono: str = "institucional"
     audiencia: str = "público general"
+    regenerar: bool = False  # True: ignora la caché y pide un borrador nuevo
 
 class Articulo(BaseModel):
     titulo: str
@@ -52,49 +57,166 @@ class Articulo(BaseModel):
     
     
 
-# ─────────────── GENERACIÓN DE CONTENIDO IA ───────────────
-async def generar_contenido_ia(prompt: str, tono: str, audiencia: str) -> str:
-    system_prompt = (
+TEMPERATURA = 0.7
+
+
+def clave_generacion(prompt: str, system_prompt: str, temperatura: float = TEMPERATURA) -> str:
+    # El mismo comunicado con otros espacios o saltos de línea reutiliza el borrador
+    return clave_cache(
+        normalizar_texto(prompt), normalizar_texto(system_prompt), AZURE_DEPLOYMENT_NAME, f"{temperatura:.2f}"
+    )
+
+
+def armar_system_prompt(tono: str, audiencia: str) -> str:
+    return (
         f"Eres un redactor oficial del departamento de prensa de un organismo estatal. "
         f"Redacta el contenido solicitado con tono {tono}, dirigido al {audiencia}. "
         f"Asegúrate de que el mensaje sea claro, institucional, empático y socialmente responsable."
     )
 
-    for intento in range(3):
+
+# ─────────────── GENERACIÓN DE CONTENIDO IA ───────────────
+async def generar_contenido_ia(prompt: str, tono: str, audiencia: str, usar_cache: bool = True) -> str:
+    system_prompt = armar_system_prompt(tono, audiencia)
+
+    clave = clave_generacion(prompt, system_prompt)
+    if usar_cache and (en_cache := await cache_generacion.obtener_async(clave)) is not None:
+        logger.info("⚡ Contenido servido desde caché")
+        return en_cache
+    # El mismo pedido enviado a la vez por varios editores genera un solo borrador
+    return await generaciones_en_curso.ejecutar(clave, lambda: _generar(prompt, system_prompt, clave))
+
+
+async def _generar(prompt: str, system_prompt: str, clave: str) -> str:
+    try:
+        logger.info("📨 Enviando solicitud a Azure OpenAI...")
+        response = await completar(
+            model=AZURE_DEPLOYMENT_NAME,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=TEMPERATURA,
+            max_tokens=800
+        )
+    except Exception:
+        logger.error("❌ Fallo persistente al generar contenido")
+        raise
+    resultado = response.choices[0].message.content
+    logger.info("✅ Contenido generado correctamente")
+    # Con `regenerar` el borrador nuevo reemplaza al guardado
+    if resultado:
+        cache_generacion.guardar(clave, resultado)
+    return resultado
+
+# ─────────────── GENERACIÓN EN STREAMING (token a token) ───────────────
+def _texto_chunk(chunk) -> str:
+    # Azure manda chunks sin choices (resultados del filtro de contenido) o sin texto
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+async def _abrir_stream(system_prompt: str, prompt: str):
+    """Abre el stream y espera el primer token.
+
+    La apertura (cuota, 429, errores transitorios) la reintenta `completar`.
+    Acá solo se reabre una vez si la conexión se corta antes del primer token
+    (todavía no se envió nada al cliente); después, un corte ya no se puede
+    ocultar y se propaga.
+    Devuelve (stream, iterador, primer_token): el iterador sigue desde el primer token.
+    """
+    for intento in range(2):
+        logger.info("📨 Enviando solicitud en streaming a Azure OpenAI...")
+        stream = await completar(
+            model=AZURE_DEPLOYMENT_NAME,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=TEMPERATURA,
+            max_tokens=800,
+            stream=True,
+        )
         try:
-            logger.info("📨 Enviando solicitud a Azure OpenAI...")
-            response = await client.chat.completions.create(
-                model=AZURE_DEPLOYMENT_NAME,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=800
-            )
-            resultado = response.choices[0].message.content
-            logger.info("✅ Contenido generado correctamente")
-            return resultado
-
-        except Exception as e:
-            logger.warning(f"⚠️ Error al intentar generar contenido (intento {intento+1}): {e}")
-            if intento < 2:
-                await asyncio.sleep(2 ** intento)  # backoff exponencial
-            else:
+            iterador = aiter(stream)
+            async for chunk in iterador:
+                if texto := _texto_chunk(chunk):
+                    return stream, iterador, texto
+            return stream, iterador, ""  # Terminó sin texto
+
+        except (APIConnectionError, httpx.TransportError) as e:
+            await stream.close()
+            if intento == 1:
                 logger.error("❌ Fallo persistente al generar contenido")
                 raise
+            logger.warning(f"⚠️ Stream cortado antes del primer token, se reabre: {e}")
+        except Exception:
+            await stream.close()
+            raise
+
+
+async def eventos_generacion(data: RedaccionRequest):
+    """("token", {"texto"}) por cada fragmento y ("final", ...) con el texto completo y los tiempos."""
+    inicio = time.perf_counter()
+    system_prompt = armar_system_prompt(data.tono, data.audiencia)
+    clave = clave_generacion(data.contenido, system_prompt)
+    if not data.regenerar and (en_cache := await cache_generacion.obtener_async(clave)) is not None:
+        logger.info("⚡ Contenido servido desde caché")
+        yield "token", {"texto": en_cache}
+        yield "final", {"titulo": data.titulo, "resultado": en_cache, "cache": True, "ttft_ms": 0.0}
+        return
+
+    stream, iterador, primero = await _abrir_stream(system_prompt, data.contenido)
+    ttft_ms = round((time.perf_counter() - inicio) * 1000, 1)
+    logger.info(f"⏱️ Primer token en {ttft_ms} ms")
+    partes = [primero] if primero else []
+    try:
+        if primero:
+            yield "token", {"texto": primero}
+        async for chunk in iterador:
+            if texto := _texto_chunk(chunk):
+                partes.append(texto)
+                yield "token", {"texto": texto}
+    finally:
+        await stream.close()  # Si el cliente se desconecta se deja de consumir tokens
+
+    resultado = "".join(partes)
+    total_ms = round((time.perf_counter() - inicio) * 1000, 1)
+    logger.info(f"✅ Contenido generado en streaming ({total_ms} ms, primer token {ttft_ms} ms)")
+    if resultado:
+        cache_generacion.guardar(clave, resultado)
+    yield "final", {"titulo": data.titulo, "resultado": resultado, "cache": False, "ttft_ms": ttft_ms, "total_ms": total_ms}
+
 
 # ──────────────── ENDPOINT: Generar contenido ────────────────
 @router.post("/generar", summary="Generar contenido redactado con IA")
 async def generar_contenido(data: RedaccionRequest):
     logger.info(f"📥 Solicitud recibida: {data}")
     try:
-        resultado = await generar_contenido_ia(data.contenido, data.tono, data.audiencia)
+        resultado = await generar_contenido_ia(
+            data.contenido, data.tono, data.audiencia, usar_cache=not data.regenerar
+        )
         return {"titulo": data.titulo, "resultado": resultado}
     except Exception as e:
         logger.error(f"❌ Error en /generar: {e}")
         raise HTTPException(status_code=500, detail=f"Error al generar contenido: {str(e)}")
 
+@router.post("/generar/stream", summary="Generar contenido con IA, enviando los tokens a medida que llegan")
+async def generar_contenido_stream(data: RedaccionRequest, formato: str = Query("sse", pattern=PATRON_FORMATO)):
+    logger.info(f"📥 Solicitud recibida (streaming): {data}")
+    return respuesta_eventos(eventos_generacion(data), formato)
+
+
+@router.get("/generar/cache", summary="Estado de la caché de contenido generado")
+async def estadisticas_cache_generacion():
+    return cache_generacion.estadisticas()
+
+
+@router.get("/generar/cuota", summary="Estado del limitador de cuota de Azure OpenAI")
+async def estadisticas_cuota_openai():
+    return limitador_openai.estadisticas()
+
 # ──────────────── ENDPOINT: Descargar artículo ────────────────
 @router.post("/guardar-articulo", summary="Guardar artículo generado en .txt o .docx")
 async def descargar_articulo(data: Articulo, formato: str = Query("txt", enum=["txt", "docx"])):
@@ -125,19 +247,32 @@ async def descargar_articulo(data: Articulo, formato: str = Query("txt", enum=["
         raise HTTPException(status_code=500, detail=f"Error al guardar artículo: {str(e)}")
 
 # ──────────────── ENDPOINT: Texto a Audio ────────────────    
+def _sintetizar_a_archivo(texto: str, filename: str):
+    # Sintetizador del pool (conexión ya abierta); el audio vuelve en memoria y se escribe acá
+    result = sintetizar(texto)
+    if result.audio_data:
+        with open(filename, "wb") as f:
+            f.write(result.audio_data)
+    return result
+
 @router.post("/texto-audio")
 async def texto_a_audio(data: dict):
     texto = data.get("texto")
     if not texto:
         raise HTTPException(status_code=400, detail="Texto no proporcionado")
 
-    speech_config = SpeechConfig(subscription=settings.azure_speech_key, region=settings.azure_speech_region)
-    filename = f"/tmp/{uuid.uuid4()}.mp3"
-    audio_config = AudioConfig(filename=filename)
-    synthesizer = SpeechSynthesizer(speech_config=speech_config, audio_config=audio_config)
+    # El mismo texto pedido a la vez (p. ej. el botón "escuchar" de un borrador
+    # compartido) se sintetiza una sola vez y todos reciben el mismo archivo
+    filename = await sintesis_en_curso.ejecutar(
+        clave_cache("tts", normalizar_texto(texto)), lambda: _sintetizar(texto)
+    )
+    return FileResponse(filename, media_type="audio/mpeg", filename="voz.mp3")
+
 
-    result = synthesizer.speak_text_async(texto).get()
+async def _sintetizar(texto: str) -> str:
+    filename = f"/tmp/{uuid.uuid4()}.mp3"
+    # La síntesis bloquea hasta terminar: se ejecuta en la etapa "sintesis" fuera del event loop
+    result = await ejecutor.en_hilo("sintesis", _sintetizar_a_archivo, texto, filename)
     if result.reason.name != "SynthesizingAudioCompleted":
         raise HTTPException(status_code=500, detail="Fallo al sintetizar audio")
-
-    return FileResponse(filename, media_type="audio/mpeg", filename="voz.mp3")    
+    return filename    
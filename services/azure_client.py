@@ -1,5 +1,6 @@
 # services/azure_client.py
-from openai import AzureOpenAI
+import httpx
+from openai import AsyncAzureOpenAI, AzureOpenAI
 from Backend_app.config import settings
 
 openai_client = AzureOpenAI(
@@ -7,3 +8,22 @@ openai_client = AzureOpenAI(
     api_key=settings.azure_openai_api_key,
     api_version=settings.azure_openai_api_version
 )
+
+# Cliente async compartido: no bloquea el event loop mientras espera al modelo.
+# Un único pool de conexiones HTTP (keep-alive) para todo el proceso. El SDK no
+# reintenta: los 429 (según Retry-After), 5xx y errores de conexión los
+# reintenta services/cuota_openai.completar, que además respeta la cuota.
+openai_async = AsyncAzureOpenAI(
+    azure_endpoint=settings.azure_openai_endpoint,
+    api_key=settings.azure_openai_api_key,
+    api_version=settings.azure_openai_api_version,
+    timeout=settings.openai_timeout_s,
+    max_retries=0,
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.openai_max_conexiones,
+            max_keepalive_connections=settings.openai_max_conexiones,
+        ),
+        timeout=settings.openai_timeout_s,
+    ),
+)
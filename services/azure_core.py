@@ -2,6 +2,8 @@
 import os
 import azure.cognitiveservices.speech as speechsdk
 from Backend_app.config import settings
+from .speech_clientes import crear_recognizer
+from .formato import formatear
 import re
 import logging
 
@@ -10,18 +12,16 @@ logger = logging.getLogger(__name__)
 def transcribir_audio_azure_sdk(path_audio: str, modo_salida: str) -> str:
     logger.info(f"🎙️ Procesando: {path_audio}, modo: {modo_salida}")
 
-    # Configurar Azure Speech
-    speech_config = speechsdk.SpeechConfig(
-        subscription=settings.azure_speech_key,
-        region=settings.azure_region
-    )
-    speech_config.speech_recognition_language = "es-ES"  # Puedes parametrizar esto si lo necesitas
+    # Configurar Azure Speech (SpeechConfig compartido, ver services/speech_clientes.py)
     audio_input = speechsdk.AudioConfig(filename=path_audio)
 
     # Crear el reconocedor
-    recognizer = speechsdk.SpeechRecognizer(
-        speech_config=speech_config,
-        audio_config=audio_input
+    recognizer = crear_recognizer(
+        audio_input,
+        "es-ES",  # Puedes parametrizar esto si lo necesitas
+        settings.azure_speech_key,
+        settings.azure_region,
+        continuo=False,
     )
 
     # Transcribir de una vez
@@ -58,5 +58,4 @@ def transcribir_audio_azure_sdk(path_audio: str, modo_salida: str) -> str:
 
 def formatear_como_dialogo(texto: str) -> str:
     """Divide texto plano en frases tipo diálogo."""
-    frases = re.split(r'(?<=[.?!])\s+', texto)
-    return "\n\n".join(f"• {frase.strip()}" for frase in frases if frase.strip())
+    return formatear(texto, "vinetas")
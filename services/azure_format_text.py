@@ -3,31 +3,13 @@ import re
 
 # Si usas Hugging Face para resumen
 
-from .azure_client import openai_client
+from .formato import formatear
 
 
     
 def limpiar_y_formatear_dialogo(texto: str) -> str:
-    """
-    Formatea el texto dividiéndolo en frases para mejorar la legibilidad,
-    asumiendo que la diarización no está disponible automáticamente.
-    """
-    dialogo_formateado = []
-    # Divide el texto en frases basándose en puntuación final, y luego limpia espacios.
-    # Usa un regex para manejar múltiples espacios y la puntuación de forma robusta.
-    # Asegúrate de no crear frases vacías.
-    frases = re.split(r'(?<=[.?!])\s*', texto)
-    for frase in frases:
-        frase_limpia = frase.strip()
-        if frase_limpia:
-            # Podrías añadir un prefijo genérico si quieres simular oradores
-            # Por ejemplo:
-            # dialogo_formateado.append(f"• {frase_limpia}")
-            # O simplemente añadir la frase con un salto de línea
-            dialogo_formateado.append(frase_limpia)
-
-    # Unir las frases con dos saltos de línea para un formato más tipo párrafo
-    return "\n\n".join(dialogo_formateado)
+    """Una frase por bloque, separadas por una línea en blanco (ver services/formato.py)."""
+    return formatear(texto, "dialogo")
 
 # def resumen_tematico(texto: str) -> str:
 #     """Genera un resumen temático del texto utilizando un modelo Hugging Face."""
@@ -53,13 +35,3 @@ def limpiar_y_formatear_dialogo(texto: str) -> str:
 #             resumenes.append(f"ERROR al resumir parte {i+1}.")
             
 #     return "\n\n".join(resumenes)
-
-def resumen_tematico(texto: str) -> str:
-    prompt = f"Resumí el siguiente texto en pocas frases:\n\n{texto}"
-    response = openai_client.chat.completions.create(
-        model="gpt-4",  # o el deployment que tengas configurado
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.5,
-        max_tokens=500,
-    )
-    return response.choices[0].message.content.strip()
@@ -1,4 +1,5 @@
 from pathlib import Path
+import asyncio
 import os
 import subprocess
 import logging
@@ -6,10 +7,22 @@ import azure.cognitiveservices.speech as speechsdk
 import time
 import re
 import wave
+from typing import List, Optional, Tuple
 from uuid import uuid4
 
+from fastapi import HTTPException
+
 from Backend_app.config import settings
-from .azure_format_text import limpiar_y_formatear_dialogo, resumen_tematico
+from .workspace import gestor_workspaces, CuotaDiscoExcedida
+from .ejecucion import ejecutor
+from .plazos import PlazoExcedido, con_plazo, en_plazo, iterar_en_plazo, plazo_actual, plazo_por_duracion, duracion_wav
+from .reconocimiento import SesionReconocimiento, transcribir_pcm, iterar_segmentos_pcm
+from .speech_clientes import crear_recognizer
+from .vad import transcribir_wav_con_vad
+from .cache import cache_transcripciones, clave_transcripcion, hash_upload, HashStream
+from .ingesta import Entrada, iterar_upload, convertir_a_wav, duracion_archivo, pcm_desde_ffmpeg, pcm_desde_stream, ErrorConversion
+from .azure_format_text import limpiar_y_formatear_dialogo
+from .resumen import resumir
 
 logger = logging.getLogger(__name__)
 
@@ -18,10 +31,7 @@ AZURE_KEY = settings.azure_speech_key
 #AZURE_REGION = settings.azure_region
 AZURE_REGION = settings.azure_speech_region  # Cambiado para usar la variable de entorno
 LANGUAGE = "es-ES"  # Usa es-ES o es-MX para mayor compatibilidad
-#WORK_DIR = settings.work_dir / "audio_work"
-WORK_DIR = Path("C:/tmp/auditxt")
-
-FFMPEG_EXE = settings.work_dir / "ffmpeg.exe"
+# Los archivos temporales van al workspace de cada job (services/workspace.py)
 
 # --- Transcripción con Azure ---
 def transcribir_azure_wav(path_audio: str) -> str:
@@ -31,113 +41,141 @@ def transcribir_azure_wav(path_audio: str) -> str:
     print("Language:", LANGUAGE)
     print("Audio Path:", path_audio)
 
-    speech_config = speechsdk.SpeechConfig(subscription=AZURE_KEY, region=AZURE_REGION)
-    speech_config.speech_recognition_language = LANGUAGE
     audio_config = speechsdk.AudioConfig(filename=path_audio)
-
-    recognizer = speechsdk.SpeechRecognizer(
-        speech_config=speech_config,
-        audio_config=audio_config
-    )
-
-    texto = []
+    recognizer = crear_recognizer(audio_config, LANGUAGE, AZURE_KEY, AZURE_REGION)
 
     def on_session_started(evt):
         logger.info("✅ Sesión de reconocimiento iniciada.")
 
-    def on_recognized(evt):
-        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
-            logger.info(f"🗣 Reconocido: {evt.result.text}")
-            texto.append(evt.result.text)
-        else:
-            logger.info(f"🛑 No se reconoció texto en este fragmento")
+    recognizer.session_started.connect(on_session_started)
+    sesion = SesionReconocimiento(recognizer)
+    sesion.ejecutar(timeout=plazo_por_duracion(duracion_wav(path_audio)))
 
-    def on_canceled(evt):
-        logger.error(f"🚫 Transcripción cancelada: {evt.reason}, error_details: {evt.error_details}")
+    return sesion.texto
 
-    def stop_cb(evt):
-        nonlocal done
-        done = True
+# --- Texto enriquecido ---
+# El formateo vive en services/formato.py (limpiar_y_formatear_dialogo viene de azure_format_text)
+def resumen_tematico_placeholder(texto: str) -> str:
+    return f"Resumen temático (simulado):\n\n{texto[:300]}..."
 
-    recognizer.session_started.connect(on_session_started)
-    recognizer.recognized.connect(on_recognized)
-    recognizer.canceled.connect(on_canceled)
-    recognizer.session_stopped.connect(stop_cb)
-    recognizer.speech_end_detected.connect(stop_cb)
+# --- Función principal ---
+async def transcribir_archivo_azure(upload_file, modo_salida: str = "dialogo", modo_audio: str = "archivo") -> str:
+    logger.info(f"📥 Archivo recibido para transcripción: {upload_file.filename}, modo: {modo_salida}")
+    # El upload ya está completo en disco: se hashea antes para poder responder desde la caché
+    hash_audio = await hash_upload(upload_file)
+    return await transcribir_stream_azure(
+        iterar_upload(upload_file), upload_file.filename, modo_salida, modo_audio, hash_audio=hash_audio
+    )
 
-    done = False
-    recognizer.start_continuous_recognition()
 
-    start_time = time.time()
-    while not done and time.time() - start_time < 60:
-        time.sleep(0.5)
+async def transcribir_stream_azure(
+    entrada: Entrada,
+    nombre_archivo: str,
+    modo_salida: str = "dialogo",
+    modo_audio: str = "archivo",
+    hash_audio: Optional[str] = None,
+) -> str:
+    """Transcribe audio que llega en bloques (UploadFile o cuerpo crudo del request)
+    o que ya está en disco (`entrada` es una ruta; requiere `hash_audio`).
 
-    recognizer.stop_continuous_recognition()
+    modo_audio="stream" pasa el PCM de ffmpeg directo al reconocedor, sin WAV intermedio.
+    Con `hash_audio` (sha256 de los bytes) se consulta la caché antes de procesar;
+    sin él, el hash se calcula al pasar los bloques y solo sirve para guardar el resultado.
+    """
+    if hash_audio is not None:
+        clave = clave_transcripcion(hash_audio, LANGUAGE, modo_salida, modo_audio=modo_audio)
+        if (en_cache := await cache_transcripciones.obtener_async(clave)) is not None:
+            logger.info(f"⚡ Transcripción servida desde caché ({nombre_archivo})")
+            return en_cache
+    else:
+        entrada = HashStream(entrada)
 
-    return " ".join(texto).strip()
+    # Workspace exclusivo para este archivo; se borra al terminar
+    try:
+        ws = await gestor_workspaces.crear_async("upload")
+    except CuotaDiscoExcedida as e:
+        raise HTTPException(status_code=507, detail=str(e))
 
-# --- Texto enriquecido ---
-def limpiar_y_formatear_dialogo(texto: str) -> str:
-    frases = re.split(r'(?<=[.?!])\s*', texto)
-    return "\n\n".join([f.strip() for f in frases if f.strip()])
+    # Plazo inicial para recibir y convertir; al conocer la duración se ajusta
+    with con_plazo(settings.plazo_inicial_s):
+        try:
+            if modo_audio == "stream":
+                texto = await _transcribir_por_push_stream(ws, entrada, nombre_archivo)
+            else:
+                texto = await _transcribir_por_archivo(ws, entrada, nombre_archivo)
+            resultado = await _formatear_salida(texto, modo_salida)
+        except ErrorConversion as e:
+            # Como error y no como texto: /multiple lo cuenta como archivo fallido
+            logger.error(f"❌ Error en conversión de audio: {e}")
+            raise HTTPException(status_code=422, detail="Error en la conversión de audio.")
+        except PlazoExcedido as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except CuotaDiscoExcedida as e:
+            # ws.verificar_cuota_async() a mitad de camino (el audio convertido no entra en la cuota)
+            raise HTTPException(status_code=507, detail=str(e))
+        finally:
+            await ws.liberar_async()
 
-def resumen_tematico_placeholder(texto: str) -> str:
-    return f"Resumen temático (simulado):\n\n{texto[:300]}..."
+    if hash_audio is None:
+        clave = clave_transcripcion(entrada.hexdigest(), LANGUAGE, modo_salida, modo_audio=modo_audio)
+    await cache_transcripciones.guardar_async(clave, resultado)
+    return resultado
 
-# --- Función principal ---
-async def transcribir_archivo_azure(upload_file, modo_salida: str = "dialogo") -> str:
-    logger.info(f"📥 Archivo recibido para transcripción: {upload_file.filename}, modo: {modo_salida}")
 
-    # Asegurar carpeta de trabajo
-    WORK_DIR.mkdir(parents=True, exist_ok=True)
+async def _transcribir_por_push_stream(ws, entrada: Entrada, nombre_archivo: str) -> str:
+    extension = Path(nombre_archivo).suffix
+    try:
+        # Sin WAV no hay duración de antemano: rige el plazo inicial del job
+        async with ejecutor.limite("reconocimiento"):
+            segmentos = await en_plazo("reconocimiento", transcribir_pcm(
+                pcm_desde_stream(entrada, extension, ws, etapa=None), AZURE_KEY, AZURE_REGION, LANGUAGE
+            ))
+    except (ErrorConversion, PlazoExcedido):
+        raise
+    except Exception as e:
+        logger.exception("❌ Error inesperado durante transcripción")
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+    texto = " ".join(s.texto for s in segmentos).strip()
+    logger.info(f"📝 Texto recibido: {texto!r}")
+    return texto
 
-    # Guardar el archivo
-    original_ext = Path(upload_file.filename).suffix
-    base_name = Path(upload_file.filename).stem
+
+async def _transcribir_por_archivo(ws, entrada: Entrada, nombre_archivo: str) -> str:
+    original_ext = Path(nombre_archivo).suffix
+    base_name = Path(nombre_archivo).stem
     unique_id = uuid4().hex[:8]
-    original_path = WORK_DIR / f"{base_name}_{unique_id}{original_ext}"
-
-    with open(original_path, "wb") as f:
-        contenido = await upload_file.read()
-        f.write(contenido)
-
-    logger.info(f"📁 Archivo guardado en: {original_path}")
-
-    # Convertir a WAV
-    output_wav_path = original_path.with_suffix(".wav").with_name(f"{original_path.stem}_converted.wav")
-    command = [
-        str(FFMPEG_EXE),
-        "-y",
-        "-i", str(original_path),
-        "-ac", "1",
-        "-ar", "16000",
-        "-sample_fmt", "s16",
-        str(output_wav_path)
-    ]
+    output_wav_path = ws.archivo(f"{base_name}_{unique_id}_converted.wav")
 
-    try:
-        subprocess.run(command, capture_output=True, text=True, check=True)
-        logger.info(f"✅ Conversión a WAV completada: {output_wav_path}")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"❌ Error en conversión a WAV: {e.stderr}")
-        return "Error en la conversión de audio."
+    # Conversión a WAV mientras llegan los bloques (o desde el archivo, si ya está en disco)
+    total = await en_plazo("conversion", convertir_a_wav(entrada, output_wav_path, extension=original_ext, ws=ws))
+    logger.info(f"📁 {total} bytes recibidos y convertidos: {output_wav_path}")
+    await ws.verificar_cuota_async()
 
-    # Leer duración para debug
+    # La duración (cabecera del WAV) define el plazo de reconocimiento y resumen
     try:
-        with wave.open(str(output_wav_path), "rb") as wf:
-            duration = wf.getnframes() / wf.getframerate()
-            logger.info(f"🔍 Duración del audio: {duration:.2f} segundos")
+        duration = duracion_wav(output_wav_path)
+        logger.info(f"🔍 Duración del audio: {duration:.2f} segundos")
+        plazo_actual().extender_a(plazo_por_duracion(duration))
     except Exception as e:
         logger.warning(f"⚠️ Error leyendo el WAV antes de transcribir: {e}")
 
-    # Transcripción
+    # Transcripción: se recortan los silencios (VAD) y el resto se reconoce en paralelo
     try:
-        texto = transcribir_azure_wav(str(output_wav_path))
+        segmentos = await en_plazo(
+            "reconocimiento", transcribir_wav_con_vad(ws, output_wav_path, AZURE_KEY, AZURE_REGION, LANGUAGE)
+        )
+        texto = " ".join(s.texto for s in segmentos).strip()
         logger.info(f"📝 Texto recibido: {texto!r}")
+    except (PlazoExcedido, CuotaDiscoExcedida):
+        raise
     except Exception as e:
         logger.exception("❌ Error inesperado durante transcripción")
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
 
+    return texto
+
+
+async def _formatear_salida(texto: str, modo_salida: str) -> str:
     if not texto:
         logger.warning("⚠️ No se reconoció ningún texto en el audio.")
         return ""
@@ -146,6 +184,123 @@ async def transcribir_archivo_azure(upload_file, modo_salida: str = "dialogo") -
     if modo_salida == "dialogo":
         return limpiar_y_formatear_dialogo(texto)
     elif modo_salida == "resumen":
-        return resumen_tematico(texto)
+        return await resumir(texto)
     else:
         return texto
+
+
+# --- Transcripción en streaming (SSE / NDJSON, ver services/eventos.py) ---
+async def _segmentos_archivo(ruta_audio: Path):
+    # Corre bajo el plazo del llamador; con la duración (según ffmpeg) se ajusta
+    if (duracion := await en_plazo("conversion", duracion_archivo(ruta_audio))) is not None:
+        plazo_actual().extender_a(plazo_por_duracion(duracion))
+    async with ejecutor.limite("reconocimiento"):
+        # Ya tiene cupo de reconocimiento: ffmpeg no ocupa además uno de conversión
+        pcm = pcm_desde_ffmpeg(["-i", str(ruta_audio)], etapa=None)
+        async for segmento in iterar_en_plazo(
+            "reconocimiento", iterar_segmentos_pcm(pcm, AZURE_KEY, AZURE_REGION, LANGUAGE)
+        ):
+            yield segmento
+
+
+async def segmentos_archivo_azure(ws, ruta_audio: Path):
+    """Segmentos (con tiempos por palabra) de `ruta_audio` a medida que se reconocen.
+
+    Libera el workspace `ws` al terminar.
+    """
+    try:
+        with con_plazo(settings.plazo_inicial_s):
+            async for segmento in _segmentos_archivo(ruta_audio):
+                yield segmento
+    finally:
+        await ws.liberar_async()
+
+
+async def eventos_archivo_azure(ws, ruta_audio: Path, modo_salida: str, hash_audio: str):
+    """Genera ("segmento", ...) por cada frase reconocida y un ("final", ...) con el resultado.
+
+    `ruta_audio` es la copia del upload en el workspace `ws`, que se libera al terminar.
+    """
+    # Se reconoce por push stream, sin VAD: comparte caché con modo_audio="stream"
+    clave = clave_transcripcion(hash_audio, LANGUAGE, modo_salida, modo_audio="stream")
+    try:
+        if (en_cache := await cache_transcripciones.obtener_async(clave)) is not None:
+            yield "final", {"transcripcion": en_cache, "modo_salida": modo_salida, "cache": True}
+            return
+
+        # Un mismo plazo para reconocimiento y resumen; si vence llega un evento "error"
+        with con_plazo(settings.plazo_inicial_s):
+            segmentos = []
+            async for segmento in _segmentos_archivo(ruta_audio):
+                segmentos.append(segmento)
+                yield "segmento", segmento.a_dict()
+            await ws.liberar_async()  # El resumen ya no necesita el audio
+            resultado = await _formatear_salida(" ".join(s.texto for s in segmentos).strip(), modo_salida)
+    finally:
+        await ws.liberar_async()
+
+    await cache_transcripciones.guardar_async(clave, resultado)
+    yield "final", {"transcripcion": resultado, "modo_salida": modo_salida, "cache": False}
+
+
+# --- Varios archivos en un request ---
+async def _transcribir_uno(indice: int, nombre: str, ruta: Path, hash_audio: str,
+                           modo_salida: str, modo_audio: str) -> dict:
+    inicio = time.perf_counter()
+    resultado = {"indice": indice, "nombre": nombre}
+    try:
+        # Ya está en el workspace: ffmpeg lo lee por su ruta
+        texto = await transcribir_stream_azure(ruta, nombre, modo_salida, modo_audio, hash_audio=hash_audio)
+        resultado["transcripcion"] = texto.strip()
+    except HTTPException as e:
+        resultado["error"] = e.detail
+    except Exception as e:
+        logger.error(f"❌ Error al transcribir {nombre}: {e}")
+        resultado["error"] = "Error interno en el servidor al transcribir."
+    finally:
+        ruta.unlink(missing_ok=True)  # Libera cuota de disco apenas termina cada archivo
+    resultado["segundos"] = round(time.perf_counter() - inicio, 2)
+    return resultado
+
+
+async def eventos_multiples_azure(ws, archivos: List[Tuple[str, Path, str]], modo_salida: str, modo_audio: str):
+    """Transcribe varios archivos a la vez (hasta MULTIARCHIVO_CONCURRENTES).
+
+    `archivos` son tuplas (nombre, ruta en `ws`, sha256). Genera un
+    ("archivo", ...) por cada uno a medida que termina, en el orden en que
+    terminan, y al final un ("final", ...) con el documento combinado en el
+    orden de subida. Libera `ws` al terminar.
+    """
+    limite = asyncio.Semaphore(settings.multiarchivo_concurrentes)
+
+    async def procesar(indice, nombre, ruta, hash_audio):
+        async with limite:
+            return await _transcribir_uno(indice, nombre, ruta, hash_audio, modo_salida, modo_audio)
+
+    tareas = [
+        asyncio.create_task(procesar(i, nombre, ruta, hash_audio))
+        for i, (nombre, ruta, hash_audio) in enumerate(archivos)
+    ]
+    resultados = [None] * len(tareas)
+    try:
+        for siguiente in asyncio.as_completed(tareas):
+            resultado = await siguiente
+            resultados[resultado["indice"]] = resultado
+            yield "archivo", resultado
+    finally:
+        # Si el cliente se desconecta no tiene sentido seguir transcribiendo
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        await ws.liberar_async()
+
+    documento = "\n\n".join(
+        f"## {r['nombre']}\n\n{r.get('transcripcion') or '[' + r.get('error', 'Sin voz detectada') + ']'}"
+        for r in resultados
+    )
+    yield "final", {
+        "documento": documento,
+        "modo_salida": modo_salida,
+        "archivos": len(resultados),
+        "errores": sum(1 for r in resultados if "error" in r),
+    }
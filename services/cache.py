@@ -0,0 +1,370 @@
+# services/cache.py
+# Caché en disco direccionada por contenido para resultados de transcripción.
+# La clave es un hash del audio (más idioma y modo de salida), así el mismo
+# archivo subido dos veces, o el mismo video enviado de nuevo, se responde en
+# milisegundos sin volver a pagar conversión ni reconocimiento. El tamaño total
+# está acotado y se desaloja lo usado menos recientemente (LRU); opcionalmente
+# las entradas vencen tras un TTL. También guarda archivos (audio descargado).
+# CacheMemoria es la variante en RAM (LRU por cantidad de entradas) para
+# resultados chicos y muy repetidos; lo que desaloja puede pasar a una CacheDisco.
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+from Backend_app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_HASH = 1024 * 1024
+
+
+def clave_cache(*partes: str) -> str:
+    """Clave estable a partir de varias partes (hash del audio, idioma, modo...)."""
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+
+def clave_transcripcion(*partes: str, modo_audio: str) -> str:
+    """Clave de un resultado de transcripción: `partes` (audio, idioma, modo de
+    salida) más lo que cambia el texto reconocido. El modo "archivo" recorta
+    silencios con el VAD, así que su configuración también forma parte de la clave.
+    """
+    if modo_audio == "archivo":
+        vad = f"vad={settings.vad_habilitado}:{settings.vad_umbral_db}:{settings.vad_margen_ms}:{settings.vad_silencio_min_ms}"
+        return clave_cache(*partes, modo_audio, vad)
+    return clave_cache(*partes, modo_audio)
+
+
+_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_texto(texto: str) -> str:
+    """Forma canónica para claves: Unicode NFC, espacios colapsados y sin bordes."""
+    return _ESPACIOS.sub(" ", unicodedata.normalize("NFC", texto)).strip()
+
+
+def hash_archivo(ruta: Path) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        while datos := f.read(CHUNK_HASH):
+            h.update(datos)
+    return h.hexdigest()
+
+
+async def hash_upload(upload_file) -> str:
+    """Hashea un UploadFile por bloques y lo rebobina para poder leerlo de nuevo."""
+    h = hashlib.sha256()
+    while datos := await upload_file.read(CHUNK_HASH):
+        h.update(datos)
+    await upload_file.seek(0)
+    return h.hexdigest()
+
+
+class HashStream:
+    """Envuelve un iterador de bloques y calcula su sha256 a medida que pasan."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+        self._hash = hashlib.sha256()
+
+    async def __aiter__(self):
+        async for datos in self._chunks:
+            self._hash.update(datos)
+            yield datos
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+class CacheDisco:
+    """Entradas en `raiz`, un archivo por clave, con desalojo LRU por tamaño total.
+
+    El orden LRU se guarda en la fecha de acceso de cada archivo (se actualiza
+    en cada acierto) y la de modificación marca la creación para el TTL, así
+    ambos sobreviven a reinicios del proceso. Los valores JSON se leen con
+    `obtener`/`guardar`; los archivos con `copiar_archivo`/`guardar_archivo`.
+    """
+
+    def __init__(
+        self,
+        raiz: Path,
+        max_bytes: int,
+        nombre: str = "cache",
+        ttl_s: Optional[float] = None,
+        sufijo: str = ".json",
+    ):
+        self.raiz = Path(raiz)
+        self.max_bytes = max_bytes
+        self.nombre = nombre
+        self.ttl_s = ttl_s
+        self.sufijo = sufijo
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self._lock = threading.Lock()
+        self._indice: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self.raiz.mkdir(parents=True, exist_ok=True)
+        self._cargar_indice()
+
+    def _ruta(self, clave: str) -> Path:
+        return self.raiz / f"{clave}{self.sufijo}"
+
+    def _cargar_indice(self):
+        entradas = []
+        for ruta in self.raiz.glob(f"*{self.sufijo}"):
+            try:
+                st = ruta.stat()
+            except OSError:
+                continue
+            entradas.append((st.st_atime, ruta.stem, st.st_size))
+        for _, clave, tamano in sorted(entradas):
+            self._indice[clave] = tamano
+            self._total += tamano
+        for ruta in self.raiz.glob("*.tmp"):
+            ruta.unlink(missing_ok=True)  # Escrituras interrumpidas
+        if entradas:
+            logger.info(f"🗃️ Caché {self.nombre}: {len(entradas)} entradas ({self._total / 1e6:.1f} MB)")
+
+    def _vigente(self, clave: str) -> Optional[Path]:
+        """Ruta de la entrada si existe y no venció (con el lock tomado); cuenta el acierto/fallo."""
+        if clave not in self._indice:
+            self.fallos += 1
+            return None
+        ruta = self._ruta(clave)
+        try:
+            st = ruta.stat()
+            if self.ttl_s is not None and time.time() - st.st_mtime > self.ttl_s:
+                raise FileNotFoundError(ruta)
+            os.utime(ruta, (time.time(), st.st_mtime))  # Acceso = uso reciente; mtime = creación
+        except OSError:
+            # Entrada vencida o borrada por fuera: se descarta y cuenta como fallo
+            self._descartar(clave)
+            self.fallos += 1
+            return None
+        self._indice.move_to_end(clave)
+        self.aciertos += 1
+        return ruta
+
+    def _descartar(self, clave: str):
+        self._total -= self._indice.pop(clave, 0)
+        self._ruta(clave).unlink(missing_ok=True)
+
+    def obtener(self, clave: str) -> Optional[Any]:
+        with self._lock:
+            if (ruta := self._vigente(clave)) is None:
+                return None
+            try:
+                return json.loads(ruta.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._descartar(clave)  # Corrupta
+                return None
+
+    async def obtener_async(self, clave: str) -> Optional[Any]:
+        """`obtener` fuera del event loop (lee del disco con el lock tomado)."""
+        return await asyncio.to_thread(self.obtener, clave)
+
+    def guardar(self, clave: str, valor: Any):
+        if valor is None or valor == "":
+            return  # Un resultado vacío (audio sin habla, error) no se sirve como acierto
+        datos = json.dumps(valor, ensure_ascii=False).encode("utf-8")
+        ruta = self._ruta(clave)
+        temporal = ruta.with_suffix(".tmp")
+        with self._lock:
+            temporal.write_bytes(datos)
+            self._registrar(clave, temporal)
+
+    async def guardar_async(self, clave: str, valor: Any):
+        await asyncio.to_thread(self.guardar, clave, valor)
+
+    def copiar_archivo(self, clave: str, destino: Path) -> bool:
+        """Copia (o enlaza) la entrada a `destino`. Así el llamador no depende de
+        que la entrada siga en la caché mientras la usa."""
+        with self._lock:
+            if (ruta := self._vigente(clave)) is None:
+                return False
+            try:
+                os.link(ruta, destino)
+            except OSError:
+                shutil.copyfile(ruta, destino)  # Otro filesystem o sin soporte de hard links
+            return True
+
+    def guardar_archivo(self, clave: str, origen: Path):
+        """Mueve `origen` a la caché."""
+        temporal = self._ruta(clave).with_suffix(".tmp")
+        shutil.move(origen, temporal)
+        # `move` conserva las fechas del origen (yt-dlp usa la de subida del video):
+        # sin esto el TTL y el LRU verían la entrada como vieja apenas guardada
+        os.utime(temporal)
+        with self._lock:
+            self._registrar(clave, temporal)
+
+    def _registrar(self, clave: str, temporal: Path):
+        tamano = temporal.stat().st_size
+        if tamano > self.max_bytes:
+            temporal.unlink(missing_ok=True)
+            return
+        os.replace(temporal, self._ruta(clave))  # Atómico: un lector nunca ve una entrada a medias
+        self._total += tamano - self._indice.pop(clave, 0)
+        self._indice[clave] = tamano
+        self._desalojar()
+
+    def _desalojar(self):
+        while self._total > self.max_bytes and self._indice:
+            self._descartar(next(iter(self._indice)))
+            self.desalojos += 1
+
+    def estadisticas(self) -> dict:
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._indice),
+            "bytes": self._total,
+            "max_bytes": self.max_bytes,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / consultas, 3) if consultas else None,
+            "desalojos": self.desalojos,
+        }
+
+
+class CacheMemoria:
+    """LRU en memoria por cantidad de entradas, con TTL y desborde opcional a disco.
+
+    Un acierto en memoria no toca el disco (microsegundos). Lo que se desaloja
+    por tamaño pasa a `respaldo` (si hay) con su fecha de creación, así el TTL
+    sigue contando desde que se generó y no desde que se bajó a disco.
+    """
+
+    def __init__(
+        self,
+        max_entradas: int,
+        ttl_s: Optional[float] = None,
+        respaldo: Optional[CacheDisco] = None,
+        nombre: str = "memoria",
+    ):
+        self.max_entradas = max_entradas
+        self.ttl_s = ttl_s
+        self.respaldo = respaldo
+        self.nombre = nombre
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _vencida(self, creado: float) -> bool:
+        return self.ttl_s is not None and time.time() - creado > self.ttl_s
+
+    def _de_memoria(self, clave: str) -> Optional[Any]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                if not self._vencida(entrada[0]):
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return entrada[1]
+                del self._entradas[clave]
+        return None
+
+    def _de_respaldo(self, clave: str, guardada: Optional[dict]) -> Optional[Any]:
+        if guardada is not None and not self._vencida(guardada["creado"]):
+            with self._lock:
+                self.aciertos_disco += 1
+                desalojadas = self._insertar(clave, (guardada["creado"], guardada["valor"]))
+            self._bajar_a_disco(desalojadas)
+            return guardada["valor"]
+        with self._lock:
+            self.fallos += 1
+        return None
+
+    def obtener(self, clave: str) -> Optional[Any]:
+        if (valor := self._de_memoria(clave)) is not None:
+            return valor
+        guardada = self.respaldo.obtener(clave) if self.respaldo is not None else None
+        return self._de_respaldo(clave, guardada)
+
+    async def obtener_async(self, clave: str) -> Optional[Any]:
+        """Como `obtener`, pero la consulta al disco (solo si falla la memoria) corre fuera del event loop."""
+        if (valor := self._de_memoria(clave)) is not None:
+            return valor
+        guardada = await self.respaldo.obtener_async(clave) if self.respaldo is not None else None
+        return self._de_respaldo(clave, guardada)
+
+    def guardar(self, clave: str, valor: Any):
+        with self._lock:
+            desalojadas = self._insertar(clave, (time.time(), valor))
+        self._bajar_a_disco(desalojadas)
+
+    def _insertar(self, clave: str, entrada: tuple) -> list:
+        """Inserta con el lock tomado; devuelve lo desalojado para bajarlo a disco sin el lock."""
+        self._entradas[clave] = entrada
+        self._entradas.move_to_end(clave)
+        desalojadas = []
+        while len(self._entradas) > self.max_entradas:
+            vieja, (creado, valor) = self._entradas.popitem(last=False)
+            if self.respaldo is not None and not self._vencida(creado):
+                desalojadas.append((vieja, {"creado": creado, "valor": valor}))
+        return desalojadas
+
+    def _bajar_a_disco(self, desalojadas: list):
+        if not desalojadas:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._escribir_respaldo(desalojadas)  # Desde un hilo: se escribe acá mismo
+            return
+        # Desde el event loop la escritura va a un hilo: un acierto o un guardado no esperan al disco
+        loop.run_in_executor(None, self._escribir_respaldo, desalojadas)
+
+    def _escribir_respaldo(self, desalojadas: list):
+        for clave, guardada in desalojadas:
+            try:
+                self.respaldo.guardar(clave, guardada)
+            except OSError as e:
+                logger.warning(f"⚠️ Caché {self.nombre}: no se pudo bajar una entrada a disco: {e}")
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            entradas = len(self._entradas)
+            aciertos, aciertos_disco, fallos = self.aciertos, self.aciertos_disco, self.fallos
+        consultas = aciertos + aciertos_disco + fallos
+        return {
+            "entradas": entradas,
+            "max_entradas": self.max_entradas,
+            "aciertos": aciertos,
+            "aciertos_disco": aciertos_disco,
+            "fallos": fallos,
+            "tasa_aciertos": round((aciertos + aciertos_disco) / consultas, 3) if consultas else None,
+            "disco": self.respaldo.estadisticas() if self.respaldo is not None else None,
+        }
+
+
+cache_transcripciones = CacheDisco(
+    settings.data_work / "cache" / "transcripciones",
+    settings.cache_transcripciones_mb * 1024 * 1024,
+    nombre="transcripciones",
+    ttl_s=settings.cache_transcripciones_ttl_h * 3600,
+)
+
+# Borradores de /api/generar (redactor): memoria + desborde a disco si CACHE_GENERACION_DISCO_MB > 0
+cache_generacion = CacheMemoria(
+    settings.cache_generacion_entradas,
+    ttl_s=settings.cache_generacion_ttl_h * 3600,
+    respaldo=CacheDisco(
+        settings.data_work / "cache" / "generacion",
+        settings.cache_generacion_disco_mb * 1024 * 1024,
+        nombre="generacion",
+    ) if settings.cache_generacion_disco_mb > 0 else None,
+    nombre="generacion",
+)
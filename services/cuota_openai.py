@@ -0,0 +1,226 @@
+# services/cuota_openai.py
+# Limitador del lado del cliente para la cuota de Azure OpenAI.
+# El deployment tiene un tope de solicitudes y de tokens por minuto; sin
+# conocerlo, una ráfaga de pedidos (resúmenes map-reduce, varios editores en
+# /generar) recibía 429 y los reintentos a ciegas gastaban la cuota y fallaban.
+# Acá cada llamada espera su turno en una cola con prioridad (lo interactivo
+# antes que lo de fondo) hasta que hay lugar en dos cubetas de tokens
+# (solicitudes/min y tokens/min). Las cubetas se corrigen con lo que informa
+# Azure: el uso real de tokens y los encabezados x-ratelimit-remaining-*; un
+# 429 pausa a todos los pedidos el tiempo que indica Retry-After (o un backoff
+# exponencial si no viene).
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Any, List, Optional, Tuple
+
+import httpx
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+from Backend_app.config import settings
+from .azure_client import openai_async
+from .jobs import registrar_metrica
+
+logger = logging.getLogger(__name__)
+
+# Sin tokenizer instalado se estima: en español ~4 caracteres por token
+CARACTERES_POR_TOKEN = 4
+
+PRIORIDAD_INTERACTIVA = 0  # Un usuario esperando la respuesta (/generar)
+PRIORIDAD_FONDO = 1  # Resúmenes de transcripciones y jobs
+
+
+def estimar_tokens(texto: str) -> int:
+    return len(texto) // CARACTERES_POR_TOKEN + 1
+
+
+class Cubeta:
+    """Cubeta de tokens que se recarga de forma continua hasta `por_minuto`."""
+
+    def __init__(self, por_minuto: int):
+        self.capacidad = float(max(por_minuto, 0))
+        self.tasa = self.capacidad / 60
+        self.nivel = self.capacidad
+        self._t = time.monotonic()
+
+    def _recargar(self):
+        ahora = time.monotonic()
+        self.nivel = min(self.capacidad, self.nivel + (ahora - self._t) * self.tasa)
+        self._t = ahora
+
+    def espera(self, cantidad: float) -> float:
+        """Segundos hasta que haya `cantidad` disponible (0 si ya la hay)."""
+        if not self.capacidad:
+            return 0.0
+        self._recargar()
+        # Un pedido más grande que la cuota entera pasa cuando la cubeta está llena
+        faltan = min(cantidad, self.capacidad) - self.nivel
+        return faltan / self.tasa if faltan > 0 else 0.0
+
+    def consumir(self, cantidad: float):
+        if self.capacidad:
+            self._recargar()
+            self.nivel -= min(cantidad, self.capacidad)
+
+    def devolver(self, cantidad: float):
+        if self.capacidad:
+            self._recargar()
+            self.nivel = min(self.capacidad, self.nivel + cantidad)
+
+    def limitar(self, restantes: float):
+        # Azure cuenta también lo que consumen otros procesos con la misma cuota
+        if self.capacidad:
+            self._recargar()
+            self.nivel = min(self.nivel, restantes)
+
+
+def _segundos_retry_after(headers: httpx.Headers) -> Optional[float]:
+    try:
+        if (ms := headers.get("retry-after-ms")) is not None:
+            return float(ms) / 1000
+        if (s := headers.get("retry-after")) is not None:
+            return float(s)
+    except ValueError:
+        pass  # Retry-After como fecha HTTP: se usa el backoff propio
+    return None
+
+
+class LimitadorOpenAI:
+    def __init__(self, solicitudes_por_minuto: int, tokens_por_minuto: int):
+        self.solicitudes = Cubeta(solicitudes_por_minuto)
+        self.tokens = Cubeta(tokens_por_minuto)
+        self._cola: List[Tuple[int, int]] = []
+        self._orden = itertools.count()
+        self._cambio = asyncio.Condition()
+        self._pausa_hasta = 0.0
+        self._rechazos_seguidos = 0
+        self.total_429 = 0
+        self.total_espera_s = 0.0
+        self.atendidas = 0
+
+    def _espera(self, tokens: int) -> float:
+        pausa = self._pausa_hasta - time.monotonic()
+        return max(pausa, self.solicitudes.espera(1), self.tokens.espera(tokens), 0.0)
+
+    async def turno(self, tokens: int, prioridad: int = PRIORIDAD_INTERACTIVA):
+        """Espera en la cola hasta que la cuota admita una solicitud de `tokens` estimados.
+
+        Solo la cabeza de la cola (menor prioridad, y por orden de llegada) puede
+        consumir: un pedido grande no queda postergado indefinidamente por otros chicos.
+        """
+        inicio = time.monotonic()
+        entrada = (prioridad, next(self._orden))
+        async with self._cambio:
+            heapq.heappush(self._cola, entrada)
+            try:
+                while True:
+                    espera = self._espera(tokens) if self._cola[0] == entrada else None
+                    if espera == 0:
+                        break
+                    try:
+                        await asyncio.wait_for(self._cambio.wait(), espera)
+                    except asyncio.TimeoutError:
+                        pass
+                self.solicitudes.consumir(1)
+                self.tokens.consumir(tokens)
+            finally:
+                # También si se canceló mientras esperaba (cliente desconectado, plazo)
+                self._cola.remove(entrada)
+                heapq.heapify(self._cola)
+                self._cambio.notify_all()
+
+        esperado = time.monotonic() - inicio
+        self.total_espera_s += esperado
+        self.atendidas += 1
+        if esperado > 0.05:
+            logger.info(f"🚦 Turno de Azure OpenAI tras {esperado:.1f} s (prioridad {prioridad})")
+        registrar_metrica("openai_espera_ms", round(esperado * 1000, 1))
+
+    def registrar_respuesta(self, headers: httpx.Headers, estimados: int, usados: Optional[int]):
+        """Corrige las cubetas con el uso real y lo que informa Azure."""
+        self._rechazos_seguidos = 0
+        if usados is not None:
+            if usados < estimados:
+                self.tokens.devolver(estimados - usados)
+            else:
+                self.tokens.consumir(usados - estimados)
+        try:
+            if (restantes := headers.get("x-ratelimit-remaining-requests")) is not None:
+                self.solicitudes.limitar(float(restantes))
+            if (restantes := headers.get("x-ratelimit-remaining-tokens")) is not None:
+                self.tokens.limitar(float(restantes))
+        except ValueError:
+            pass
+
+    def cancelar(self, tokens: int):
+        """La solicitud falló sin respuesta (429, error de conexión): sus tokens estimados vuelven a la cubeta."""
+        self.tokens.devolver(tokens)
+
+    async def pausar(self, headers: Optional[httpx.Headers]):
+        """429: nadie vuelve a llamar hasta que pase el Retry-After (o el backoff)."""
+        self.total_429 += 1
+        self._rechazos_seguidos += 1
+        espera = _segundos_retry_after(headers) if headers is not None else None
+        if espera is None:
+            espera = min(2 ** self._rechazos_seguidos, settings.openai_backoff_max_s) * random.uniform(0.5, 1)
+        espera = min(espera, settings.openai_backoff_max_s)
+        logger.warning(f"⏳ Azure OpenAI respondió 429: pausa de {espera:.1f} s")
+        async with self._cambio:
+            self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + espera)
+            self._cambio.notify_all()
+
+    def estadisticas(self) -> dict:
+        return {
+            "en_cola": len(self._cola),
+            "atendidas": self.atendidas,
+            "rechazos_429": self.total_429,
+            "espera_promedio_s": round(self.total_espera_s / self.atendidas, 2) if self.atendidas else 0.0,
+            "pausa_restante_s": round(max(self._pausa_hasta - time.monotonic(), 0.0), 1),
+            "solicitudes_disponibles": round(self.solicitudes.nivel, 1),
+            "tokens_disponibles": round(self.tokens.nivel),
+        }
+
+
+limitador_openai = LimitadorOpenAI(settings.openai_solicitudes_por_minuto, settings.openai_tokens_por_minuto)
+
+
+def _tokens_pedido(messages: List[dict], max_tokens: int) -> int:
+    return sum(estimar_tokens(m.get("content") or "") for m in messages) + max_tokens
+
+
+async def completar(prioridad: int = PRIORIDAD_INTERACTIVA, **parametros) -> Any:
+    """`chat.completions.create` respetando la cuota, con reintentos según los encabezados.
+
+    Con `stream=True` devuelve el stream abierto (su uso real no se conoce y
+    queda la estimación).
+    """
+    tokens = _tokens_pedido(parametros["messages"], parametros.get("max_tokens") or 0)
+    for intento in range(settings.openai_max_reintentos + 1):
+        await limitador_openai.turno(tokens, prioridad)
+        try:
+            crudo = await openai_async.chat.completions.with_raw_response.create(**parametros)
+        except RateLimitError as e:
+            # Sin devolver la estimación, cada reintento la cobraría otra vez
+            limitador_openai.cancelar(tokens)
+            if intento == settings.openai_max_reintentos:
+                raise
+            await limitador_openai.pausar(e.response.headers)
+            continue
+        except (APIConnectionError, InternalServerError) as e:
+            # Error transitorio: no dice nada de la cuota, se reintenta con backoff propio
+            limitador_openai.cancelar(tokens)
+            if intento == settings.openai_max_reintentos:
+                raise
+            espera = min(2 ** intento, settings.openai_backoff_max_s) * random.uniform(0.5, 1)
+            logger.warning(f"⚠️ Error transitorio de Azure OpenAI (intento {intento + 1}): {e}")
+            await asyncio.sleep(espera)
+            continue
+
+        respuesta = crudo.parse()
+        uso = getattr(respuesta, "usage", None)
+        limitador_openai.registrar_respuesta(crudo.headers, tokens, uso.total_tokens if uso else None)
+        return respuesta
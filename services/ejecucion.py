@@ -0,0 +1,89 @@
+# services/ejecucion.py
+# Capa de ejecución para el trabajo bloqueante (yt-dlp, ffmpeg, Speech SDK).
+# Los endpoints son `async def`: si llaman directo a subprocess.run o a
+# `.get()` del SDK congelan el event loop y con él todos los demás requests
+# (incluido `/` y el websocket). Acá ese trabajo se despacha a pools dedicados
+# y cada etapa tiene su propio límite de concurrencia.
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from Backend_app.config import settings
+from .plazos import en_plazo
+
+logger = logging.getLogger(__name__)
+
+
+def _liberar(semaforo: asyncio.Semaphore, futuro: asyncio.Future):
+    semaforo.release()
+    # Se consulta el error para que no quede "nunca recuperado" si el llamador ya no espera (plazo vencido)
+    if not futuro.cancelled() and futuro.exception() is not None:
+        logger.debug(f"Trabajo del pool terminado con error: {futuro.exception()!r}")
+
+
+class Ejecutor:
+    """Pools de hilos/procesos + un semáforo por etapa del pipeline."""
+
+    def __init__(self, hilos: int, procesos: int, limites: Dict[str, int]):
+        self.hilos = hilos
+        self.procesos = procesos
+        self.limites = limites
+        self._pool_hilos = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="auditxt")
+        # El pool de procesos se crea recién cuando se usa (arrancarlo es caro)
+        self._pool_procesos: Optional[ProcessPoolExecutor] = None
+        self._semaforos = {etapa: asyncio.Semaphore(n) for etapa, n in limites.items()}
+
+    def limite(self, etapa: str) -> asyncio.Semaphore:
+        """Semáforo de la etapa, para trabajo async que no pasa por los pools
+        (p. ej. subprocesos de asyncio): `async with ejecutor.limite("conversion"):`."""
+        try:
+            return self._semaforos[etapa]
+        except KeyError:
+            raise ValueError(f"Etapa desconocida: {etapa!r}. Etapas válidas: {list(self._semaforos)}")
+
+    async def en_hilo(self, etapa: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Ejecuta `fn` en el pool de hilos respetando el límite de la etapa y el
+        plazo del job (services/plazos.py). Si el plazo vence, el llamador recibe
+        PlazoExcedido; el hilo no se puede interrumpir y termina por su cuenta."""
+        return await en_plazo(etapa, self._en_pool(self._pool_hilos, etapa, functools.partial(fn, *args, **kwargs)))
+
+    async def en_proceso(self, etapa: str, fn: Callable[..., Any], *args) -> Any:
+        """Para trabajo CPU-bound en Python puro. `fn` y sus argumentos deben ser picklables."""
+        if self._pool_procesos is None:
+            self._pool_procesos = ProcessPoolExecutor(max_workers=self.procesos)
+        return await en_plazo(etapa, self._en_pool(self._pool_procesos, etapa, functools.partial(fn, *args)))
+
+    async def _en_pool(self, pool: Executor, etapa: str, funcion: Callable[[], Any]) -> Any:
+        # El lugar de la etapa se libera cuando termina el hilo/proceso, no cuando
+        # el llamador deja de esperar: si el plazo vence el trabajo sigue ocupando
+        # su lugar y el límite de la etapa sigue acotando la concurrencia real.
+        semaforo = self.limite(etapa)
+        await semaforo.acquire()
+        try:
+            futuro = asyncio.get_running_loop().run_in_executor(pool, funcion)
+        except BaseException:
+            semaforo.release()
+            raise
+        futuro.add_done_callback(lambda f: _liberar(semaforo, f))
+        return await asyncio.shield(futuro)
+
+    def cerrar(self):
+        self._pool_hilos.shutdown(wait=False, cancel_futures=True)
+        if self._pool_procesos is not None:
+            self._pool_procesos.shutdown(wait=False, cancel_futures=True)
+
+
+ejecutor = Ejecutor(
+    hilos=settings.ejecucion_hilos,
+    procesos=settings.ejecucion_procesos,
+    limites={
+        "descarga": settings.limite_descarga,
+        "conversion": settings.limite_conversion,
+        "reconocimiento": settings.limite_reconocimiento,
+        "sintesis": settings.limite_sintesis,
+        "resumen": settings.limite_resumen,
+    },
+)
@@ -0,0 +1,53 @@
+# services/eventos.py
+# Respuestas en streaming (SSE o NDJSON) para los endpoints de transcripción.
+# En lugar de esperar a que termine todo el audio, el cliente recibe un evento
+# "segmento" por cada frase reconocida (con offset y duración) y al final un
+# evento "final" con el resultado formateado.
+
+import json
+import logging
+from typing import AsyncIterator, Tuple
+
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+FORMATOS = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson",
+}
+PATRON_FORMATO = "^(sse|ndjson)$"
+
+Evento = Tuple[str, dict]
+
+
+def serializar_evento(tipo: str, datos: dict, formato: str) -> str:
+    if formato == "sse":
+        return f"event: {tipo}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+    return json.dumps({"evento": tipo, **datos}, ensure_ascii=False) + "\n"
+
+
+async def _serializar(eventos: AsyncIterator[Evento], formato: str) -> AsyncIterator[str]:
+    try:
+        async for tipo, datos in eventos:
+            yield serializar_evento(tipo, datos, formato)
+    except Exception as e:
+        # Los headers ya salieron con 200: el error viaja como un evento más
+        logger.exception("❌ Error durante la respuesta en streaming")
+        yield serializar_evento("error", {"detalle": str(getattr(e, "detail", e))}, formato)
+
+
+def respuesta_eventos(
+    eventos: AsyncIterator[Evento],
+    formato: str = "sse",
+    al_terminar: BackgroundTask = None,
+) -> StreamingResponse:
+    """StreamingResponse que envía cada evento apenas se produce."""
+    return StreamingResponse(
+        _serializar(eventos, formato),
+        media_type=FORMATOS[formato],
+        # Evita que nginx/App Service acumulen la respuesta en buffer
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=al_terminar,
+    )
@@ -0,0 +1,104 @@
+# services/formato.py
+# Motor único de segmentación en frases y formateo de transcripciones.
+# Reemplaza las copias de `limpiar_y_formatear_dialogo` (transcriptor.py,
+# t.py, azure_transcriptor.py, azure_format_text.py) y
+# `azure_core.formatear_como_dialogo`: los patrones se compilan una vez, las
+# frases se recorren con generadores sobre los segmentos (sin `re.split` ni
+# listas intermedias) y la salida se produce por partes, así un texto de
+# varios MB se formatea en tiempo lineal y con memoria extra acotada a una frase.
+
+import re
+from typing import Callable, Dict, Iterable, Iterator
+
+# Una frase: texto hasta uno o más terminadores ("...", "?!", "…") seguidos de
+# espacio o del final, o el resto sin terminar. Un terminador pegado a texto
+# ("3.5", "1.500", "a.m.") no corta la frase.
+PATRON_FRASE = re.compile(r"(?:[^.?!…]+|[.?!…]+(?=\S))+(?:[.?!…]+|$)|[.?!…]+")
+TERMINADORES = ".?!…"
+
+FRASES_POR_PARRAFO = 4
+SEPARADOR = "\n\n"
+
+
+def frases(textos: Iterable[str]) -> Iterator[str]:
+    """Frases limpias de una secuencia de textos (segmentos reconocidos o un texto entero).
+
+    Una frase puede quedar partida entre dos segmentos (p. ej. en los cortes de
+    la segmentación en paralelo): la parte sin terminar se completa con el
+    segmento siguiente.
+    """
+    pendiente = ""
+    for texto in textos:
+        for m in PATRON_FRASE.finditer(texto):
+            frase = m[0].strip()
+            if not frase:
+                continue
+            if pendiente:
+                frase = f"{pendiente} {frase}"
+                pendiente = ""
+            if frase[-1] in TERMINADORES:
+                yield frase
+            else:
+                pendiente = frase
+    if pendiente:
+        yield pendiente
+
+
+def _dialogo(fs: Iterator[str]) -> Iterator[str]:
+    # Una frase por bloque (la diarización no está disponible)
+    for i, frase in enumerate(fs):
+        yield f"{SEPARADOR}{frase}" if i else frase
+
+
+def _vinetas(fs: Iterator[str]) -> Iterator[str]:
+    for i, frase in enumerate(fs):
+        yield f"{SEPARADOR if i else ''}• {frase}"
+
+
+def _parrafos(fs: Iterator[str]) -> Iterator[str]:
+    for i, frase in enumerate(fs):
+        if i == 0:
+            yield frase
+        elif i % FRASES_POR_PARRAFO == 0:
+            yield f"{SEPARADOR}{frase}"
+        else:
+            yield f" {frase}"
+
+
+def _texto(fs: Iterator[str]) -> Iterator[str]:
+    for i, frase in enumerate(fs):
+        yield f" {frase}" if i else frase
+
+
+MODOS: Dict[str, Callable[[Iterator[str]], Iterator[str]]] = {
+    "dialogo": _dialogo,
+    "vinetas": _vinetas,
+    "parrafos": _parrafos,
+    "texto": _texto,
+}
+
+
+def formatear_iter(textos: Iterable[str], modo: str = "dialogo") -> Iterator[str]:
+    """Salida formateada por partes, para escribirla o enviarla sin armar el texto entero."""
+    return MODOS[modo](frases(textos))
+
+
+def formatear(texto: str, modo: str = "dialogo") -> str:
+    return "".join(formatear_iter((texto,), modo))
+
+
+def formatear_oradores(texto: str) -> str:
+    """Una línea por intervención, sin partir en frases (formato de transcriptor/t.py).
+
+    Las líneas con prefijo de orador ("Orador 1: ...") se normalizan a
+    "Orador 1: contenido"; el resto se deja como está.
+    """
+    dialogo = []
+    for linea in texto.splitlines() if "\n" in texto else [texto]:
+        orador, separador, contenido = linea.partition(":")
+        # Heurística simple para "Orador X" (la diarización no está disponible)
+        if separador and orador.strip().endswith("or"):
+            dialogo.append(f"{orador.strip()}: {contenido.strip()}")
+        else:
+            dialogo.append(linea.strip())
+    return "\n".join(dialogo)
@@ -0,0 +1,367 @@
+# services/ingesta.py
+# Ingesta de audio por streaming: los bytes del upload se leen en bloques y la
+# memoria queda acotada a un bloque (INGESTA_CHUNK_KB) en lugar del archivo
+# entero. Van directo al stdin de ffmpeg, que decodifica mientras siguen
+# llegando datos (salvo formatos que necesitan acceso aleatorio, ver
+# EXTENSIONES_SIN_STREAMING, que se vuelcan antes al workspace). Un archivo que
+# ya está en disco se le pasa a ffmpeg por su ruta, sin volver a leerlo.
+
+import asyncio
+import contextlib
+import logging
+import os
+import re
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Optional, Union
+
+from Backend_app.config import settings
+from .ejecucion import ejecutor
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_EXE = settings.work_dir / "ffmpeg.exe"
+YT_DLP_EXE = settings.work_dir / "yt-dlp.exe"
+CHUNK_BYTES = settings.ingesta_chunk_kb * 1024
+
+# Contenedores MP4/QuickTime suelen tener el índice (moov) al final del
+# archivo: ffmpeg no puede leerlos desde un pipe y hay que volcarlos a disco.
+EXTENSIONES_SIN_STREAMING = {".m4a", ".mp4", ".mov", ".3gp"}
+
+# Parámetros de salida que espera Azure Speech: 16 kHz, mono, PCM 16 bits
+ARGS_SALIDA_WAV = ["-ac", "1", "-ar", "16000", "-sample_fmt", "s16"]
+
+# Audio a convertir: bloques (upload, cuerpo del request) o un archivo ya en disco
+Entrada = Union[Path, AsyncIterator[bytes]]
+
+
+class ErrorConversion(Exception):
+    """ffmpeg terminó con error al convertir el audio."""
+
+
+class ErrorDescarga(Exception):
+    """yt-dlp no pudo obtener el audio del video."""
+
+
+async def iterar_upload(upload_file, chunk_bytes: int = CHUNK_BYTES) -> AsyncIterator[bytes]:
+    """Lee un UploadFile de FastAPI en bloques de tamaño fijo."""
+    while datos := await upload_file.read(chunk_bytes):
+        yield datos
+
+
+async def _leer_stderr(stream: asyncio.StreamReader, max_bytes: int = 4096) -> str:
+    # Hay que vaciar stderr mientras ffmpeg corre para que el pipe no se llene
+    # y lo bloquee; solo se conserva la cola para el mensaje de error.
+    cola = deque()
+    total = 0
+    while datos := await stream.read(1024):
+        cola.append(datos)
+        total += len(datos)
+        while total > max_bytes and len(cola) > 1:
+            total -= len(cola.popleft())
+    return b"".join(cola).decode("utf-8", errors="replace").strip()
+
+
+async def _volcar_a_archivo(chunks: AsyncIterator[bytes], destino: Path) -> int:
+    total = 0
+    with open(destino, "wb") as f:
+        async for datos in chunks:
+            await asyncio.to_thread(f.write, datos)
+            total += len(datos)
+    return total
+
+
+async def guardar_upload(upload_file, destino: Path) -> int:
+    """Copia un UploadFile a `destino` por bloques (FastAPI lo cierra al volver el handler)."""
+    return await _volcar_a_archivo(iterar_upload(upload_file), destino)
+
+
+async def _desde_primer_bloque(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Espera el primer bloque y devuelve un iterador que lo incluye.
+
+    El cupo de conversión se toma recién cuando hay datos: un cliente que
+    tarda en empezar a subir no retiene a ffmpeg ocioso.
+    """
+    iterador = aiter(chunks)
+    try:
+        primero = await anext(iterador)
+    except StopAsyncIteration:
+        primero = b""
+
+    async def encadenado():
+        if primero:
+            yield primero
+        async for datos in iterador:
+            yield datos
+
+    return encadenado()
+
+
+def _con_acceso_aleatorio(extension: str) -> bool:
+    return extension.lower() in EXTENSIONES_SIN_STREAMING
+
+
+async def _volcar_original(chunks: AsyncIterator[bytes], extension: str, ws) -> Path:
+    if ws is None:
+        raise ValueError(f"Los archivos {extension} requieren un workspace para volcarse a disco.")
+    original = ws.archivo(f"original{extension.lower()}")
+    total = await _volcar_a_archivo(chunks, original)
+    logger.info(f"📁 Original {extension} volcado a disco ({total} bytes): ffmpeg necesita acceso aleatorio")
+    return original
+
+
+async def convertir_a_wav(entrada: Entrada, wav_path: Path, extension: str = "", ws=None) -> int:
+    """Convierte `entrada` a WAV 16 kHz mono y devuelve los bytes de entrada leídos.
+
+    Los bloques pasan a ffmpeg por el pipe a medida que llegan (la conversión
+    se solapa con la subida); los formatos de EXTENSIONES_SIN_STREAMING se
+    vuelcan antes al workspace `ws`. Una ruta se le pasa directo a ffmpeg.
+    """
+    if isinstance(entrada, Path):
+        async with ejecutor.limite("conversion"):
+            await _ejecutar_ffmpeg(["-i", str(entrada)], wav_path)
+        return entrada.stat().st_size
+
+    if _con_acceso_aleatorio(extension):
+        original = await _volcar_original(entrada, extension, ws)
+        try:
+            return await convertir_a_wav(original, wav_path)
+        finally:
+            original.unlink(missing_ok=True)  # Libera cuota del workspace para el reconocimiento
+
+    chunks = await _desde_primer_bloque(entrada)
+    async with ejecutor.limite("conversion"):
+        return await _ejecutar_ffmpeg(["-i", "pipe:0"], wav_path, chunks)
+
+
+async def _alimentar_stdin(proc, chunks: AsyncIterator[bytes]) -> int:
+    total = 0
+    try:
+        async for datos in chunks:
+            proc.stdin.write(datos)
+            await proc.stdin.drain()  # Backpressure: esperamos a que ffmpeg consuma
+            total += len(datos)
+    except (BrokenPipeError, ConnectionResetError):
+        # ffmpeg cerró stdin antes de tiempo (formato inválido); el error real está en stderr
+        pass
+    finally:
+        proc.stdin.close()
+    return total
+
+
+async def _ejecutar_ffmpeg(entrada: list, wav_path: Path, chunks: Optional[AsyncIterator[bytes]] = None) -> int:
+    proc = await asyncio.create_subprocess_exec(
+        str(FFMPEG_EXE), "-hide_banner", "-loglevel", "error", "-y",
+        *entrada, *ARGS_SALIDA_WAV, str(wav_path),
+        stdin=asyncio.subprocess.PIPE if chunks is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    tarea_stderr = asyncio.create_task(_leer_stderr(proc.stderr))
+    total = 0
+    try:
+        if chunks is not None:
+            total = await _alimentar_stdin(proc, chunks)
+        codigo = await proc.wait()
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    finally:
+        stderr = await tarea_stderr
+
+    if codigo != 0:
+        raise ErrorConversion(stderr or f"ffmpeg terminó con código {codigo}")
+    logger.info(f"✅ Conversión a WAV completada: {wav_path}")
+    return total
+
+
+# --- Salida PCM cruda (para reconocimiento por push stream) ---
+
+async def pcm_desde_ffmpeg(
+    entrada: list,
+    chunks: Optional[AsyncIterator[bytes]] = None,
+    stdin_fd: Optional[int] = None,
+    etapa: Optional[str] = "conversion",
+) -> AsyncIterator[bytes]:
+    """Ejecuta ffmpeg y entrega su salida PCM s16le 16 kHz mono a medida que la produce.
+
+    `entrada` son los argumentos de entrada de ffmpeg (p. ej. ["-i", ruta]); si
+    se pasan `chunks`, se escriben en su stdin en paralelo. Con `stdin_fd`, ffmpeg
+    lee directo de ese descriptor (p. ej. el extremo de lectura de un os.pipe);
+    la función se queda con el descriptor y lo cierra. Nada se escribe a disco.
+    `etapa=None` no toma el límite de conversión: para audio en vivo y para
+    quien ya tiene un cupo de "reconocimiento" (el generador vive lo que dure
+    el reconocimiento y no debe ocupar además un cupo de conversión).
+    """
+    if chunks is not None:
+        stdin = asyncio.subprocess.PIPE
+    elif stdin_fd is not None:
+        stdin = stdin_fd
+    else:
+        stdin = asyncio.subprocess.DEVNULL
+
+    async with ejecutor.limite(etapa) if etapa else contextlib.nullcontext():
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                str(FFMPEG_EXE), "-hide_banner", "-loglevel", "error",
+                *entrada, *ARGS_SALIDA_WAV, "-f", "s16le", "pipe:1",
+                stdin=stdin,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        finally:
+            # ffmpeg heredó su copia; la nuestra se cierra para que vea EOF a tiempo
+            if stdin_fd is not None:
+                os.close(stdin_fd)
+        tarea_stderr = asyncio.create_task(_leer_stderr(proc.stderr))
+        tarea_stdin = asyncio.create_task(_alimentar_stdin(proc, chunks)) if chunks is not None else None
+        try:
+            while datos := await proc.stdout.read(CHUNK_BYTES):
+                yield datos
+            if tarea_stdin is not None:
+                await tarea_stdin
+            codigo = await proc.wait()
+        finally:
+            # Si el consumidor abandona el generador, ffmpeg no debe quedar huérfano
+            if tarea_stdin is not None and not tarea_stdin.done():
+                tarea_stdin.cancel()
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            stderr = await tarea_stderr
+
+        if codigo != 0:
+            raise ErrorConversion(stderr or f"ffmpeg terminó con código {codigo}")
+
+
+async def pcm_desde_stream(
+    entrada: Entrada, extension: str = "", ws=None, etapa: Optional[str] = "conversion"
+) -> AsyncIterator[bytes]:
+    """PCM a partir de `entrada` (mismo criterio que convertir_a_wav).
+
+    `etapa` como en `pcm_desde_ffmpeg`.
+    """
+    if isinstance(entrada, Path):
+        async for datos in pcm_desde_ffmpeg(["-i", str(entrada)], etapa=etapa):
+            yield datos
+        return
+
+    if _con_acceso_aleatorio(extension):
+        original = await _volcar_original(entrada, extension, ws)
+        async for datos in pcm_desde_ffmpeg(["-i", str(original)], etapa=etapa):
+            yield datos
+        return
+
+    async for datos in pcm_desde_ffmpeg(["-i", "pipe:0"], entrada, etapa=etapa):
+        yield datos
+
+
+_PATRON_DURACION = re.compile(rb"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+async def duracion_archivo(ruta: Path, timeout: float = 30.0) -> Optional[float]:
+    """Duración de un audio en disco según ffmpeg (lee solo la cabecera).
+
+    None si ffmpeg no la informa (p. ej. un stream sin índice) o no responde a tiempo.
+    """
+    proceso = await asyncio.create_subprocess_exec(
+        str(FFMPEG_EXE), "-hide_banner", "-i", str(ruta),
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        # Sin salida, ffmpeg termina con error tras imprimir la información de la entrada
+        _, stderr = await asyncio.wait_for(proceso.communicate(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"⚠️ ffmpeg no informó la duración de {ruta.name} en {timeout:.0f}s")
+        return None
+    finally:
+        if proceso.returncode is None:
+            proceso.kill()
+            await proceso.wait()
+    if (coincidencia := _PATRON_DURACION.search(stderr)) is None:
+        return None
+    horas, minutos, segundos = coincidencia.groups()
+    return int(horas) * 3600 + int(minutos) * 60 + float(segundos)
+
+
+async def duracion_youtube(url: str, timeout: float = 30.0) -> Optional[float]:
+    """Duración del video en segundos según los metadatos de yt-dlp (sin descargarlo).
+
+    En modo stream no hay WAV del que leerla; None si yt-dlp no la informa
+    (transmisiones en vivo) o no responde a tiempo: rige el plazo inicial.
+    """
+    proceso = await asyncio.create_subprocess_exec(
+        str(YT_DLP_EXE),
+        "--skip-download", "--no-playlist", "--no-warnings",
+        "--print", "duration",
+        url,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        salida, _ = await asyncio.wait_for(proceso.communicate(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"⚠️ yt-dlp no informó la duración de {url} en {timeout:.0f}s")
+        return None
+    finally:
+        if proceso.returncode is None:
+            proceso.kill()
+            await proceso.wait()
+    try:
+        return float(salida.decode().strip())
+    except ValueError:
+        return None  # "NA" en vivos, o yt-dlp falló (el error lo informa la descarga)
+
+
+async def pcm_desde_youtube(url: str, etapa: Optional[str] = "conversion") -> AsyncIterator[bytes]:
+    """Pipeline yt-dlp -> ffmpeg -> PCM en una sola pasada.
+
+    yt-dlp baja el mejor stream de solo audio (sin recodificarlo a MP3) y lo
+    escribe en un pipe; ffmpeg lo decodifica a PCM mientras la descarga sigue
+    en curso, así el reconocedor recibe audio a los pocos segundos.
+    `etapa` como en `pcm_desde_ffmpeg`.
+    """
+    lectura, escritura = os.pipe()
+    try:
+        yt = await asyncio.create_subprocess_exec(
+            str(YT_DLP_EXE),
+            "-f", "bestaudio[ext=webm]/bestaudio",  # Opus/WebM se puede leer desde un pipe
+            "--no-playlist", "--quiet", "--no-warnings", "--no-part",
+            "-o", "-",
+            url,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=escritura,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except BaseException:
+        os.close(lectura)
+        raise
+    finally:
+        os.close(escritura)
+
+    tarea_stderr = asyncio.create_task(_leer_stderr(yt.stderr))
+    error_ffmpeg = None
+    try:
+        try:
+            async for datos in pcm_desde_ffmpeg(["-i", "pipe:0"], stdin_fd=lectura, etapa=etapa):
+                yield datos
+        except ErrorConversion as e:
+            # Si yt-dlp falló (video privado, no disponible...) ffmpeg solo ve
+            # una entrada vacía: el error útil es el de la descarga.
+            error_ffmpeg = e
+        codigo = await yt.wait()
+    finally:
+        if yt.returncode is None:
+            yt.kill()
+            await yt.wait()
+        stderr = await tarea_stderr
+
+    if codigo != 0:
+        raise ErrorDescarga(stderr or f"yt-dlp terminó con código {codigo}")
+    if error_ffmpeg is not None:
+        raise error_ffmpeg
@@ -0,0 +1,168 @@
+# services/jobs.py
+# Cola de trabajos en segundo plano para las transcripciones.
+# El endpoint encola el trabajo y responde al instante con un job_id; un pool
+# acotado de workers asyncio procesa la cola y el cliente consulta el estado.
+# Nota: el estado vive en memoria del proceso (con varios workers de uvicorn
+# cada proceso tiene su propia cola).
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+from uuid import uuid4
+
+from Backend_app.config import settings
+from .plazos import PlazoExcedido
+
+logger = logging.getLogger(__name__)
+
+# Estados posibles de un job
+PENDIENTE = "pendiente"
+PROCESANDO = "procesando"
+COMPLETADO = "completado"
+ERROR = "error"
+VENCIDO = "vencido"  # Alguna etapa superó el plazo del job (services/plazos.py)
+
+
+class ColaLlenaError(Exception):
+    """La cola de trabajos alcanzó su capacidad máxima."""
+
+
+@dataclass
+class Job:
+    id: str
+    tipo: str
+    estado: str = PENDIENTE
+    creado: float = field(default_factory=time.time)
+    iniciado: Optional[float] = None
+    finalizado: Optional[float] = None
+    resultado: Any = None
+    error: Optional[str] = None
+    metricas: dict = field(default_factory=dict)
+
+    def a_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "tipo": self.tipo,
+            "estado": self.estado,
+            "creado": self.creado,
+            "iniciado": self.iniciado,
+            "finalizado": self.finalizado,
+            "resultado": self.resultado,
+            "error": self.error,
+            "metricas": self.metricas,
+        }
+
+
+# Job que está ejecutando la tarea actual (las subtareas de asyncio lo heredan)
+_job_actual: contextvars.ContextVar[Optional[Job]] = contextvars.ContextVar("job_actual", default=None)
+
+
+def registrar_metrica(nombre: str, valor: Any):
+    """Anota una métrica en el job en curso; fuera de un job no hace nada."""
+    job = _job_actual.get()
+    if job is not None:
+        job.metricas[nombre] = valor
+
+
+class GestorJobs:
+    """Cola FIFO acotada + pool de workers con concurrencia configurable."""
+
+    def __init__(self, max_concurrentes: int, max_en_cola: int, max_guardados: int, nombre: str = "transcripciones"):
+        self.nombre = nombre
+        self.max_concurrentes = max(1, max_concurrentes)
+        self.max_en_cola = max_en_cola
+        self.max_guardados = max_guardados
+        self._cola: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def _iniciar_workers(self):
+        # Se crean de forma perezosa: necesitan el event loop en ejecución.
+        if self._workers:
+            return
+        self._cola = asyncio.Queue(maxsize=self.max_en_cola)
+        self._workers = [
+            asyncio.create_task(self._worker(n), name=f"job-worker-{self.nombre}-{n}")
+            for n in range(self.max_concurrentes)
+        ]
+        logger.info(f"🧵 Pool de jobs de {self.nombre} iniciado con {self.max_concurrentes} workers")
+
+    def enviar(self, tipo: str, funcion: Callable[[], Awaitable[Any]]) -> Job:
+        """Encola `funcion` (una fábrica de corrutinas) y devuelve el job creado."""
+        self._iniciar_workers()
+        job = Job(id=uuid4().hex, tipo=tipo)
+        try:
+            self._cola.put_nowait((job, funcion))
+        except asyncio.QueueFull:
+            raise ColaLlenaError(f"La cola de {self.nombre} está llena. Reintentá en unos minutos.")
+        self._jobs[job.id] = job
+        self._purgar()
+        logger.info(f"📨 Job {job.id} ({tipo}) encolado. En cola: {self._cola.qsize()}")
+        return job
+
+    def obtener(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def _purgar(self):
+        # Descarta los jobs terminados más antiguos para acotar la memoria.
+        exceso = len(self._jobs) - self.max_guardados
+        if exceso <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.estado in (COMPLETADO, ERROR, VENCIDO)][:exceso]:
+            del self._jobs[job_id]
+
+    async def _worker(self, n: int):
+        while True:
+            job, funcion = await self._cola.get()
+            job.estado = PROCESANDO
+            job.iniciado = time.time()
+            logger.info(f"⚙️ Worker {n} procesando job {job.id}")
+            token = _job_actual.set(job)
+            try:
+                job.resultado = await funcion()
+                job.estado = COMPLETADO
+            except asyncio.CancelledError:
+                job.estado = ERROR
+                job.error = "Job cancelado."
+                raise
+            except Exception as e:
+                # HTTPException trae el mensaje útil en `detail`
+                job.error = str(getattr(e, "detail", e))
+                vencido = isinstance(e, PlazoExcedido) or getattr(e, "status_code", None) == 504
+                job.estado = VENCIDO if vencido else ERROR
+                logger.error(f"❌ Job {job.id} falló: {job.error}")
+            finally:
+                _job_actual.reset(token)
+                job.finalizado = time.time()
+                self._cola.task_done()
+            logger.info(f"✅ Job {job.id} terminado en {job.finalizado - job.iniciado:.1f}s ({job.estado})")
+
+    async def cerrar(self):
+        for tarea in self._workers:
+            tarea.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+gestor_jobs = GestorJobs(
+    max_concurrentes=settings.transcripcion_max_concurrentes,
+    max_en_cola=settings.transcripcion_max_en_cola,
+    max_guardados=settings.transcripcion_jobs_guardados,
+)
+# Los lotes de Azure (services/transcripcion_lote.py) esperan horas a que Azure
+# termine: con su propio pool no dejan sin workers a los jobs de YouTube.
+gestor_lotes = GestorJobs(
+    max_concurrentes=settings.lote_max_concurrentes,
+    max_en_cola=settings.lote_max_en_cola,
+    max_guardados=settings.transcripcion_jobs_guardados,
+    nombre="lotes",
+)
+
+
+def obtener_job(job_id: str) -> Optional[Job]:
+    """Busca el job en cualquiera de las colas (el id es único entre ambas)."""
+    return gestor_jobs.obtener(job_id) or gestor_lotes.obtener(job_id)
@@ -0,0 +1,114 @@
+# services/plazos.py
+# Plazos por job proporcionales a la duración del audio.
+# Antes el reconocimiento se cortaba a los 60 s / 300 s fijos: un audio largo
+# quedaba truncado sin error y uno corto colgado ocupaba un worker 5 minutos.
+# Ahora cada job arranca con un plazo inicial (descarga + conversión) y, en
+# cuanto se conoce la duración del WAV, el plazo pasa a ser base + factor x
+# duración. El plazo viaja en un contextvar: toda etapa despachada con
+# `ejecutor.en_hilo` o envuelta en `en_plazo` lo respeta y, si se pasa, falla
+# con PlazoExcedido indicando la etapa.
+
+import asyncio
+import contextvars
+import logging
+import time
+import wave
+from contextlib import contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Iterator, Optional, TypeVar
+
+from Backend_app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PlazoExcedido(Exception):
+    """Una etapa del pipeline superó el plazo del job."""
+
+    def __init__(self, etapa: str, segundos: float):
+        self.etapa = etapa
+        self.segundos = segundos
+        super().__init__(f"La etapa '{etapa}' superó el plazo del trabajo ({segundos:.0f}s).")
+
+
+class Plazo:
+    def __init__(self, segundos: float):
+        self.segundos = segundos
+        self.vence = time.monotonic() + segundos
+
+    def restante(self) -> float:
+        return self.vence - time.monotonic()
+
+    def extender_a(self, segundos: float):
+        """Fija el vencimiento a `segundos` desde ahora (p. ej. al conocer la duración)."""
+        self.segundos = segundos
+        self.vence = time.monotonic() + segundos
+        logger.info(f"⏳ Plazo del job: {segundos:.0f}s")
+
+
+_plazo_actual: contextvars.ContextVar[Optional[Plazo]] = contextvars.ContextVar("plazo_actual", default=None)
+
+
+@contextmanager
+def con_plazo(segundos: Optional[float]) -> Iterator[Optional[Plazo]]:
+    """Define el plazo de lo que corra dentro del bloque (None = sin plazo)."""
+    plazo = Plazo(segundos) if segundos is not None else None
+    token = _plazo_actual.set(plazo)
+    try:
+        yield plazo
+    finally:
+        _plazo_actual.reset(token)
+
+
+def plazo_actual() -> Optional[Plazo]:
+    return _plazo_actual.get()
+
+
+async def en_plazo(etapa: str, awaitable: Awaitable[T]) -> T:
+    """Espera `awaitable` como máximo hasta el vencimiento del plazo actual."""
+    plazo = _plazo_actual.get()
+    if plazo is None:
+        return await awaitable
+    restante = plazo.restante()
+    if restante <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise PlazoExcedido(etapa, plazo.segundos)
+    try:
+        return await asyncio.wait_for(awaitable, restante)
+    except asyncio.TimeoutError:
+        logger.error(f"⏱️ La etapa '{etapa}' superó el plazo de {plazo.segundos:.0f}s")
+        raise PlazoExcedido(etapa, plazo.segundos) from None
+
+
+async def iterar_en_plazo(etapa: str, iterable: AsyncIterator[T]) -> AsyncIterator[T]:
+    """Recorre `iterable` esperando cada elemento como máximo hasta el plazo actual.
+
+    Para los pipelines que entregan resultados a medida que llegan (SSE,
+    subtítulos): un yt-dlp/ffmpeg colgado o un reconocedor que nunca termina
+    falla con PlazoExcedido en lugar de retener sus cupos indefinidamente.
+    """
+    iterador = aiter(iterable)
+    try:
+        while True:
+            try:
+                elemento = await en_plazo(etapa, anext(iterador))
+            except StopAsyncIteration:
+                return
+            yield elemento
+    finally:
+        if hasattr(iterador, "aclose"):
+            await iterador.aclose()
+
+
+def plazo_por_duracion(segundos_audio: float) -> float:
+    """Plazo para reconocer (y resumir) `segundos_audio` de audio."""
+    return settings.plazo_base_s + settings.plazo_factor * segundos_audio
+
+
+def duracion_wav(ruta: Path) -> float:
+    """Duración según la cabecera del WAV (no lee las muestras)."""
+    with wave.open(str(ruta), "rb") as wf:
+        return wf.getnframes() / wf.getframerate()
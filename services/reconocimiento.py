@@ -0,0 +1,386 @@
+# services/reconocimiento.py
+# Sesión de reconocimiento continuo de Azure Speech basada en eventos.
+# Reemplaza los bucles `while not done: time.sleep(0.5)` (y el `pass` que
+# consumía un core entero): los callbacks del SDK (recognized / canceled /
+# session_stopped) se conectan a un threading.Event, a un Future de asyncio y a
+# una cola, de modo que el fin de la sesión se detecta al instante.
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import azure.cognitiveservices.speech as speechsdk
+
+from Backend_app.config import settings
+from .plazos import PlazoExcedido
+from .speech_clientes import crear_recognizer
+
+logger = logging.getLogger(__name__)
+
+# Los offsets y duraciones del SDK vienen en ticks de 100 ns
+TICKS_POR_SEGUNDO = 10_000_000
+# PCM s16le 16 kHz mono
+BYTES_POR_SEGUNDO_PCM = 16000 * 2
+
+
+class ErrorReconocimiento(Exception):
+    """Azure Speech canceló la sesión por un error (credenciales, red, formato...)."""
+
+
+class Vocabulario:
+    """Palabras distintas de una transcripción, cada una con un id entero.
+
+    Lo comparten todos los segmentos de una misma sesión (o resultado de
+    lote): cada palabra repetida cuesta 4 bytes de id en lugar de un str. Vive
+    lo que viven sus segmentos; no hay vocabulario global del proceso.
+    """
+
+    __slots__ = ("ids", "palabras")
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.palabras: List[str] = []
+
+    def id(self, palabra: str) -> int:
+        if (id_palabra := self.ids.get(palabra)) is None:
+            # Primero la lista: quien lea desde otro hilo nunca ve un id sin su palabra
+            self.palabras.append(palabra)
+            id_palabra = self.ids[palabra] = len(self.palabras) - 1
+        return id_palabra
+
+    def __len__(self) -> int:
+        return len(self.palabras)
+
+
+class Palabras:
+    """Tiempos por palabra de un segmento en arrays paralelos (4 bytes por valor).
+
+    Cada palabra es un id del `Vocabulario` de la transcripción; offsets en ms
+    relativos al inicio del segmento (así siguen valiendo cuando el segmento
+    se desplaza) y duraciones en ms. Una hora de audio (~10k palabras, unas
+    pocas miles distintas) ocupa ~120 KB de arrays más el vocabulario, en
+    lugar de varios MB de dicts o un str por palabra.
+    """
+
+    __slots__ = ("vocabulario", "ids", "offsets", "duraciones")
+
+    def __init__(self, vocabulario: Optional[Vocabulario] = None):
+        self.vocabulario = vocabulario if vocabulario is not None else Vocabulario()
+        self.ids = array("I")
+        self.offsets = array("I")
+        self.duraciones = array("I")
+
+    def agregar(self, palabra: str, offset_ms: int, duracion_ms: int):
+        self.ids.append(self.vocabulario.id(palabra))
+        self.offsets.append(max(0, offset_ms))
+        self.duraciones.append(max(0, duracion_ms))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def textos(self) -> Iterator[str]:
+        palabras = self.vocabulario.palabras
+        return (palabras[i] for i in self.ids)
+
+    def __iter__(self) -> Iterator[Tuple[str, int, int]]:
+        """(palabra, offset_ms, duracion_ms) sin materializar la lista."""
+        yield from zip(self.textos(), self.offsets, self.duraciones)
+
+    def remapear(self, funcion: Callable[[int], int]) -> "Palabras":
+        """Copia con cada offset relativo transformado por `funcion` (p. ej. el mapa del VAD)."""
+        nuevas = Palabras(self.vocabulario)
+        nuevas.ids = self.ids  # No se modifican: se comparten
+        nuevas.offsets = array("I", (max(0, funcion(o)) for o in self.offsets))
+        nuevas.duraciones = self.duraciones
+        return nuevas
+
+    def a_dict(self) -> dict:
+        # También en JSON van como arrays paralelos, no un objeto por palabra
+        return {
+            "texto": list(self.textos()),
+            "offset_ms": self.offsets.tolist(),
+            "duracion_ms": self.duraciones.tolist(),
+        }
+
+    @classmethod
+    def desde_detalle(cls, palabras: Sequence[dict], offset_segmento: int,
+                      clave_palabra: str, clave_offset: str, clave_duracion: str,
+                      vocabulario: Optional[Vocabulario] = None) -> Optional["Palabras"]:
+        """Arma las palabras de un resultado detallado de Azure (tiempos en ticks).
+
+        Cada palabra se guarda con su propio tiempo, tal como viene. No se
+        alinean por posición con el texto de `display`: un número o una sigla
+        ("1995" = cuatro palabras léxicas) corría los tiempos de todo lo que seguía.
+        """
+        if not palabras:
+            return None
+        resultado = cls(vocabulario)
+        for palabra in palabras:
+            if texto := palabra.get(clave_palabra):
+                resultado.agregar(
+                    texto,
+                    (palabra.get(clave_offset, 0) - offset_segmento) // 10_000,
+                    palabra.get(clave_duracion, 0) // 10_000,
+                )
+        return resultado or None
+
+
+@dataclass
+class Segmento:
+    texto: str
+    offset: float  # segundos desde el inicio del audio
+    duracion: float  # segundos
+    palabras: Optional[Palabras] = None
+
+    def a_dict(self) -> dict:
+        datos = {"texto": self.texto, "offset": round(self.offset, 2), "duracion": round(self.duracion, 2)}
+        if self.palabras is not None:
+            datos["palabras"] = self.palabras.a_dict()
+        return datos
+
+    def desplazado(self, segundos: float) -> "Segmento":
+        return Segmento(self.texto, self.offset + segundos, self.duracion, self.palabras)
+
+
+def palabras_de_resultado(result, vocabulario: Optional[Vocabulario] = None) -> Optional[Palabras]:
+    """Tiempos por palabra de un resultado del SDK (requiere OutputFormat.Detailed).
+
+    El SDK en tiempo real solo da tiempos sobre la forma léxica ("mil
+    novecientos noventa y cinco"): esas son las palabras que se guardan.
+    """
+    try:
+        mejor = json.loads(result.json)["NBest"][0]
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+    return Palabras.desde_detalle(mejor.get("Words") or [], result.offset, "Word", "Offset", "Duration", vocabulario)
+
+
+class SesionReconocimiento:
+    """Envuelve un SpeechRecognizer y expone su resultado de forma bloqueante o async.
+
+    Uso síncrono (desde un hilo del ejecutor):
+        segmentos = SesionReconocimiento(recognizer).ejecutar(timeout=plazo_por_duracion(duracion))
+
+    Si vence el timeout se lanza PlazoExcedido (no se devuelve un texto truncado).
+
+    Uso async:
+        sesion = SesionReconocimiento(recognizer)
+        async for segmento in sesion.iterar():
+            ...
+    """
+
+    def __init__(self, recognizer: speechsdk.SpeechRecognizer, acumular: bool = True):
+        self.recognizer = recognizer
+        # Con acumular=False los segmentos solo salen por `iterar()` y no se
+        # guardan: una sesión en vivo sin fin no crece en memoria
+        self.acumular = acumular
+        self.segmentos: List[Segmento] = []
+        self.error: Optional[str] = None
+        self.vencida = False
+        self.procesado_s = 0.0  # Segundos de audio ya reconocidos (ver alimentar_push_stream)
+        self.vocabulario = Vocabulario()  # Compartido por los segmentos de la sesión
+        self._terminada = threading.Event()
+        try:
+            self._loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None  # Creada desde un hilo sin event loop: solo uso síncrono
+        self._future: Optional[asyncio.Future] = self._loop.create_future() if self._loop else None
+        self._cola: Optional[asyncio.Queue] = asyncio.Queue() if self._loop else None
+
+        recognizer.recognized.connect(self._on_recognized)
+        recognizer.canceled.connect(self._on_canceled)
+        recognizer.session_stopped.connect(self._on_session_stopped)
+
+    # --- Callbacks (se ejecutan en hilos del SDK) ---
+
+    def _on_recognized(self, evt):
+        result = evt.result
+        # Hasta dónde llegó el servicio (también los silencios, que llegan como NoMatch)
+        self.procesado_s = max(self.procesado_s, (result.offset + result.duration) / TICKS_POR_SEGUNDO)
+        if result.reason == speechsdk.ResultReason.RecognizedSpeech and result.text:
+            segmento = Segmento(
+                texto=result.text,
+                offset=result.offset / TICKS_POR_SEGUNDO,
+                duracion=result.duration / TICKS_POR_SEGUNDO,
+                palabras=palabras_de_resultado(result, self.vocabulario),
+            )
+            if self.acumular:
+                self.segmentos.append(segmento)
+            logger.debug(f"🗣 Reconocido [{segmento.offset:.1f}s]: {segmento.texto}")
+            if self._loop:
+                self._loop.call_soon_threadsafe(self._cola.put_nowait, segmento)
+        elif result.reason == speechsdk.ResultReason.NoMatch:
+            logger.debug(f"No se pudo reconocer el habla: {result.no_match_details}")
+
+    def _on_canceled(self, evt):
+        # EndOfStream también llega como "canceled"; solo Error es un fallo real
+        if evt.reason == speechsdk.CancellationReason.Error:
+            self.error = f"{evt.error_details} (Código: {evt.error_code})"
+            logger.error(f"🚫 Reconocimiento cancelado: {self.error}")
+        self._finalizar()
+
+    def _on_session_stopped(self, evt):
+        self._finalizar()
+
+    def _finalizar(self):
+        if self._terminada.is_set():
+            return
+        self._terminada.set()
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._resolver_async)
+
+    def _resolver_async(self):
+        if not self._future.done():
+            self._future.set_result(None)
+        self._cola.put_nowait(None)  # Centinela de fin para `iterar()`
+
+    def _verificar_error(self):
+        if self.error:
+            raise ErrorReconocimiento(f"Error de Azure Speech: {self.error}")
+
+    def _verificar_plazo(self, timeout: Optional[float]):
+        # Una transcripción cortada a la mitad no se devuelve como si estuviera completa
+        if self.vencida:
+            raise PlazoExcedido("reconocimiento", timeout)
+
+    # --- API pública ---
+
+    @property
+    def texto(self) -> str:
+        return " ".join(s.texto for s in self.segmentos).strip()
+
+    def ejecutar(self, timeout: Optional[float] = None) -> List[Segmento]:
+        """Inicia el reconocimiento y bloquea el hilo (sin consumir CPU) hasta que termine."""
+        self.recognizer.start_continuous_recognition()
+        try:
+            if not self._terminada.wait(timeout):
+                self.vencida = True
+                logger.warning(f"⏱️ El reconocimiento no terminó en {timeout}s. Deteniendo forzosamente.")
+        finally:
+            self.recognizer.stop_continuous_recognition()
+        self._verificar_error()
+        self._verificar_plazo(timeout)
+        return self.segmentos
+
+    async def ejecutar_async(self, timeout: Optional[float] = None) -> List[Segmento]:
+        """Versión async de `ejecutar`: espera el Future sin bloquear el event loop."""
+        self._requerir_loop()
+        await asyncio.to_thread(self.recognizer.start_continuous_recognition)
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        except asyncio.TimeoutError:
+            self.vencida = True
+            logger.warning(f"⏱️ El reconocimiento no terminó en {timeout}s. Deteniendo forzosamente.")
+        finally:
+            await asyncio.to_thread(self.recognizer.stop_continuous_recognition)
+        self._verificar_error()
+        self._verificar_plazo(timeout)
+        return self.segmentos
+
+    async def iterar(self) -> AsyncIterator[Segmento]:
+        """Inicia el reconocimiento y entrega cada segmento apenas el SDK lo reconoce."""
+        self._requerir_loop()
+        await asyncio.to_thread(self.recognizer.start_continuous_recognition)
+        try:
+            while (segmento := await self._cola.get()) is not None:
+                yield segmento
+        finally:
+            await asyncio.to_thread(self.recognizer.stop_continuous_recognition)
+        self._verificar_error()
+
+    def _requerir_loop(self):
+        if self._loop is None:
+            raise RuntimeError("SesionReconocimiento async debe crearse dentro de un event loop.")
+
+
+# --- Reconocimiento por push stream (PCM en memoria, sin WAV intermedio) ---
+
+def crear_push_stream() -> speechsdk.audio.PushAudioInputStream:
+    """Stream de entrada con el formato que produce ffmpeg: PCM s16le 16 kHz mono."""
+    formato = speechsdk.audio.AudioStreamFormat(samples_per_second=16000, bits_per_sample=16, channels=1)
+    return speechsdk.audio.PushAudioInputStream(stream_format=formato)
+
+
+async def alimentar_push_stream(
+    stream: speechsdk.audio.PushAudioInputStream,
+    pcm: AsyncIterator[bytes],
+    sesion: Optional[SesionReconocimiento] = None,
+):
+    """Escribe el PCM en el push stream sin adelantarse más de SPEECH_ADELANTO_S al reconocedor.
+
+    `stream.write` no bloquea: si ffmpeg produce más rápido que lo que el
+    servicio reconoce, el audio se acumula en memoria del SDK. Se escribe hasta
+    SPEECH_ADELANTO_S por delante de lo ya reconocido (`sesion.procesado_s`) o,
+    como mínimo, a tiempo real, así un silencio largo sin resultados no frena la fuente.
+    """
+    inicio = time.monotonic()
+    escritos = 0
+    try:
+        async for datos in pcm:
+            stream.write(datos)
+            escritos += len(datos)
+            while True:
+                avance = max(sesion.procesado_s if sesion else 0.0, time.monotonic() - inicio)
+                exceso = escritos / BYTES_POR_SEGUNDO_PCM - avance - settings.speech_adelanto_s
+                if exceso <= 0:
+                    break
+                await asyncio.sleep(min(exceso, 0.5))
+    finally:
+        # Cerrar el stream le indica al SDK el fin del audio (dispara session_stopped)
+        stream.close()
+
+
+def crear_recognizer_push(azure_key: str, azure_region: str, language: str):
+    """Recognizer que lee de un push stream nuevo; devuelve (stream, recognizer)."""
+    stream = crear_push_stream()
+    recognizer = crear_recognizer(speechsdk.audio.AudioConfig(stream=stream), language, azure_key, azure_region)
+    return stream, recognizer
+
+
+async def transcribir_pcm(
+    pcm: AsyncIterator[bytes],
+    azure_key: str,
+    azure_region: str,
+    language: str = "es-ES",
+    timeout: Optional[float] = None,
+) -> List[Segmento]:
+    """Reconoce PCM a medida que llega: el SDK empieza a transcribir con el primer bloque."""
+    stream, recognizer = crear_recognizer_push(azure_key, azure_region, language)
+    sesion = SesionReconocimiento(recognizer)
+    alimentador = asyncio.create_task(alimentar_push_stream(stream, pcm, sesion))
+    try:
+        segmentos = await sesion.ejecutar_async(timeout=timeout)
+    except BaseException:
+        # Error o plazo vencido con la fuente todavía produciendo: se corta ffmpeg
+        alimentador.cancel()
+        await asyncio.gather(alimentador, return_exceptions=True)
+        raise
+    # Propaga errores de la fuente (p. ej. ffmpeg falló a mitad de camino)
+    await alimentador
+    return segmentos
+
+
+async def iterar_segmentos_pcm(
+    pcm: AsyncIterator[bytes],
+    azure_key: str,
+    azure_region: str,
+    language: str = "es-ES",
+) -> AsyncIterator[Segmento]:
+    """Como `transcribir_pcm`, pero entrega cada segmento apenas el SDK lo reconoce."""
+    stream, recognizer = crear_recognizer_push(azure_key, azure_region, language)
+    sesion = SesionReconocimiento(recognizer, acumular=False)
+    alimentador = asyncio.create_task(alimentar_push_stream(stream, pcm, sesion))
+    try:
+        async for segmento in sesion.iterar():
+            yield segmento
+    except BaseException:
+        # Error o consumidor que abandonó (cliente desconectado): se corta la fuente
+        alimentador.cancel()
+        await asyncio.gather(alimentador, return_exceptions=True)
+        raise
+    await alimentador
@@ -0,0 +1,152 @@
+# services/resumen.py
+# Resumen de transcripciones largas por map-reduce.
+# `resumen_tematico` mandaba la transcripción entera en un solo prompt: una
+# grabación larga superaba la ventana de contexto (y fallaba) o tardaba en
+# proporción al largo. Acá el texto se parte en fragmentos con un presupuesto
+# de tokens, cada fragmento se resume en paralelo (con un semáforo por
+# resumen y el límite global de la etapa "resumen") y los resúmenes parciales
+# se vuelven a agrupar y resumir por niveles hasta que entran en un solo
+# prompt. Con k fragmentos por nivel la latencia crece con log_k(largo).
+
+import asyncio
+import logging
+from typing import Iterator, List
+
+from Backend_app.config import settings
+from .cache import clave_cache
+from .cuota_openai import CARACTERES_POR_TOKEN, PRIORIDAD_FONDO, completar, estimar_tokens
+from .ejecucion import ejecutor
+from .formato import frases
+from .jobs import registrar_metrica
+from .plazos import en_plazo
+from .vuelo_unico import resumenes_en_curso
+
+logger = logging.getLogger(__name__)
+
+PROMPT_FINAL = "Resumí el siguiente texto en pocas frases:\n\n{texto}"
+PROMPT_FRAGMENTO = (
+    "El siguiente texto es la parte {parte} de {total} de una transcripción. "
+    "Resumí sus temas y datos principales en pocas frases:\n\n{texto}"
+)
+PROMPT_REDUCCION = (
+    "Los siguientes son resúmenes parciales y consecutivos de una misma "
+    "transcripción. Combinalos en un único resumen sin repetir información:\n\n{texto}"
+)
+
+
+def _partir_largo(frase: str, max_caracteres: int) -> Iterator[str]:
+    # Una "frase" sin puntuación (dictado corrido) puede superar el presupuesto sola
+    while len(frase) > max_caracteres:
+        corte = frase.rfind(" ", 0, max_caracteres)
+        corte = corte if corte > 0 else max_caracteres
+        yield frase[:corte]
+        frase = frase[corte:].lstrip()
+    if frase:
+        yield frase
+
+
+def fragmentar(texto: str, max_tokens: int) -> List[str]:
+    """Fragmentos de hasta `max_tokens` (estimados), cortados entre frases."""
+    max_caracteres = max_tokens * CARACTERES_POR_TOKEN
+    fragmentos: List[str] = []
+    actual: List[str] = []
+    largo = 0
+    for frase in frases((texto,)):
+        for parte in _partir_largo(frase, max_caracteres):
+            if actual and largo + len(parte) + 1 > max_caracteres:
+                fragmentos.append(" ".join(actual))
+                actual, largo = [], 0
+            actual.append(parte)
+            largo += len(parte) + 1
+    if actual:
+        fragmentos.append(" ".join(actual))
+    return fragmentos
+
+
+async def _completar(prompt: str, max_tokens: int) -> str:
+    """Una llamada al deployment configurado, dentro del límite de la etapa "resumen".
+
+    Es async de punta a punta (no ocupa hilos ni bloquea el event loop); la
+    cuota y los reintentos los maneja `completar` (con prioridad de fondo: los
+    pedidos interactivos pasan antes), y el plazo del job corta la espera total.
+    """
+    async with ejecutor.limite("resumen"):
+        response = await en_plazo("resumen", completar(
+            PRIORIDAD_FONDO,
+            model=settings.azure_openai_deployment,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.5,
+            max_tokens=max_tokens,
+        ))
+    return (response.choices[0].message.content or "").strip()
+
+
+async def _resumir_fragmentos(prompts: List[str], semaforo: asyncio.Semaphore) -> List[str]:
+    async def uno(prompt: str) -> str:
+        async with semaforo:
+            return await _completar(prompt, settings.resumen_tokens_parcial)
+
+    tareas = [asyncio.create_task(uno(p)) for p in prompts]
+    try:
+        return await asyncio.gather(*tareas)
+    except BaseException:
+        # Si un fragmento falla el resumen se descarta: los demás no siguen gastando cuota
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        raise
+
+
+def _agrupar(parciales: List[str], max_tokens: int) -> List[str]:
+    grupos: List[str] = []
+    actual: List[str] = []
+    tokens = 0
+    for parcial in parciales:
+        t = estimar_tokens(parcial)
+        if actual and tokens + t > max_tokens:
+            grupos.append("\n\n".join(actual))
+            actual, tokens = [], 0
+        actual.append(parcial)
+        tokens += t
+    if actual:
+        grupos.append("\n\n".join(actual))
+    # Garantiza que cada nivel reduzca: como mínimo se juntan de a dos
+    if len(grupos) == len(parciales) and len(parciales) > 1:
+        grupos = ["\n\n".join(parciales[i:i + 2]) for i in range(0, len(parciales), 2)]
+    return grupos
+
+
+async def resumir(texto: str) -> str:
+    """Resumen temático de `texto`, de cualquier largo.
+
+    Si ya se está resumiendo el mismo texto, se espera ese resumen.
+    """
+    texto = texto.strip()
+    if not texto:
+        return ""
+    return await resumenes_en_curso.ejecutar(clave_cache("resumen", texto), lambda: _resumir(texto))
+
+
+async def _resumir(texto: str) -> str:
+    presupuesto = settings.resumen_tokens_fragmento
+    semaforo = asyncio.Semaphore(settings.resumen_concurrentes)
+
+    nivel = 0
+    fragmentos = fragmentar(texto, presupuesto)
+    while len(fragmentos) > 1:
+        nivel += 1
+        logger.info(f"🧩 Resumen nivel {nivel}: {len(fragmentos)} fragmentos")
+        if nivel == 1:
+            plantillas = [
+                PROMPT_FRAGMENTO.format(parte=i + 1, total=len(fragmentos), texto=f)
+                for i, f in enumerate(fragmentos)
+            ]
+        else:
+            plantillas = [PROMPT_REDUCCION.format(texto=f) for f in fragmentos]
+        parciales = await _resumir_fragmentos(plantillas, semaforo)
+        # Los resúmenes parciales se agrupan de nuevo por presupuesto (separados por párrafo)
+        fragmentos = _agrupar(parciales, presupuesto)
+
+    registrar_metrica("resumen_niveles", nivel)
+    prompt = PROMPT_FINAL.format(texto=fragmentos[0]) if nivel == 0 else PROMPT_REDUCCION.format(texto=fragmentos[0])
+    return await _completar(prompt, settings.resumen_tokens_salida)
@@ -0,0 +1,174 @@
+# services/segmentacion.py
+# Segmentación por silencios y transcripción en paralelo de audios largos.
+# Una sola sesión continua tarda lo mismo que el audio (una reunión de una hora
+# = una hora de espera). Acá el WAV 16 kHz se corta en los silencios más
+# cercanos a una duración objetivo, cada segmento se reconoce en su propia
+# sesión (varias a la vez) y los resultados se unen en orden con los offsets
+# corregidos al tiempo del audio original.
+
+import asyncio
+import logging
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Iterator, List, Tuple
+
+import numpy as np
+
+from Backend_app.config import settings
+from .ejecucion import ejecutor
+from .ingesta import CHUNK_BYTES
+from .reconocimiento import Segmento, transcribir_pcm
+
+logger = logging.getLogger(__name__)
+
+TASA_MUESTREO = 16000
+TRAMA_MS = 30
+MUESTRAS_POR_TRAMA = TASA_MUESTREO * TRAMA_MS // 1000
+TRAMAS_POR_SEGUNDO = 1000 / TRAMA_MS  # 33,3: con división entera los cortes se corren en audios largos
+# Se busca el silencio sobre la energía suavizada (~300 ms) para no cortar en
+# una pausa breve entre sílabas.
+TRAMAS_SUAVIZADO = 10
+
+
+def _offset_datos_wav(ruta: Path) -> Tuple[int, int]:
+    """Devuelve (offset, tamaño) del chunk `data` de un WAV PCM 16 bits mono 16 kHz."""
+    with open(ruta, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{ruta} no es un archivo WAV.")
+        while cabecera := f.read(8):
+            chunk_id, tamano = struct.unpack("<4sI", cabecera)
+            if chunk_id == b"fmt ":
+                formato, canales, tasa, _, _, bits = struct.unpack("<HHIIHH", f.read(16))
+                if (formato, canales, tasa, bits) != (1, 1, TASA_MUESTREO, 16):
+                    raise ValueError(f"Se esperaba PCM 16 bits mono 16 kHz en {ruta}.")
+                f.seek(tamano - 16 + (tamano & 1), 1)
+            elif chunk_id == b"data":
+                offset = f.tell()
+                # ffmpeg escribiendo a un pipe deja el tamaño en 0/0xFFFFFFFF: usar el real
+                disponible = ruta.stat().st_size - offset
+                return offset, min(tamano, disponible) if 0 < tamano < 0xFFFFFFFF else disponible
+            else:
+                f.seek(tamano + (tamano & 1), 1)
+    raise ValueError(f"{ruta} no tiene chunk de datos.")
+
+
+def leer_muestras(ruta: Path) -> np.ndarray:
+    """Mapea las muestras del WAV en memoria (sin cargar el archivo completo)."""
+    offset, tamano = _offset_datos_wav(ruta)
+    if tamano < 2:
+        return np.zeros(0, dtype="<i2")
+    return np.memmap(ruta, dtype="<i2", mode="r", offset=offset, shape=(tamano // 2,))
+
+
+@contextmanager
+def muestras_wav(ruta: Path) -> Iterator[np.ndarray]:
+    """`leer_muestras` que cierra el mapeo al salir del bloque.
+
+    En Windows un archivo mapeado no se puede borrar: sin cerrarlo,
+    `ws.liberar()` falla (sobre todo si una excepción retiene el array en el
+    traceback). Las muestras y sus vistas no se deben usar fuera del bloque.
+    """
+    muestras = leer_muestras(ruta)
+    try:
+        yield muestras
+    finally:
+        if (mapeo := getattr(muestras, "_mmap", None)) is not None:
+            mapeo.close()
+
+
+def energia_db_por_trama(muestras: np.ndarray, bloque_tramas: int = 20_000) -> np.ndarray:
+    """Energía (dB) de cada trama de TRAMA_MS, calculada por bloques para acotar memoria."""
+    n_tramas = len(muestras) // MUESTRAS_POR_TRAMA
+    energia = np.empty(n_tramas, dtype=np.float32)
+    for inicio in range(0, n_tramas, bloque_tramas):
+        fin = min(inicio + bloque_tramas, n_tramas)
+        tramas = np.asarray(
+            muestras[inicio * MUESTRAS_POR_TRAMA: fin * MUESTRAS_POR_TRAMA], dtype=np.float32
+        ).reshape(-1, MUESTRAS_POR_TRAMA)
+        energia[inicio:fin] = 10.0 * np.log10(np.mean(tramas * tramas, axis=1) + 1e-9)
+    return energia
+
+
+def calcular_cortes(energia: np.ndarray, objetivo_s: float, maximo_s: float) -> List[int]:
+    """Índices de trama donde cortar: el punto más silencioso cerca de cada `objetivo_s`."""
+    objetivo = int(objetivo_s * TRAMAS_POR_SEGUNDO)
+    maximo = max(int(maximo_s * TRAMAS_POR_SEGUNDO), objetivo + 1)
+    ventana = max(objetivo // 4, 1)
+    if len(energia) <= maximo:
+        return []
+
+    suavizada = np.convolve(energia, np.ones(TRAMAS_SUAVIZADO) / TRAMAS_SUAVIZADO, mode="same")
+    cortes = []
+    inicio = 0
+    while len(energia) - inicio > maximo:
+        desde = inicio + objetivo - ventana
+        hasta = min(inicio + objetivo + ventana, inicio + maximo)
+        corte = desde + int(np.argmin(suavizada[desde:hasta]))
+        cortes.append(corte)
+        inicio = corte
+    return cortes
+
+
+def segmentar(muestras: np.ndarray, objetivo_s: float, maximo_s: float) -> List[Tuple[int, int]]:
+    """Divide las muestras en rangos [inicio, fin) cortando en silencios."""
+    cortes = [c * MUESTRAS_POR_TRAMA for c in calcular_cortes(energia_db_por_trama(muestras), objetivo_s, maximo_s)]
+    limites = [0, *cortes, len(muestras)]
+    return list(zip(limites[:-1], limites[1:]))
+
+
+async def _bloques_pcm(muestras: np.ndarray) -> AsyncIterator[bytes]:
+    paso = CHUNK_BYTES // 2
+    for i in range(0, len(muestras), paso):
+        yield np.ascontiguousarray(muestras[i:i + paso]).tobytes()
+
+
+async def transcribir_muestras(
+    muestras: np.ndarray,
+    azure_key: str,
+    azure_region: str,
+    language: str = "es-ES",
+) -> List[Segmento]:
+    """Transcribe muestras PCM en paralelo, segmentando en silencios."""
+    rangos = await ejecutor.en_hilo(
+        "conversion", segmentar, muestras,
+        settings.segmentacion_duracion_objetivo_s, settings.segmentacion_duracion_max_s,
+    )
+    logger.info(
+        f"✂️ Audio de {len(muestras) / TASA_MUESTREO:.0f}s dividido en {len(rangos)} segmentos "
+        f"({settings.segmentacion_sesiones_paralelas} sesiones en paralelo)"
+    )
+    sesiones = asyncio.Semaphore(settings.segmentacion_sesiones_paralelas)
+
+    async def transcribir_rango(inicio: int, fin: int) -> List[Segmento]:
+        duracion = (fin - inicio) / TASA_MUESTREO
+        async with sesiones, ejecutor.limite("reconocimiento"):
+            parciales = await transcribir_pcm(
+                _bloques_pcm(muestras[inicio:fin]), azure_key, azure_region, language,
+                timeout=max(30.0, 2 * duracion),
+            )
+        desplazamiento = inicio / TASA_MUESTREO
+        return [s.desplazado(desplazamiento) for s in parciales]
+
+    tareas = [asyncio.create_task(transcribir_rango(i, f)) for i, f in rangos]
+    try:
+        resultados = await asyncio.gather(*tareas)
+    except BaseException:
+        # Si un segmento falla (o vence el plazo) los demás no siguen reconociendo por su cuenta
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        raise
+    return [segmento for parciales in resultados for segmento in parciales]
+
+
+async def transcribir_wav_segmentado(
+    ruta_wav: Path,
+    azure_key: str,
+    azure_region: str,
+    language: str = "es-ES",
+) -> List[Segmento]:
+    """Transcribe un WAV 16 kHz mono en paralelo, segmentando en silencios."""
+    with muestras_wav(Path(ruta_wav)) as muestras:
+        return await transcribir_muestras(muestras, azure_key, azure_region, language)
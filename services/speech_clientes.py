@@ -0,0 +1,202 @@
+# services/speech_clientes.py
+# Fábrica de clientes de Azure Speech compartida por todo el proceso.
+# Antes cada transcripción o síntesis armaba un SpeechConfig nuevo desde
+# settings y el SDK repetía su inicialización y el handshake con el servicio.
+# Acá los SpeechConfig se crean una sola vez por (región, idioma) o
+# (región, voz) y se reutilizan; los recognizers, que dependen del audio de
+# cada request, se crean sobre esa config y abren la conexión apenas se crean
+# (Connection.open), así el handshake se solapa con ffmpeg o con la carga del
+# WAV. Los sintetizadores no dependen del archivo de salida (el audio vuelve
+# en memoria), así que se guardan en un pool con la conexión ya abierta.
+#
+# Los tiempos de creación y de conexión quedan en `estadisticas()` y, dentro
+# de un job, como métricas del job (speech_creacion_ms / speech_conexion_ms).
+
+import contextvars
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+import azure.cognitiveservices.speech as speechsdk
+
+from Backend_app.config import settings
+from .jobs import registrar_metrica
+
+logger = logging.getLogger(__name__)
+
+# El SDK no garantiza que crear objetos sobre la misma config desde varios
+# hilos a la vez sea seguro: la creación (rápida) se serializa.
+_lock = threading.Lock()
+_configs: Dict[Tuple[str, ...], speechsdk.SpeechConfig] = {}
+_pools_sintesis: Dict[Tuple[str, ...], "queue.SimpleQueue[speechsdk.SpeechSynthesizer]"] = {}
+
+
+class _Tiempos:
+    """Contador de tiempos de setup (ms) por tipo: creación y conexión."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datos: Dict[str, Dict[str, float]] = {}
+
+    def registrar(self, tipo: str, ms: float):
+        with self._lock:
+            d = self._datos.setdefault(tipo, {"cantidad": 0, "total_ms": 0.0, "max_ms": 0.0})
+            d["cantidad"] += 1
+            d["total_ms"] += ms
+            d["max_ms"] = max(d["max_ms"], ms)
+
+    def resumen(self) -> dict:
+        with self._lock:
+            return {
+                tipo: {
+                    "cantidad": d["cantidad"],
+                    "promedio_ms": round(d["total_ms"] / d["cantidad"], 1),
+                    "max_ms": round(d["max_ms"], 1),
+                }
+                for tipo, d in self._datos.items()
+            }
+
+
+_tiempos = _Tiempos()
+
+
+def _medir(tipo: str, ms: float):
+    _tiempos.registrar(tipo, ms)
+    registrar_metrica(f"speech_{tipo}_ms", round(ms, 1))
+
+
+def _config(clave: str, region: str, **propiedades) -> speechsdk.SpeechConfig:
+    """SpeechConfig cacheado. No se modifica después de creado: es compartido."""
+    llave = (clave, region, *sorted(f"{k}={v}" for k, v in propiedades.items()))
+    with _lock:
+        config = _configs.get(llave)
+        if config is None:
+            inicio = time.perf_counter()
+            config = speechsdk.SpeechConfig(subscription=clave, region=region)
+            if idioma := propiedades.get("idioma"):
+                config.speech_recognition_language = idioma
+                if settings.speech_tiempos_palabras:
+                    # Resultado detallado con offset/duración de cada palabra (ver Palabras)
+                    config.output_format = speechsdk.OutputFormat.Detailed
+                    config.request_word_level_timestamps()
+            if voz := propiedades.get("voz"):
+                config.speech_synthesis_voice_name = voz
+            _configs[llave] = config
+            _tiempos.registrar("config", (time.perf_counter() - inicio) * 1000)
+            logger.info(f"🔧 SpeechConfig creado para {region} {propiedades}")
+    return config
+
+
+def _preconectar(cliente, conexion: speechsdk.Connection, inicio: float, continuo: bool):
+    # La Connection se guarda en el cliente: si se la deja como temporal, su
+    # __del__ desconecta los callbacks de `connected` antes del handshake y la
+    # métrica de conexión nunca se registra
+    cliente._conexion_auditxt = conexion
+    # El callback corre en un hilo del SDK: se copia el contexto para que la
+    # métrica de conexión llegue al job que creó el cliente
+    contexto = contextvars.copy_context()
+    medido = threading.Event()
+
+    def on_connected(evt):
+        if not medido.is_set():
+            medido.set()
+            contexto.run(_medir, "conexion", (time.perf_counter() - inicio) * 1000)
+
+    conexion.connected.connect(on_connected)
+    if settings.speech_preconectar:
+        try:
+            conexion.open(continuo)
+        except Exception as e:
+            # Sin preconexión el SDK conecta igual al empezar a reconocer
+            logger.warning(f"⚠️ No se pudo preconectar con Azure Speech: {e}")
+
+
+def crear_recognizer(
+    audio_config: speechsdk.audio.AudioConfig,
+    idioma: str = "es-ES",
+    clave: Optional[str] = None,
+    region: Optional[str] = None,
+    continuo: bool = True,
+) -> speechsdk.SpeechRecognizer:
+    """SpeechRecognizer sobre la config compartida, con la conexión ya en curso.
+
+    `continuo=False` si se va a usar `recognize_once` en lugar de reconocimiento continuo.
+    """
+    inicio = time.perf_counter()
+    config = _config(clave or settings.azure_speech_key, region or settings.azure_speech_region, idioma=idioma)
+    with _lock:
+        recognizer = speechsdk.SpeechRecognizer(speech_config=config, audio_config=audio_config)
+    _medir("creacion", (time.perf_counter() - inicio) * 1000)
+    _preconectar(recognizer, speechsdk.Connection.from_recognizer(recognizer), inicio, continuo)
+    return recognizer
+
+
+def _crear_sintetizador(llave: Tuple[str, ...]) -> speechsdk.SpeechSynthesizer:
+    clave, region, voz = llave
+    inicio = time.perf_counter()
+    config = _config(clave, region, voz=voz) if voz else _config(clave, region)
+    with _lock:
+        # audio_config=None: el audio vuelve en result.audio_data y el sintetizador es reutilizable
+        sintetizador = speechsdk.SpeechSynthesizer(speech_config=config, audio_config=None)
+    _medir("creacion", (time.perf_counter() - inicio) * 1000)
+    _preconectar(sintetizador, speechsdk.Connection.from_speech_synthesizer(sintetizador), inicio, continuo=False)
+    return sintetizador
+
+
+def _tomar(voz: str, clave: Optional[str], region: Optional[str]):
+    llave = (clave or settings.azure_speech_key, region or settings.azure_speech_region, voz)
+    with _lock:
+        pool = _pools_sintesis.setdefault(llave, queue.SimpleQueue())
+    try:
+        return pool, pool.get_nowait()
+    except queue.Empty:
+        return pool, _crear_sintetizador(llave)
+
+
+def _devolver(pool: "queue.SimpleQueue[speechsdk.SpeechSynthesizer]", sint: speechsdk.SpeechSynthesizer):
+    # El pool no crece más allá de los hilos de la etapa "sintesis"
+    if pool.qsize() < settings.limite_sintesis:
+        pool.put(sint)
+
+
+@contextmanager
+def sintetizador(voz: str = "", clave: Optional[str] = None, region: Optional[str] = None) -> Iterator[speechsdk.SpeechSynthesizer]:
+    """Presta un SpeechSynthesizer del pool (uno por uso: no admite llamadas concurrentes).
+
+    Vuelve al pool solo si el bloque termina sin excepción; para descartarlo
+    también cuando el resultado vino cancelado, usar `sintetizar`.
+    """
+    pool, sint = _tomar(voz, clave, region)
+    yield sint
+    # Con excepción no se llega acá: uno que falló puede tener la conexión rota
+    _devolver(pool, sint)
+
+
+def sintetizar(texto: str, voz: str = "", clave: Optional[str] = None,
+               region: Optional[str] = None) -> speechsdk.SpeechSynthesisResult:
+    """Sintetiza `texto` con un sintetizador del pool; el audio queda en `result.audio_data`.
+
+    Un resultado cancelado (p. ej. error de conexión) no lanza excepción: se
+    revisa `result.reason` y ese sintetizador se descarta en lugar de volver al pool.
+    """
+    pool, sint = _tomar(voz, clave, region)
+    result = sint.speak_text_async(texto).get()
+    if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+        _devolver(pool, sint)
+    else:
+        logger.warning(f"⚠️ Síntesis no completada ({result.reason}): se descarta el sintetizador")
+    return result
+
+
+def estadisticas() -> dict:
+    with _lock:
+        configs = len(_configs)
+        sintetizadores = {"/".join(k[1:]).rstrip("/"): p.qsize() for k, p in _pools_sintesis.items()}
+    return {
+        "configs": configs,
+        "sintetizadores_libres": sintetizadores,
+        "tiempos": _tiempos.resumen(),
+    }
@@ -0,0 +1,120 @@
+# services/subtitulos.py
+# Exportación de segmentos con tiempos a SRT, WebVTT o JSON, en streaming:
+# cada segmento se serializa apenas se reconoce, sin armar el documento entero
+# en memoria. Con tiempos por palabra (Segmento.palabras) los segmentos largos
+# se parten en líneas que respetan SUBTITULOS_MAX_CARACTERES y
+# SUBTITULOS_MAX_SEGUNDOS; sin ellos cada segmento es una línea.
+
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Tuple
+
+from Backend_app.config import settings
+from .reconocimiento import Segmento
+
+FORMATOS_SUBTITULOS = {
+    "srt": "application/x-subrip",
+    "vtt": "text/vtt",
+    "json": "application/json",
+}
+PATRON_SUBTITULOS = "^(srt|vtt|json)$"
+
+Linea = Tuple[float, float, str]  # (inicio, fin, texto) en segundos
+
+
+def _tiempo(segundos: float, separador: str) -> str:
+    ms = max(0, round(segundos * 1000))
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{separador}{ms:03d}"
+
+
+def lineas(segmento: Segmento) -> Iterator[Linea]:
+    """Parte un segmento en líneas de subtítulo usando los tiempos por palabra."""
+    if not segmento.palabras:
+        yield segmento.offset, segmento.offset + segmento.duracion, segmento.texto
+        return
+
+    max_caracteres = settings.subtitulos_max_caracteres
+    max_ms = settings.subtitulos_max_segundos * 1000
+    actual: List[str] = []
+    inicio_ms = fin_ms = largo = 0
+    for palabra, offset, duracion in segmento.palabras:
+        if actual and (largo + 1 + len(palabra) > max_caracteres or offset + duracion - inicio_ms > max_ms):
+            yield segmento.offset + inicio_ms / 1000, segmento.offset + fin_ms / 1000, " ".join(actual)
+            actual = []
+        if not actual:
+            inicio_ms, fin_ms, largo = offset, offset, -1
+        actual.append(palabra)
+        largo += 1 + len(palabra)
+        fin_ms = max(fin_ms, offset + duracion)
+    if actual:
+        yield segmento.offset + inicio_ms / 1000, segmento.offset + fin_ms / 1000, " ".join(actual)
+
+
+class _Exportador:
+    def inicio(self) -> str:
+        return ""
+
+    def segmento(self, segmento: Segmento) -> str:
+        raise NotImplementedError
+
+    def fin(self) -> str:
+        return ""
+
+
+class _Srt(_Exportador):
+    separador = ","
+
+    def __init__(self):
+        self.numero = 0
+
+    def _cue(self, inicio: float, fin: float, texto: str) -> str:
+        self.numero += 1
+        return f"{self.numero}\n{_tiempo(inicio, self.separador)} --> {_tiempo(fin, self.separador)}\n{texto}\n\n"
+
+    def segmento(self, segmento: Segmento) -> str:
+        return "".join(self._cue(*linea) for linea in lineas(segmento))
+
+
+class _Vtt(_Srt):
+    separador = "."
+
+    def inicio(self) -> str:
+        return "WEBVTT\n\n"
+
+
+class _Json(_Exportador):
+    def __init__(self):
+        self.primero = True
+
+    def inicio(self) -> str:
+        return '{"segmentos": [\n'
+
+    def segmento(self, segmento: Segmento) -> str:
+        separador = "" if self.primero else ",\n"
+        self.primero = False
+        return separador + json.dumps(segmento.a_dict(), ensure_ascii=False)
+
+    def fin(self) -> str:
+        return "\n]}\n"
+
+
+_EXPORTADORES = {"srt": _Srt, "vtt": _Vtt, "json": _Json}
+
+
+def exportar(segmentos: Iterable[Segmento], formato: str = "srt") -> Iterator[str]:
+    exportador = _EXPORTADORES[formato]()
+    yield exportador.inicio()
+    for segmento in segmentos:
+        yield exportador.segmento(segmento)
+    yield exportador.fin()
+
+
+async def exportar_async(segmentos: AsyncIterable[Segmento], formato: str = "srt") -> AsyncIterator[str]:
+    """Igual que `exportar`, para segmentos que llegan mientras se reconoce el audio."""
+    exportador = _EXPORTADORES[formato]()
+    yield exportador.inicio()
+    async for segmento in segmentos:
+        yield exportador.segmento(segmento)
+    yield exportador.fin()
@@ -0,0 +1,232 @@
+# services/transcripcion_lote.py
+# Backend de transcripción por lotes (Azure Speech batch, REST v3.2).
+# Para archivos nocturnos de cientos de grabaciones el reconocimiento en
+# tiempo real no escala: acá se envían todos los archivos (URLs con SAS o un
+# contenedor de blobs) como una sola transcripción, se consulta el estado con
+# backoff, se recorren los resultados paginados y se devuelven por archivo.
+# Es la versión async (httpx) de lo que muestra services/Codigo_Prueba.py con
+# swagger_client. La URL base es configurable (LOTE_BASE_URL) para poder
+# probarlo contra un servidor local que imite la API.
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from Backend_app.config import settings
+from .azure_format_text import limpiar_y_formatear_dialogo
+from .jobs import registrar_metrica
+from .plazos import con_plazo, en_plazo
+from .resumen import resumir
+from .reconocimiento import TICKS_POR_SEGUNDO, Palabras, Segmento, Vocabulario
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_FINALES = ("Succeeded", "Failed")
+MAX_REINTENTOS_429 = 5
+
+
+class ErrorLote(Exception):
+    """La API de transcripción por lotes devolvió un error o la transcripción falló."""
+
+
+def _id_desde_url(url: str) -> str:
+    return url.rstrip("/").split("/")[-1]
+
+
+def _segundos_retry_after(respuesta: httpx.Response, por_defecto: float) -> float:
+    try:
+        return max(0.0, float(respuesta.headers.get("retry-after", por_defecto)))
+    except ValueError:
+        return por_defecto
+
+
+def _palabras(mejor: dict, offset: int, vocabulario: Vocabulario) -> Optional[Palabras]:
+    # Con displayFormWordLevelTimestampsEnabled los tiempos vienen sobre la forma
+    # de display ("1995,"), que es la que se muestra en subtítulos
+    if mejor.get("displayWords"):
+        return Palabras.desde_detalle(
+            mejor["displayWords"], offset, "displayText", "offsetInTicks", "durationInTicks", vocabulario
+        )
+    return Palabras.desde_detalle(mejor.get("words") or [], offset, "word", "offsetInTicks", "durationInTicks", vocabulario)
+
+
+def segmentos_desde_resultado(resultado: dict) -> List[Segmento]:
+    """Frases del JSON de resultados de Azure, ordenadas por offset."""
+    segmentos = []
+    vocabulario = Vocabulario()  # Uno por archivo, compartido por sus frases
+    for frase in resultado.get("recognizedPhrases", []):
+        mejores = frase.get("nBest") or [{}]
+        texto = mejores[0].get("display", "")
+        if texto:
+            offset = frase.get("offsetInTicks", 0)
+            segmentos.append(Segmento(
+                texto=texto,
+                offset=offset / TICKS_POR_SEGUNDO,
+                duracion=frase.get("durationInTicks", 0) / TICKS_POR_SEGUNDO,
+                palabras=_palabras(mejores[0], offset, vocabulario),
+            ))
+    segmentos.sort(key=lambda s: s.offset)
+    return segmentos
+
+
+class ClienteLote:
+    """Cliente mínimo de /speechtotext/v3.2/transcriptions."""
+
+    def __init__(self, base_url: str, clave: str, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url.rstrip("/")
+        self._headers = {"Ocp-Apim-Subscription-Key": clave}
+        self._transport = transport
+        self._cliente: Optional[httpx.AsyncClient] = None
+
+    @property
+    def cliente(self) -> httpx.AsyncClient:
+        if self._cliente is None:
+            self._cliente = httpx.AsyncClient(timeout=30.0, transport=self._transport)
+        return self._cliente
+
+    async def _api(self, metodo: str, url: str, **kwargs) -> httpx.Response:
+        # La clave solo viaja a la API de Speech, nunca a las URLs de resultados (blobs con SAS)
+        if not url.startswith("http"):
+            url = f"{self.base_url}{url}"
+        for _ in range(MAX_REINTENTOS_429):
+            respuesta = await self.cliente.request(metodo, url, headers=self._headers, **kwargs)
+            if respuesta.status_code != 429:
+                break
+            # Cuota de la API excedida: se espera lo que indique Retry-After
+            espera = _segundos_retry_after(respuesta, settings.lote_poll_inicial_s)
+            logger.warning(f"⚠️ API de lotes limitada (429); reintento en {espera:.0f}s")
+            await asyncio.sleep(espera)
+        if respuesta.status_code >= 400:
+            raise ErrorLote(f"{metodo} {url} -> {respuesta.status_code}: {respuesta.text[:500]}")
+        return respuesta
+
+    async def crear(
+        self,
+        urls: Optional[List[str]] = None,
+        contenedor: Optional[str] = None,
+        idioma: str = "es-ES",
+        nombre: str = "auditxt-lote",
+    ) -> str:
+        """Crea la transcripción y devuelve su id."""
+        definicion: Dict[str, Any] = {
+            "displayName": nombre,
+            "locale": idioma,
+            "properties": {
+                "punctuationMode": "DictatedAndAutomatic",
+                "wordLevelTimestampsEnabled": settings.speech_tiempos_palabras,
+                "displayFormWordLevelTimestampsEnabled": settings.speech_tiempos_palabras,
+                "timeToLive": f"PT{settings.lote_ttl_h}H",
+            },
+        }
+        if contenedor:
+            definicion["contentContainerUrl"] = contenedor
+        else:
+            definicion["contentUrls"] = urls or []
+        respuesta = await self._api("POST", "/transcriptions", json=definicion)
+        datos = respuesta.json()
+        return _id_desde_url(datos.get("self") or respuesta.headers["location"])
+
+    async def estado(self, id_lote: str) -> dict:
+        return (await self._api("GET", f"/transcriptions/{id_lote}")).json()
+
+    async def esperar(self, id_lote: str) -> dict:
+        """Consulta el estado con backoff exponencial hasta Succeeded o Failed."""
+        espera = settings.lote_poll_inicial_s
+        while True:
+            transcripcion = await self.estado(id_lote)
+            estado = transcripcion.get("status")
+            logger.info(f"📦 Lote {id_lote}: {estado}")
+            if estado in ESTADOS_FINALES:
+                break
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, settings.lote_poll_max_s)
+        if estado == "Failed":
+            error = transcripcion.get("properties", {}).get("error", {})
+            raise ErrorLote(f"La transcripción por lotes falló: {error.get('message', 'sin detalle')}")
+        return transcripcion
+
+    async def _paginar(self, url: str) -> AsyncIterator[dict]:
+        """Recorre todos los elementos de una colección paginada siguiendo @nextLink."""
+        siguiente: Optional[str] = url
+        while siguiente:
+            pagina = (await self._api("GET", siguiente)).json()
+            for elemento in pagina.get("values", []):
+                yield elemento
+            siguiente = pagina.get("@nextLink")
+
+    async def resultados(self, id_lote: str) -> AsyncIterator[dict]:
+        """Entrega el JSON de resultado de cada archivo transcripto."""
+        async for archivo in self._paginar(f"/transcriptions/{id_lote}/files"):
+            if archivo.get("kind") != "Transcription":
+                continue
+            respuesta = await self.cliente.get(archivo["links"]["contentUrl"])
+            respuesta.raise_for_status()
+            yield respuesta.json()
+
+    async def borrar(self, id_lote: str):
+        try:
+            await self._api("DELETE", f"/transcriptions/{id_lote}")
+        except (ErrorLote, httpx.HTTPError) as e:
+            logger.warning(f"⚠️ No se pudo borrar el lote {id_lote}: {e}")
+
+    async def cerrar(self):
+        if self._cliente is not None:
+            await self._cliente.aclose()
+            self._cliente = None
+
+
+def _base_url_por_defecto() -> str:
+    return f"https://{settings.azure_speech_region}.api.cognitive.microsoft.com/speechtotext/v3.2"
+
+
+cliente_lote = ClienteLote(settings.lote_base_url or _base_url_por_defecto(), settings.azure_speech_key)
+
+
+async def _formatear(texto: str, modo_salida: str) -> str:
+    if modo_salida == "dialogo":
+        return limpiar_y_formatear_dialogo(texto)
+    if modo_salida == "resumen" and texto:
+        return await resumir(texto)
+    return texto
+
+
+async def transcribir_lote(
+    urls: Optional[List[str]] = None,
+    contenedor: Optional[str] = None,
+    idioma: str = "es-ES",
+    modo_salida: str = "dialogo",
+    cliente: ClienteLote = cliente_lote,
+) -> List[dict]:
+    """Envía el lote, espera a que termine y devuelve un resultado por archivo:
+    {"fuente", "duracion", "texto", "segmentos"}.
+
+    Corre bajo su propio plazo (LOTE_PLAZO_H): Azure puede tardar horas en
+    procesar un lote grande y el plazo por duración de audio no aplica.
+    """
+    id_lote = await cliente.crear(urls=urls, contenedor=contenedor, idioma=idioma)
+    logger.info(f"📦 Lote {id_lote} creado ({len(urls or [])} URLs, contenedor={bool(contenedor)})")
+    registrar_metrica("lote_id", id_lote)
+    try:
+        with con_plazo(settings.lote_plazo_h * 3600):
+            await en_plazo("reconocimiento", cliente.esperar(id_lote))
+        archivos = []
+        async for resultado in cliente.resultados(id_lote):
+            segmentos = segmentos_desde_resultado(resultado)
+            texto = " ".join(s.texto for s in segmentos).strip()
+            archivos.append({
+                "fuente": resultado.get("source"),
+                "duracion": round(resultado.get("durationInTicks", 0) / TICKS_POR_SEGUNDO, 2),
+                "texto": await _formatear(texto, modo_salida),
+                "segmentos": [s.a_dict() for s in segmentos],
+            })
+    finally:
+        if settings.lote_borrar_al_terminar:
+            await cliente.borrar(id_lote)
+    # Mismo orden en que se enviaron las URLs (la API no lo garantiza)
+    registrar_metrica("lote_archivos", len(archivos))
+    if urls:
+        orden = {url: i for i, url in enumerate(urls)}
+        archivos.sort(key=lambda a: orden.get(a["fuente"], len(orden)))
+    return archivos
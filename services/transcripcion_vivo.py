@@ -0,0 +1,205 @@
+# services/transcripcion_vivo.py
+# Transcripción en vivo del micrófono sobre el websocket /ws/transcription_status.
+#
+# Protocolo:
+#   cliente -> servidor
+#     texto  {"accion": "iniciar", "formato": "pcm" | "opus", "idioma": "es-ES"}
+#     binario  frames de audio: PCM s16le 16 kHz mono, o WebM/Ogg Opus (MediaRecorder)
+#     texto  {"accion": "detener"}
+#   servidor -> cliente (JSON)
+#     {"tipo": "parcial", "texto", "offset"}              hipótesis en curso (recognizing)
+#     {"tipo": "final", "texto", "offset", "duracion"}    frase reconocida (recognized)
+#     {"tipo": "error", "detalle"} / {"tipo": "fin"}
+#
+# Un frame binario sin "iniciar" previo arranca una sesión PCM con valores por
+# defecto. La memoria por conexión está acotada: la cola de entrada tiene
+# VIVO_COLA_FRAMES lugares (si se llena se deja de leer el socket y TCP frena
+# al navegador) y de las hipótesis parciales solo se guarda la última.
+
+import asyncio
+import json
+import logging
+import re
+from collections import deque
+from typing import Optional
+
+from fastapi import WebSocket
+
+from Backend_app.config import settings
+from .ingesta import pcm_desde_ffmpeg
+from .reconocimiento import (
+    TICKS_POR_SEGUNDO,
+    SesionReconocimiento,
+    alimentar_push_stream,
+    crear_recognizer_push,
+)
+
+logger = logging.getLogger(__name__)
+
+FORMATOS_VIVO = ("pcm", "opus")
+PATRON_IDIOMA = re.compile(r"^[a-z]{2,3}-[A-Z]{2}$")
+MAX_FINALES_PENDIENTES = 256
+MAX_FRAME_BYTES = settings.vivo_max_frame_kb * 1024
+
+_sesiones_activas = 0
+
+
+def _leer_control(texto: Optional[str]) -> dict:
+    try:
+        mensaje = json.loads(texto or "")
+    except ValueError:
+        return {}
+    return mensaje if isinstance(mensaje, dict) else {}
+
+
+class SesionEnVivo:
+    """Una sesión de reconocimiento alimentada por los frames de un websocket."""
+
+    def __init__(self, websocket: WebSocket, formato: str = "pcm", idioma: str = "es-ES"):
+        self.websocket = websocket
+        self.formato = formato if formato in FORMATOS_VIVO else "pcm"
+        self.idioma = idioma if PATRON_IDIOMA.match(idioma or "") else "es-ES"
+        self.desconectado = False
+        self._loop = asyncio.get_running_loop()
+        self._entrada: asyncio.Queue = asyncio.Queue(maxsize=settings.vivo_cola_frames)
+        self._finales: deque = deque()
+        self._parcial: Optional[dict] = None
+        self._hay_salida = asyncio.Event()
+
+    # --- Entrada: socket -> cola acotada -> push stream ---
+
+    async def _frames(self):
+        while (datos := await self._entrada.get()) is not None:
+            yield datos
+
+    async def _recibir(self, primer_frame: Optional[bytes]):
+        if primer_frame:
+            await self._entrada.put(primer_frame)
+        try:
+            while True:
+                mensaje = await self.websocket.receive()
+                if mensaje["type"] == "websocket.disconnect":
+                    self.desconectado = True
+                    break
+                if datos := mensaje.get("bytes"):
+                    if len(datos) > MAX_FRAME_BYTES:
+                        self._publicar_error(f"Frame de {len(datos)} bytes supera el máximo de {MAX_FRAME_BYTES}.")
+                        break
+                    # Con la cola llena este await frena la lectura del socket (backpressure)
+                    await self._entrada.put(datos)
+                elif _leer_control(mensaje.get("text")).get("accion") == "detener":
+                    break
+        except Exception as e:
+            logger.warning(f"⚠️ Socket en vivo interrumpido: {e}")
+            self.desconectado = True
+        # Fin del audio: el alimentador cierra el push stream y la sesión termina
+        await self._entrada.put(None)
+
+    # --- Salida: callbacks del SDK -> cola coalescida -> socket ---
+
+    def _on_recognizing(self, evt):
+        # Hilo del SDK: se delega al event loop
+        if evt.result.text:
+            parcial = {
+                "tipo": "parcial",
+                "texto": evt.result.text,
+                "offset": round(evt.result.offset / TICKS_POR_SEGUNDO, 2),
+            }
+            self._loop.call_soon_threadsafe(self._publicar_parcial, parcial)
+
+    def _publicar_parcial(self, parcial: dict):
+        self._parcial = parcial  # Una hipótesis nueva reemplaza a la anterior sin enviar
+        self._hay_salida.set()
+
+    def _publicar(self, mensaje: dict):
+        self._parcial = None  # Un final vuelve obsoletas las hipótesis pendientes
+        if len(self._finales) >= MAX_FINALES_PENDIENTES:
+            logger.warning("⚠️ Cliente en vivo no consume los resultados; se descarta el más antiguo")
+            self._finales.popleft()
+        self._finales.append(mensaje)
+        self._hay_salida.set()
+
+    def _publicar_error(self, detalle: str):
+        self._publicar({"tipo": "error", "detalle": detalle})
+
+    async def _emitir(self):
+        while True:
+            await self._hay_salida.wait()
+            self._hay_salida.clear()
+            while self._finales:
+                mensaje = self._finales.popleft()
+                await self.websocket.send_json(mensaje)
+                if mensaje["tipo"] == "fin":
+                    return
+            if self._parcial is not None:
+                parcial, self._parcial = self._parcial, None
+                await self.websocket.send_json(parcial)
+
+    # --- Ciclo de vida ---
+
+    async def ejecutar(self, primer_frame: Optional[bytes] = None):
+        stream, recognizer = crear_recognizer_push(settings.azure_speech_key, settings.azure_speech_region, self.idioma)
+        recognizer.recognizing.connect(self._on_recognizing)
+        sesion = SesionReconocimiento(recognizer, acumular=False)
+        if self.formato == "pcm":
+            pcm = self._frames()
+        else:
+            # ffmpeg decodifica Opus a PCM sobre la marcha (sin tomar cupo de conversión)
+            pcm = pcm_desde_ffmpeg(["-i", "pipe:0"], self._frames(), etapa=None)
+
+        tareas = [
+            asyncio.create_task(self._recibir(primer_frame)),
+            asyncio.create_task(alimentar_push_stream(stream, pcm, sesion)),
+        ]
+        emisor = asyncio.create_task(self._emitir())
+        try:
+            async for segmento in sesion.iterar():
+                self._publicar({"tipo": "final", **segmento.a_dict()})
+            await tareas[1]  # Propaga errores de la fuente (p. ej. Opus inválido)
+        except Exception as e:
+            logger.error(f"❌ Error en transcripción en vivo: {e}")
+            self._publicar_error(str(e))
+        finally:
+            for tarea in tareas:
+                tarea.cancel()
+            await asyncio.gather(*tareas, return_exceptions=True)
+            if self.desconectado:
+                emisor.cancel()
+            else:
+                self._publicar({"tipo": "fin"})
+            await asyncio.gather(emisor, return_exceptions=True)
+
+
+async def atender_websocket(websocket: WebSocket):
+    """Loop del websocket: mensajes de control y, cuando llega audio, sesiones en vivo.
+
+    Vuelve cuando el cliente se desconecta, o tras cerrar la conexión si ya
+    no hay lugar para otra sesión en vivo.
+    """
+    global _sesiones_activas
+    while True:
+        mensaje = await websocket.receive()
+        if mensaje["type"] == "websocket.disconnect":
+            return
+
+        control = _leer_control(mensaje.get("text"))
+        primer_frame = mensaje.get("bytes")
+        if control.get("accion") != "iniciar" and not primer_frame:
+            continue  # Otros mensajes de texto solo mantienen viva la conexión
+
+        if _sesiones_activas >= settings.vivo_max_sesiones:
+            # Se avisa una sola vez y se cierra: si no, cada frame que sigue llegando repetiría el error
+            await websocket.send_json({"tipo": "error", "detalle": "Demasiadas sesiones en vivo. Reintentá en unos minutos."})
+            await websocket.close(code=1013)  # Try Again Later
+            return
+
+        sesion = SesionEnVivo(websocket, control.get("formato", "pcm"), control.get("idioma", "es-ES"))
+        _sesiones_activas += 1
+        logger.info(f"🎙️ Sesión en vivo iniciada ({sesion.formato}, {sesion.idioma}). Activas: {_sesiones_activas}")
+        try:
+            await sesion.ejecutar(primer_frame)
+        finally:
+            _sesiones_activas -= 1
+            logger.info(f"🎙️ Sesión en vivo terminada. Activas: {_sesiones_activas}")
+        if sesion.desconectado:
+            return
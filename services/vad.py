@@ -0,0 +1,177 @@
+# services/vad.py
+# Detección de actividad de voz (VAD) por energía, antes del reconocimiento.
+# Azure Speech cobra cada segundo de audio enviado, también los silencios. Acá
+# el WAV convertido se recorta a las regiones con voz (los silencios largos se
+# comprimen a un margen corto) y se guarda un mapa de offsets para devolver los
+# tiempos reconocidos a la línea de tiempo del audio original.
+
+import bisect
+import logging
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from Backend_app.config import settings
+from .ejecucion import ejecutor
+from .ingesta import CHUNK_BYTES
+from .jobs import registrar_metrica
+from .reconocimiento import Segmento
+from .segmentacion import (
+    MUESTRAS_POR_TRAMA,
+    TASA_MUESTREO,
+    TRAMAS_POR_SEGUNDO,
+    energia_db_por_trama,
+    muestras_wav,
+    transcribir_wav_segmentado,
+)
+
+logger = logging.getLogger(__name__)
+
+# Por debajo de esto (dB sobre PCM 16 bits) se considera silencio digital
+UMBRAL_ABSOLUTO_DB = 30.0
+
+
+@dataclass
+class MapaOffsets:
+    """Correspondencia entre tiempos del audio recortado y del original (segundos)."""
+
+    inicios_recortado: List[float] = field(default_factory=list)
+    inicios_original: List[float] = field(default_factory=list)
+
+    def agregar(self, inicio_recortado: float, inicio_original: float):
+        self.inicios_recortado.append(inicio_recortado)
+        self.inicios_original.append(inicio_original)
+
+    def a_original(self, t: float) -> float:
+        i = bisect.bisect_right(self.inicios_recortado, t) - 1
+        if i < 0:
+            return t
+        return t - self.inicios_recortado[i] + self.inicios_original[i]
+
+    def corregir(self, segmentos: List[Segmento]) -> List[Segmento]:
+        return [self._corregir_segmento(s) for s in segmentos]
+
+    def _corregir_segmento(self, s: Segmento) -> Segmento:
+        offset = self.a_original(s.offset)
+        palabras = s.palabras
+        if palabras is not None:
+            # Un segmento puede cruzar un silencio recortado: cada palabra se mapea por separado
+            palabras = palabras.remapear(
+                lambda ms: round((self.a_original(s.offset + ms / 1000) - offset) * 1000)
+            )
+        # El fin también se mapea: si el segmento cruza un silencio recortado, dura más en el original
+        duracion = self.a_original(s.offset + s.duracion) - offset
+        return Segmento(s.texto, offset, duracion, palabras)
+
+
+@dataclass
+class ResultadoVad:
+    mapa: MapaOffsets
+    segundos_originales: float
+    segundos_recortados: float
+
+    @property
+    def segundos_ahorrados(self) -> float:
+        return self.segundos_originales - self.segundos_recortados
+
+
+def detectar_voz(
+    energia: np.ndarray,
+    umbral_db: float,
+    margen_ms: int,
+    silencio_min_ms: int,
+) -> List[Tuple[int, int]]:
+    """Regiones [inicio, fin) en tramas con voz.
+
+    El umbral es relativo al piso de ruido (percentil 10 de la energía). Cada
+    región se extiende `margen_ms` a cada lado y los silencios más cortos que
+    `silencio_min_ms` se conservan (separan frases, no vale la pena cortarlos).
+    """
+    n = len(energia)
+    if n == 0:
+        return []
+    piso, pico = np.percentile(energia, [10, 95])
+    if pico < UMBRAL_ABSOLUTO_DB:
+        return []  # Todo el audio es silencio
+    if pico - piso < umbral_db:
+        return [(0, n)]  # Sin contraste entre voz y fondo: no se recorta nada
+
+    voz = energia > piso + umbral_db
+    # Bordes de las corridas de tramas con voz
+    cambios = np.flatnonzero(np.diff(np.concatenate(([0], voz.view(np.int8), [0]))))
+    inicios, fines = cambios[::2], cambios[1::2]
+
+    margen = round(margen_ms * TRAMAS_POR_SEGUNDO / 1000)
+    silencio_min = round(silencio_min_ms * TRAMAS_POR_SEGUNDO / 1000)
+    regiones: List[Tuple[int, int]] = []
+    for inicio, fin in zip(inicios, fines):
+        inicio, fin = max(0, int(inicio) - margen), min(n, int(fin) + margen)
+        if regiones and inicio - regiones[-1][1] < silencio_min:
+            regiones[-1] = (regiones[-1][0], fin)
+        else:
+            regiones.append((inicio, fin))
+    return regiones
+
+
+def recortar_wav(ruta_entrada: Path, ruta_salida: Path) -> ResultadoVad:
+    """Escribe en `ruta_salida` solo las regiones con voz de `ruta_entrada`."""
+    with muestras_wav(Path(ruta_entrada)) as muestras:
+        return _recortar(muestras, ruta_salida)
+
+
+def _recortar(muestras: np.ndarray, ruta_salida: Path) -> ResultadoVad:
+    regiones = detectar_voz(
+        energia_db_por_trama(muestras),
+        settings.vad_umbral_db,
+        settings.vad_margen_ms,
+        settings.vad_silencio_min_ms,
+    )
+
+    mapa = MapaOffsets()
+    escritas = 0
+    paso = CHUNK_BYTES // 2
+    with wave.open(str(ruta_salida), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(TASA_MUESTREO)
+        for inicio, fin in regiones:
+            inicio *= MUESTRAS_POR_TRAMA
+            fin = min(fin * MUESTRAS_POR_TRAMA, len(muestras))
+            mapa.agregar(escritas / TASA_MUESTREO, inicio / TASA_MUESTREO)
+            for i in range(inicio, fin, paso):
+                wf.writeframes(np.ascontiguousarray(muestras[i:min(i + paso, fin)]).tobytes())
+            escritas += fin - inicio
+
+    resultado = ResultadoVad(mapa, len(muestras) / TASA_MUESTREO, escritas / TASA_MUESTREO)
+    logger.info(
+        f"🔇 VAD: {resultado.segundos_originales:.1f}s -> {resultado.segundos_recortados:.1f}s "
+        f"({resultado.segundos_ahorrados:.1f}s de silencio sin enviar, {len(regiones)} regiones con voz)"
+    )
+    return resultado
+
+
+async def transcribir_wav_con_vad(
+    ws,
+    ruta_wav: Path,
+    azure_key: str,
+    azure_region: str,
+    language: str = "es-ES",
+) -> List[Segmento]:
+    """Recorta silencios (si VAD_HABILITADO), transcribe y devuelve offsets del original."""
+    if not settings.vad_habilitado:
+        return await transcribir_wav_segmentado(ruta_wav, azure_key, azure_region, language)
+
+    ruta_voz = ws.archivo(f"{Path(ruta_wav).stem}_voz.wav")
+    resultado = await ejecutor.en_hilo("conversion", recortar_wav, ruta_wav, ruta_voz)
+    registrar_metrica("audio_segundos", round(resultado.segundos_originales, 1))
+    registrar_metrica("vad_segundos_ahorrados", round(resultado.segundos_ahorrados, 1))
+    await ws.verificar_cuota_async()
+    if resultado.segundos_recortados == 0:
+        logger.warning("⚠️ VAD no encontró voz en el audio.")
+        return []
+
+    segmentos = await transcribir_wav_segmentado(ruta_voz, azure_key, azure_region, language)
+    return resultado.mapa.corregir(segmentos)
@@ -0,0 +1,81 @@
+# services/vuelo_unico.py
+# Coalescencia de pedidos idénticos en curso ("single flight").
+# Cuando circula un link viral, varios editores mandan el mismo video o el
+# mismo pedido de redacción con segundos de diferencia y cada uno arrancaba el
+# pipeline completo. Con `VueloUnico.ejecutar(clave, fabrica)` el primer pedido
+# de una clave lanza la tarea y los que llegan mientras sigue en curso esperan
+# esa misma tarea y reciben su resultado o su excepción. Al terminar la clave
+# se libera: el siguiente pedido vuelve a ejecutar (o acierta en la caché).
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from .plazos import con_plazo, en_plazo
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def _sin_plazo(fabrica: Callable[[], Awaitable[T]]) -> T:
+    with con_plazo(None):
+        return await fabrica()
+
+
+class VueloUnico:
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.ejecutados = 0
+        self.coalescidos = 0
+        self._en_curso: Dict[str, asyncio.Task] = {}
+
+    async def ejecutar(self, clave: str, fabrica: Callable[[], Awaitable[T]]) -> T:
+        """Resultado de `fabrica()` compartido entre los pedidos concurrentes de `clave`.
+
+        `fabrica` no debe depender de recursos del primer pedido (p. ej. su
+        UploadFile, que se cierra si ese cliente se va). La tarea corre sin el
+        plazo del primer pedido (la fábrica fija el suyo si lo necesita) y cada
+        pedido espera como máximo hasta su propio plazo; las métricas que
+        registre quedan en el job del primer pedido. Corre bajo `shield`: si un
+        pedido se cancela (cliente desconectado) la tarea sigue para los demás.
+        """
+        tarea = self._en_curso.get(clave)
+        if tarea is None:
+            tarea = asyncio.ensure_future(_sin_plazo(fabrica))
+            self._en_curso[clave] = tarea
+            tarea.add_done_callback(lambda t: self._fin(clave, t))
+            self.ejecutados += 1
+        else:
+            self.coalescidos += 1
+            logger.info(f"🔗 {self.nombre}: esperando el pedido idéntico en curso ({clave[:16]})")
+        return await en_plazo(self.nombre, asyncio.shield(tarea))
+
+    def _fin(self, clave: str, tarea: asyncio.Task):
+        if self._en_curso.get(clave) is tarea:
+            del self._en_curso[clave]
+        if not tarea.cancelled() and tarea.exception() is not None:
+            # Ya la recibieron los pedidos que esperaban; el próximo reintenta
+            logger.warning(f"⚠️ {self.nombre}: falló el pedido {clave[:16]}: {tarea.exception()}")
+
+    def estadisticas(self) -> dict:
+        return {
+            "en_curso": len(self._en_curso),
+            "ejecutados": self.ejecutados,
+            "coalescidos": self.coalescidos,
+        }
+
+
+transcripciones_en_curso = VueloUnico("transcripciones")
+resumenes_en_curso = VueloUnico("resúmenes")
+generaciones_en_curso = VueloUnico("generación")
+sintesis_en_curso = VueloUnico("síntesis")
+descargas_en_curso = VueloUnico("descargas de YouTube")
+
+
+def estadisticas() -> dict:
+    return {
+        v.nombre: v.estadisticas()
+        for v in (transcripciones_en_curso, resumenes_en_curso, generaciones_en_curso,
+                  sintesis_en_curso, descargas_en_curso)
+    }
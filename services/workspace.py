@@ -0,0 +1,134 @@
+# services/workspace.py
+# Directorios de trabajo aislados por job.
+# Cada transcripción recibe su propia carpeta bajo DATA_WORK/jobs, así dos
+# requests simultáneos nunca pisan el audio del otro. La limpieza es atómica
+# (rename + borrado) y el uso total de disco está acotado por una cuota.
+# Recorrer la raíz para medir la cuota y borrar un árbol grande bloquean: desde
+# código async se usan las variantes `*_async`, que corren en un hilo.
+
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from uuid import uuid4
+
+from Backend_app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PREFIJO_BORRADO = ".borrar-"
+
+
+class CuotaDiscoExcedida(Exception):
+    """El espacio de trabajo superó la cuota de disco configurada."""
+
+
+def _tamano_directorio(ruta: Path) -> int:
+    total = 0
+    for raiz, _, archivos in os.walk(ruta):
+        for nombre in archivos:
+            try:
+                total += os.path.getsize(os.path.join(raiz, nombre))
+            except OSError:
+                pass  # El archivo pudo borrarse mientras recorríamos
+    return total
+
+
+class Workspace:
+    """Carpeta exclusiva de un job. Usar `archivo()` para obtener rutas dentro."""
+
+    def __init__(self, ruta: Path, gestor: "GestorWorkspaces"):
+        self.ruta = ruta
+        self._gestor = gestor
+        self.liberado = False
+
+    def archivo(self, nombre: str) -> Path:
+        return self.ruta / nombre
+
+    def uso_bytes(self) -> int:
+        return _tamano_directorio(self.ruta)
+
+    def verificar_cuota(self):
+        """Lanza CuotaDiscoExcedida si el total de workspaces supera la cuota."""
+        self._gestor.verificar_cuota()
+
+    async def verificar_cuota_async(self):
+        await asyncio.to_thread(self._gestor.verificar_cuota)
+
+    def liberar(self):
+        if not self.liberado:
+            self.liberado = True
+            self._gestor.liberar(self)
+
+    async def liberar_async(self):
+        """`liberar` fuera del event loop. Si se cancela la espera, el borrado
+        sigue en su hilo: el workspace se elimina igual."""
+        if not self.liberado:
+            self.liberado = True
+            await asyncio.to_thread(self._gestor.liberar, self)
+
+
+class GestorWorkspaces:
+    def __init__(self, raiz: Path, cuota_bytes: int):
+        self.raiz = Path(raiz)
+        self.cuota_bytes = cuota_bytes
+        self._lock = threading.Lock()
+        self.raiz.mkdir(parents=True, exist_ok=True)
+        self._limpiar_restos()
+
+    def _limpiar_restos(self):
+        # Borra carpetas que quedaron a medio eliminar tras un reinicio
+        for ruta in self.raiz.glob(f"{PREFIJO_BORRADO}*"):
+            shutil.rmtree(ruta, ignore_errors=True)
+
+    def uso_total(self) -> int:
+        return _tamano_directorio(self.raiz)
+
+    def verificar_cuota(self):
+        uso = self.uso_total()
+        if uso > self.cuota_bytes:
+            raise CuotaDiscoExcedida(
+                f"Espacio de trabajo lleno ({uso / 1_048_576:.0f} MB de "
+                f"{self.cuota_bytes / 1_048_576:.0f} MB). Reintentá más tarde."
+            )
+
+    def crear(self, prefijo: str = "job") -> Workspace:
+        with self._lock:
+            self.verificar_cuota()
+            ruta = Path(tempfile.mkdtemp(prefix=f"{prefijo}-", dir=self.raiz))
+        logger.info(f"📂 Workspace creado: {ruta}")
+        return Workspace(ruta, self)
+
+    async def crear_async(self, prefijo: str = "job") -> Workspace:
+        """`crear` fuera del event loop (la verificación de cuota recorre la raíz)."""
+        return await asyncio.to_thread(self.crear, prefijo)
+
+    def liberar(self, ws: Workspace):
+        # El rename es atómico: el workspace deja de existir de golpe aunque el
+        # borrado recursivo posterior tarde o falle a medias.
+        destino = self.raiz / f"{PREFIJO_BORRADO}{ws.ruta.name}-{uuid4().hex[:6]}"
+        try:
+            ws.ruta.rename(destino)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo renombrar el workspace {ws.ruta}: {e}")
+            destino = ws.ruta
+        shutil.rmtree(destino, ignore_errors=True)
+        logger.info(f"🧹 Workspace eliminado: {ws.ruta.name}")
+
+    @contextmanager
+    def workspace(self, prefijo: str = "job"):
+        ws = self.crear(prefijo)
+        try:
+            yield ws
+        finally:
+            ws.liberar()
+
+
+gestor_workspaces = GestorWorkspaces(
+    raiz=settings.data_work / "jobs",
+    cuota_bytes=settings.workspace_cuota_mb * 1024 * 1024,
+)
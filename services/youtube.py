@@ -0,0 +1,93 @@
+# services/youtube.py
+# Audio de YouTube cacheado por ID de video.
+# Un mismo clip viral lo transcriben varios usuarios: el ID canónico (sacado
+# de cualquier forma de URL: watch?v=, youtu.be/, shorts/, embed/...) es la
+# clave del audio descargado y de las transcripciones. Si llegan varios pedidos
+# del mismo video a la vez, comparten una única descarga en curso.
+
+import asyncio
+import logging
+import re
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+from Backend_app.config import settings
+from .cache import CacheDisco
+from .ejecucion import ejecutor
+from .plazos import con_plazo
+from .vuelo_unico import descargas_en_curso
+from .workspace import gestor_workspaces
+
+logger = logging.getLogger(__name__)
+
+_PATRON_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_DOMINIOS_YOUTUBE = {"youtube.com", "m.youtube.com", "music.youtube.com", "youtube-nocookie.com"}
+_PREFIJOS_RUTA = ("shorts", "embed", "live", "v", "e")
+
+cache_audio_youtube = CacheDisco(
+    settings.data_work / "cache" / "youtube",
+    settings.cache_youtube_mb * 1024 * 1024,
+    nombre="audio de YouTube",
+    ttl_s=settings.cache_youtube_ttl_h * 3600,
+    sufijo=".mp3",
+)
+
+
+def extraer_video_id(url: str) -> Optional[str]:
+    """ID de 11 caracteres del video, o None si la URL no es de un video de YouTube."""
+    try:
+        partes = urlparse(url.strip())
+    except ValueError:
+        return None
+    host = (partes.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    candidato = None
+    if host == "youtu.be":
+        candidato = partes.path.lstrip("/").split("/")[0]
+    elif host in _DOMINIOS_YOUTUBE:
+        segmentos = [s for s in partes.path.split("/") if s]
+        if segmentos[:1] == ["watch"]:
+            candidato = parse_qs(partes.query).get("v", [None])[0]
+        elif len(segmentos) >= 2 and segmentos[0] in _PREFIJOS_RUTA:
+            candidato = segmentos[1]
+    if candidato and _PATRON_ID.match(candidato):
+        return candidato
+    return None
+
+
+def url_canonica(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+async def _descargar_a_cache(video_id: str, descargar: Callable[[str, Path], None]):
+    ws = await gestor_workspaces.crear_async(f"ytdl-{video_id}")
+    try:
+        destino = ws.archivo(f"{video_id}.mp3")
+        # La descarga compartida tiene su propio plazo, no el del primer pedido que la lanzó
+        with con_plazo(settings.plazo_inicial_s):
+            await ejecutor.en_hilo("descarga", descargar, url_canonica(video_id), destino)
+        await ws.verificar_cuota_async()
+        await asyncio.to_thread(cache_audio_youtube.guardar_archivo, video_id, destino)
+        logger.info(f"💾 Audio de {video_id} guardado en caché")
+    finally:
+        await ws.liberar_async()
+
+
+async def obtener_audio(video_id: str, destino: Path, descargar: Callable[[str, Path], None]):
+    """Deja en `destino` el audio del video, desde la caché o con una descarga compartida.
+
+    `descargar(url, ruta)` es la función bloqueante que baja el MP3 (yt-dlp).
+    """
+    if await asyncio.to_thread(cache_audio_youtube.copiar_archivo, video_id, destino):
+        logger.info(f"⚡ Audio de {video_id} servido desde caché")
+        return
+
+    # Pedidos simultáneos del mismo video comparten una única descarga
+    await descargas_en_curso.ejecutar(video_id, lambda: _descargar_a_cache(video_id, descargar))
+
+    if not await asyncio.to_thread(cache_audio_youtube.copiar_archivo, video_id, destino):
+        # Desalojada apenas guardada (archivo más grande que el presupuesto): bajarla directo
+        await ejecutor.en_hilo("descarga", descargar, url_canonica(video_id), destino)
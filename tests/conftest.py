@@ -0,0 +1,23 @@
+# tests/conftest.py
+# Backend_app.config exige credenciales y rutas de trabajo al importarse: para
+# los tests se completan con valores de prueba (sin pisar las del entorno) y
+# las rutas apuntan a un directorio temporal.
+
+import os
+import tempfile
+from pathlib import Path
+
+_trabajo = Path(tempfile.mkdtemp(prefix="auditxt-tests-"))
+
+for nombre, valor in {
+    "AZURE_OPENAI_API_KEY": "test",
+    "AZURE_OPENAI_ENDPOINT": "https://test.openai.azure.com/",
+    "AZURE_OPENAI_DEPLOYMENT": "test",
+    "AZURE_SPEECH_KEY": "test",
+    "AZURE_SPEECH_REGION": "westus",
+    "AZURE_REGION": "westus",
+    "WORK_DIR": str(_trabajo),
+    "DATA_WORK": str(_trabajo / "data"),
+    "AUDIO_WORK": str(_trabajo / "audio"),
+}.items():
+    os.environ.setdefault(nombre, valor)
@@ -0,0 +1,78 @@
+import os
+import time
+
+from services.cache import CacheDisco
+
+
+def _tamano(valor: str) -> int:
+    return len(f'"{valor}"'.encode("utf-8"))
+
+
+def test_desaloja_la_entrada_usada_menos_recientemente(tmp_path):
+    cache = CacheDisco(tmp_path, max_bytes=3 * _tamano("x" * 10))
+    for clave in ("a", "b", "c"):
+        cache.guardar(clave, clave * 10)
+
+    assert cache.obtener("a") == "a" * 10  # "a" pasa a ser la más reciente
+    cache.guardar("d", "d" * 10)
+
+    assert cache.obtener("b") is None
+    assert [cache.obtener(c) for c in ("a", "c", "d")] == ["a" * 10, "c" * 10, "d" * 10]
+    assert not (tmp_path / "b.json").exists()
+    estadisticas = cache.estadisticas()
+    assert estadisticas["desalojos"] == 1
+    assert estadisticas["bytes"] <= cache.max_bytes
+
+
+def test_entrada_vencida_por_ttl_es_un_fallo(tmp_path):
+    cache = CacheDisco(tmp_path, max_bytes=1_000_000, ttl_s=60)
+    cache.guardar("vieja", "texto")
+    cache.guardar("nueva", "texto")
+    ruta = tmp_path / "vieja.json"
+    hace_dos_minutos = time.time() - 120
+    os.utime(ruta, (hace_dos_minutos, hace_dos_minutos))
+
+    assert cache.obtener("vieja") is None
+    assert cache.obtener("nueva") == "texto"
+    assert not ruta.exists()
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+
+
+def test_el_orden_lru_sobrevive_a_un_reinicio(tmp_path):
+    cache = CacheDisco(tmp_path, max_bytes=1_000_000)
+    for i, clave in enumerate(("a", "b", "c")):
+        cache.guardar(clave, clave * 10)
+        os.utime(tmp_path / f"{clave}.json", (1_000 + i, 1_000))
+    os.utime(tmp_path / "a.json", (2_000, 1_000))  # "a" fue la última leída
+
+    reiniciada = CacheDisco(tmp_path, max_bytes=3 * _tamano("x" * 10))
+    reiniciada.guardar("d", "d" * 10)
+
+    assert reiniciada.obtener("b") is None
+    assert reiniciada.obtener("a") == "a" * 10
+
+
+def test_no_guarda_vacios_ni_entradas_mas_grandes_que_la_cache(tmp_path):
+    cache = CacheDisco(tmp_path, max_bytes=10)
+    cache.guardar("vacia", "")
+    cache.guardar("grande", "x" * 100)
+
+    assert cache.obtener("vacia") is None
+    assert cache.obtener("grande") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_archivo_guardado_vence_desde_que_entra_a_la_cache(tmp_path):
+    cache = CacheDisco(tmp_path / "cache", max_bytes=1_000_000, ttl_s=60, sufijo=".mp3")
+    origen = tmp_path / "descarga.mp3"
+    origen.write_bytes(b"audio")
+    subida = time.time() - 86_400  # yt-dlp deja la fecha de subida del video
+    os.utime(origen, (subida, subida))
+
+    cache.guardar_archivo("video", origen)
+    destino = tmp_path / "copia.mp3"
+
+    assert not origen.exists()
+    assert cache.copiar_archivo("video", destino)
+    assert destino.read_bytes() == b"audio"
+    assert not cache.copiar_archivo("otro", tmp_path / "otro.mp3")
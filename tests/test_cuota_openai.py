@@ -0,0 +1,154 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from Backend_app.config import settings
+from services import cuota_openai
+from services.cuota_openai import PRIORIDAD_FONDO, PRIORIDAD_INTERACTIVA, LimitadorOpenAI
+
+
+def test_prioridad_interactiva_pasa_antes_que_la_de_fondo():
+    async def escenario():
+        # 6000 solicitudes/min = una cada 10 ms; la cubeta arranca vacía
+        limitador = LimitadorOpenAI(6000, 0)
+        limitador.solicitudes.nivel = 0
+        orden = []
+
+        async def pedir(nombre, prioridad):
+            await limitador.turno(1, prioridad)
+            orden.append(nombre)
+
+        await asyncio.gather(
+            pedir("fondo-1", PRIORIDAD_FONDO),
+            pedir("interactivo", PRIORIDAD_INTERACTIVA),
+            pedir("fondo-2", PRIORIDAD_FONDO),
+        )
+        return orden
+
+    assert asyncio.run(escenario()) == ["interactivo", "fondo-1", "fondo-2"]
+
+
+def test_cancelar_la_cabeza_no_traba_la_cola():
+    async def escenario():
+        limitador = LimitadorOpenAI(600, 0)  # Una solicitud cada 100 ms
+        limitador.solicitudes.nivel = 0
+        primero = asyncio.create_task(limitador.turno(1))
+        await asyncio.sleep(0)
+        segundo = asyncio.create_task(limitador.turno(1))
+        await asyncio.sleep(0)
+        primero.cancel()
+        await asyncio.wait_for(segundo, 1.0)
+        return limitador.estadisticas()["en_cola"]
+
+    assert asyncio.run(escenario()) == 0
+
+
+def test_retry_after_pausa_a_todos_los_pedidos():
+    async def escenario():
+        limitador = LimitadorOpenAI(0, 0)  # Sin cuota del lado del cliente: solo rige la pausa
+        await limitador.pausar(httpx.Headers({"retry-after-ms": "200"}))
+        inicio = time.monotonic()
+        await asyncio.gather(limitador.turno(10), limitador.turno(10))
+        return time.monotonic() - inicio, limitador.total_429
+
+    esperado, rechazos = asyncio.run(escenario())
+    assert esperado >= 0.19
+    assert rechazos == 1
+
+
+def test_retry_after_en_segundos():
+    async def escenario():
+        limitador = LimitadorOpenAI(0, 0)
+        await limitador.pausar(httpx.Headers({"retry-after": "1.5"}))
+        return limitador.estadisticas()["pausa_restante_s"]
+
+    assert asyncio.run(escenario()) == pytest.approx(1.5, abs=0.1)
+
+
+def test_devuelve_los_tokens_estimados_de_mas():
+    async def escenario():
+        limitador = LimitadorOpenAI(0, 6000)
+        await limitador.turno(1000)
+        antes = limitador.tokens.nivel
+        limitador.registrar_respuesta(httpx.Headers(), estimados=1000, usados=200)
+        return antes, limitador.tokens.nivel
+
+    antes, despues = asyncio.run(escenario())
+    assert antes == pytest.approx(5000, abs=5)
+    assert despues == pytest.approx(5800, abs=5)
+
+
+def test_cobra_los_tokens_usados_de_mas_y_respeta_los_restantes_de_azure():
+    async def escenario():
+        limitador = LimitadorOpenAI(60, 6000)
+        await limitador.turno(100)
+        limitador.registrar_respuesta(httpx.Headers(), estimados=100, usados=600)
+        tras_uso = limitador.tokens.nivel
+        limitador.registrar_respuesta(
+            httpx.Headers({"x-ratelimit-remaining-tokens": "50", "x-ratelimit-remaining-requests": "2"}),
+            estimados=0, usados=None,
+        )
+        return tras_uso, limitador.tokens.nivel, limitador.solicitudes.nivel
+
+    tras_uso, tokens, solicitudes = asyncio.run(escenario())
+    assert tras_uso == pytest.approx(5400, abs=5)
+    assert tokens == pytest.approx(50, abs=1)
+    assert solicitudes == pytest.approx(2, abs=0.1)
+
+
+class _CompletionsFalsas:
+    """Responde 429 las primeras `rechazos` veces y después una respuesta con su uso real."""
+
+    def __init__(self, rechazos: int):
+        self.rechazos = rechazos
+        self.llamadas = 0
+
+    async def create(self, **parametros):
+        self.llamadas += 1
+        pedido = httpx.Request("POST", "https://test.openai.azure.com/chat/completions")
+        if self.llamadas <= self.rechazos:
+            respuesta = httpx.Response(429, headers={"retry-after-ms": "0"}, request=pedido)
+            raise openai.RateLimitError("429", response=respuesta, body=None)
+        return _RespuestaCruda()
+
+
+class _RespuestaCruda:
+    headers = httpx.Headers()
+
+    def parse(self):
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=100))
+
+
+def _cliente_falso(completions) -> SimpleNamespace:
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(with_raw_response=completions)))
+
+
+def test_los_reintentos_por_429_no_cobran_la_estimacion_otra_vez(monkeypatch):
+    limitador = LimitadorOpenAI(0, 6000)
+    completions = _CompletionsFalsas(rechazos=2)
+    monkeypatch.setattr(cuota_openai, "limitador_openai", limitador)
+    monkeypatch.setattr(cuota_openai, "openai_async", _cliente_falso(completions))
+    monkeypatch.setattr(settings, "openai_max_reintentos", 3)
+
+    mensajes = [{"role": "user", "content": "x" * 3996}]  # 1000 tokens estimados + 500 de salida
+    asyncio.run(cuota_openai.completar(messages=mensajes, max_tokens=500))
+
+    assert completions.llamadas == 3
+    # Solo se descuenta el uso real de la llamada que respondió
+    assert limitador.tokens.nivel == pytest.approx(5900, abs=5)
+
+
+def test_el_ultimo_429_tambien_devuelve_la_estimacion(monkeypatch):
+    limitador = LimitadorOpenAI(0, 6000)
+    monkeypatch.setattr(cuota_openai, "limitador_openai", limitador)
+    monkeypatch.setattr(cuota_openai, "openai_async", _cliente_falso(_CompletionsFalsas(rechazos=10)))
+    monkeypatch.setattr(settings, "openai_max_reintentos", 1)
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(cuota_openai.completar(messages=[{"role": "user", "content": "hola"}], max_tokens=500))
+
+    assert limitador.tokens.nivel == pytest.approx(6000, abs=5)
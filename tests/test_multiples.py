@@ -0,0 +1,42 @@
+import asyncio
+
+from services import azure_transcriptor
+from services.ingesta import ErrorConversion
+from services.workspace import gestor_workspaces
+
+
+def test_un_archivo_que_no_convierte_cuenta_como_error(monkeypatch):
+    async def por_archivo(ws, entrada, nombre):
+        if nombre == "roto.mp3":
+            raise ErrorConversion("Invalid data found when processing input")
+        return "hola"
+
+    async def sin_cache(clave):
+        return None
+
+    async def no_guardar(clave, valor):
+        pass
+
+    monkeypatch.setattr(azure_transcriptor, "_transcribir_por_archivo", por_archivo)
+    monkeypatch.setattr(azure_transcriptor.cache_transcripciones, "obtener_async", sin_cache)
+    monkeypatch.setattr(azure_transcriptor.cache_transcripciones, "guardar_async", no_guardar)
+
+    async def escenario():
+        ws = gestor_workspaces.crear("test-multi")
+        archivos = []
+        for i, nombre in enumerate(["bien.mp3", "roto.mp3"]):
+            ruta = ws.archivo(nombre)
+            ruta.write_bytes(b"audio")
+            archivos.append((nombre, ruta, f"{i:064d}"))
+        return [e async for e in azure_transcriptor.eventos_multiples_azure(ws, archivos, "texto", "archivo")]
+
+    eventos = asyncio.run(escenario())
+
+    por_nombre = {datos["nombre"]: datos for tipo, datos in eventos if tipo == "archivo"}
+    assert por_nombre["bien.mp3"]["transcripcion"] == "hola"
+    assert "transcripcion" not in por_nombre["roto.mp3"]
+    assert por_nombre["roto.mp3"]["error"] == "Error en la conversión de audio."
+    tipo, final = eventos[-1]
+    assert tipo == "final"
+    assert (final["archivos"], final["errores"]) == (2, 1)
+    assert "## roto.mp3\n\n[Error en la conversión de audio.]" in final["documento"]
@@ -0,0 +1,54 @@
+from services.reconocimiento import Palabras, Segmento, Vocabulario
+from services.transcripcion_lote import segmentos_desde_resultado
+
+
+def test_palabras_repetidas_comparten_id_del_vocabulario():
+    vocabulario = Vocabulario()
+    primera, segunda = Palabras(vocabulario), Palabras(vocabulario)
+    for i, palabra in enumerate(["la", "casa", "la"]):
+        primera.agregar(palabra, i * 100, 90)
+    segunda.agregar("casa", 0, 120)
+
+    assert len(vocabulario) == 2
+    assert list(primera.ids) == [0, 1, 0]
+    assert list(segunda.ids) == [1]
+    assert list(primera) == [("la", 0, 90), ("casa", 100, 90), ("la", 200, 90)]
+    assert primera.a_dict() == {"texto": ["la", "casa", "la"], "offset_ms": [0, 100, 200], "duracion_ms": [90, 90, 90]}
+
+
+def test_remapear_conserva_las_palabras():
+    palabras = Palabras()
+    palabras.agregar("hola", 500, 200)
+    remapeadas = palabras.remapear(lambda ms: ms + 1000)
+    assert list(remapeadas) == [("hola", 1500, 200)]
+    assert list(palabras) == [("hola", 500, 200)]
+
+
+def test_segmento_a_dict_con_palabras():
+    palabras = Palabras()
+    palabras.agregar("hola", 0, 300)
+    assert Segmento("Hola.", 1.234, 0.5, palabras).a_dict() == {
+        "texto": "Hola.", "offset": 1.23, "duracion": 0.5,
+        "palabras": {"texto": ["hola"], "offset_ms": [0], "duracion_ms": [300]},
+    }
+
+
+def test_frases_de_un_resultado_de_lote_comparten_vocabulario():
+    def frase(offset):
+        return {
+            "offsetInTicks": offset,
+            "durationInTicks": 5_000_000,
+            "nBest": [{
+                "display": "Sí, sí.",
+                "displayWords": [
+                    {"displayText": "Sí,", "offsetInTicks": offset, "durationInTicks": 2_000_000},
+                    {"displayText": "sí.", "offsetInTicks": offset + 2_500_000, "durationInTicks": 2_000_000},
+                ],
+            }],
+        }
+
+    primero, segundo = segmentos_desde_resultado({"recognizedPhrases": [frase(30_000_000), frase(10_000_000)]})
+
+    assert (primero.offset, segundo.offset) == (1.0, 3.0)
+    assert primero.palabras.vocabulario is segundo.palabras.vocabulario
+    assert list(segundo.palabras) == [("Sí,", 0, 200), ("sí.", 250, 200)]
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from services.plazos import PlazoExcedido, con_plazo, iterar_en_plazo
+
+
+def test_iterar_en_plazo_corta_una_fuente_colgada_y_la_cierra():
+    cerrada = False
+
+    async def fuente():
+        nonlocal cerrada
+        try:
+            yield "primero"
+            await asyncio.sleep(60)
+            yield "nunca"
+        finally:
+            cerrada = True
+
+    async def escenario():
+        recibidos = []
+        with con_plazo(0.1):
+            with pytest.raises(PlazoExcedido) as error:
+                async for elemento in iterar_en_plazo("reconocimiento", fuente()):
+                    recibidos.append(elemento)
+        return recibidos, error.value.etapa
+
+    recibidos, etapa = asyncio.run(escenario())
+    assert recibidos == ["primero"]
+    assert etapa == "reconocimiento"
+    assert cerrada
+
+
+def test_iterar_en_plazo_sin_plazo_entrega_todo():
+    async def fuente():
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield i
+
+    async def escenario():
+        return [i async for i in iterar_en_plazo("reconocimiento", fuente())]
+
+    assert asyncio.run(escenario()) == [0, 1, 2]
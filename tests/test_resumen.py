@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from services import resumen
+from services.cuota_openai import estimar_tokens
+from services.resumen import _agrupar, _resumir_fragmentos, fragmentar
+
+
+def test_fragmentar_corta_entre_frases_dentro_del_presupuesto():
+    texto = " ".join(f"Esta es la frase número {i}." for i in range(40))
+
+    fragmentos = fragmentar(texto, max_tokens=30)  # ~120 caracteres
+
+    assert len(fragmentos) > 1
+    assert all(len(f) <= 120 for f in fragmentos)
+    assert all(f.endswith(".") for f in fragmentos)
+    assert " ".join(fragmentos) == texto
+
+
+def test_fragmentar_parte_un_dictado_sin_puntuacion():
+    texto = " ".join(["palabra"] * 100)
+
+    fragmentos = fragmentar(texto, max_tokens=10)
+
+    assert all(len(f) <= 40 for f in fragmentos)
+    assert " ".join(fragmentos) == texto
+
+
+def test_agrupar_respeta_el_presupuesto_y_el_orden():
+    parciales = [f"resumen {i} " + "x" * 36 for i in range(6)]  # ~12 tokens cada uno
+
+    grupos = _agrupar(parciales, max_tokens=3 * estimar_tokens(parciales[0]))
+
+    assert grupos == ["\n\n".join(parciales[:3]), "\n\n".join(parciales[3:])]
+
+
+def test_agrupar_siempre_reduce_aunque_cada_parcial_llene_el_presupuesto():
+    parciales = ["a" * 400, "b" * 400, "c" * 400]
+
+    grupos = _agrupar(parciales, max_tokens=10)
+
+    assert len(grupos) == 2
+    assert grupos[0] == "a" * 400 + "\n\n" + "b" * 400
+
+
+def test_un_fragmento_que_falla_cancela_a_los_demas(monkeypatch):
+    cancelados = []
+
+    async def completar(prompt, max_tokens):
+        if prompt == "falla":
+            await asyncio.sleep(0.01)
+            raise RuntimeError("Azure OpenAI no disponible")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelados.append(prompt)
+            raise
+        return "nunca"
+
+    monkeypatch.setattr(resumen, "_completar", completar)
+
+    async def escenario():
+        await _resumir_fragmentos(["uno", "falla", "dos"], asyncio.Semaphore(3))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(escenario())
+    assert sorted(cancelados) == ["dos", "uno"]
@@ -0,0 +1,48 @@
+import numpy as np
+
+from services.segmentacion import MUESTRAS_POR_TRAMA, TASA_MUESTREO, TRAMAS_POR_SEGUNDO, calcular_cortes, segmentar
+
+
+def _trama(segundos: float) -> int:
+    return int(segundos * TRAMAS_POR_SEGUNDO)
+
+
+def test_corta_en_el_silencio_mas_cercano_al_objetivo():
+    energia = np.full(_trama(70), 60.0, dtype=np.float32)
+    energia[_trama(18):_trama(18.6)] = 0.0  # Silencio dentro de la ventana del primer corte
+    energia[_trama(8):_trama(8.6)] = 0.0  # Fuera de la ventana: no se usa
+    energia[_trama(41):_trama(41.6)] = 0.0  # Cerca del segundo objetivo (18 + 20)
+
+    cortes = calcular_cortes(energia, objetivo_s=20, maximo_s=30)
+
+    assert len(cortes) == 2
+    assert _trama(18) <= cortes[0] < _trama(18.6)
+    assert _trama(41) <= cortes[1] < _trama(41.6)
+
+
+def test_sin_silencio_corta_antes_del_maximo():
+    energia = np.full(_trama(100), 60.0, dtype=np.float32)
+
+    cortes = calcular_cortes(energia, objetivo_s=20, maximo_s=22)
+
+    tramos = np.diff([0, *cortes, len(energia)])
+    assert cortes
+    assert all(t <= _trama(22) for t in tramos)
+
+
+def test_audio_corto_no_se_corta():
+    assert calcular_cortes(np.full(_trama(29), 60.0, dtype=np.float32), objetivo_s=20, maximo_s=30) == []
+
+
+def test_segmentar_cubre_todas_las_muestras_sin_huecos():
+    rng = np.random.default_rng(0)
+    muestras = (rng.standard_normal(TASA_MUESTREO * 50) * 3000).astype("<i2")
+    muestras[TASA_MUESTREO * 19: TASA_MUESTREO * 20] = 0
+
+    rangos = segmentar(muestras, objetivo_s=20, maximo_s=30)
+
+    assert rangos[0][0] == 0 and rangos[-1][1] == len(muestras)
+    assert all(fin == inicio for (_, fin), (inicio, _) in zip(rangos, rangos[1:]))
+    corte = rangos[0][1]
+    assert corte % MUESTRAS_POR_TRAMA == 0
+    assert TASA_MUESTREO * 19 <= corte < TASA_MUESTREO * 20
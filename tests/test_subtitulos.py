@@ -0,0 +1,53 @@
+import pytest
+
+from Backend_app.config import settings
+from services.reconocimiento import Palabras, Segmento
+from services.subtitulos import exportar, lineas
+
+
+def _segmento() -> Segmento:
+    palabras = Palabras()
+    for i, palabra in enumerate(["uno", "dos", "tres", "cuatro"]):
+        palabras.agregar(palabra, i * 1000, 800)
+    return Segmento("uno dos tres cuatro", 3661.5, 3.8, palabras)
+
+
+def test_segmento_sin_palabras_es_una_linea():
+    assert list(lineas(Segmento("hola", 1.0, 2.5))) == [(1.0, 3.5, "hola")]
+
+
+def test_lineas_se_cortan_por_duracion(monkeypatch):
+    monkeypatch.setattr(settings, "subtitulos_max_caracteres", 84)
+    monkeypatch.setattr(settings, "subtitulos_max_segundos", 2.0)
+
+    resultado = list(lineas(_segmento()))
+
+    assert resultado == [
+        (pytest.approx(3661.5), pytest.approx(3663.3), "uno dos"),
+        (pytest.approx(3663.5), pytest.approx(3665.3), "tres cuatro"),
+    ]
+
+
+def test_lineas_se_cortan_por_caracteres(monkeypatch):
+    monkeypatch.setattr(settings, "subtitulos_max_caracteres", 8)
+    monkeypatch.setattr(settings, "subtitulos_max_segundos", 60.0)
+
+    assert [texto for _, _, texto in lineas(_segmento())] == ["uno dos", "tres", "cuatro"]
+
+
+def test_exportar_srt(monkeypatch):
+    monkeypatch.setattr(settings, "subtitulos_max_caracteres", 84)
+    monkeypatch.setattr(settings, "subtitulos_max_segundos", 2.0)
+
+    srt = "".join(exportar([_segmento(), Segmento("fin", 3670.0, 0.25)], "srt"))
+
+    assert srt == (
+        "1\n01:01:01,500 --> 01:01:03,300\nuno dos\n\n"
+        "2\n01:01:03,500 --> 01:01:05,300\ntres cuatro\n\n"
+        "3\n01:01:10,000 --> 01:01:10,250\nfin\n\n"
+    )
+
+
+def test_exportar_vtt():
+    vtt = "".join(exportar([Segmento("hola", 59.9996, 1.2)], "vtt"))
+    assert vtt == "WEBVTT\n\n1\n00:01:00.000 --> 00:01:01.200\nhola\n\n"
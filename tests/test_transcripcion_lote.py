@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from Backend_app.config import settings
+from services.transcripcion_lote import ClienteLote, ErrorLote, transcribir_lote
+
+BASE = "https://speech.test/speechtotext/v3.2"
+
+
+def _resultado(fuente: str, texto: str) -> dict:
+    return {
+        "source": fuente,
+        "durationInTicks": 20_000_000,
+        "recognizedPhrases": [{
+            "offsetInTicks": 5_000_000,
+            "durationInTicks": 10_000_000,
+            "nBest": [{"display": texto}],
+        }],
+    }
+
+
+class ApiFalsa:
+    """Imita /speechtotext/v3.2 y anota cada pedido."""
+
+    def __init__(self, estados):
+        self.estados = list(estados)
+        self.pedidos = []
+        self.creacion_limitada = False
+
+    def __call__(self, pedido: httpx.Request) -> httpx.Response:
+        self.pedidos.append(pedido)
+        url = str(pedido.url)
+        if pedido.method == "POST":
+            if not self.creacion_limitada:
+                self.creacion_limitada = True
+                return httpx.Response(429, headers={"retry-after": "0"})
+            return httpx.Response(201, json={"self": f"{BASE}/transcriptions/lote-1"})
+        if pedido.method == "DELETE":
+            return httpx.Response(204)
+        if url == f"{BASE}/transcriptions/lote-1":
+            estado = self.estados.pop(0)
+            propiedades = {"error": {"message": "archivo inválido"}} if estado == "Failed" else {}
+            return httpx.Response(200, json={"status": estado, "properties": propiedades})
+        if url == f"{BASE}/transcriptions/lote-1/files":
+            return httpx.Response(200, json={
+                "values": [
+                    {"kind": "Transcription", "links": {"contentUrl": "https://blob.test/b.json?sas"}},
+                    {"kind": "TranscriptionReport", "links": {"contentUrl": "https://blob.test/reporte.json"}},
+                ],
+                "@nextLink": f"{BASE}/transcriptions/lote-1/files?skip=2",
+            })
+        if url == f"{BASE}/transcriptions/lote-1/files?skip=2":
+            return httpx.Response(200, json={
+                "values": [{"kind": "Transcription", "links": {"contentUrl": "https://blob.test/a.json?sas"}}],
+            })
+        if url == "https://blob.test/a.json?sas":
+            return httpx.Response(200, json=_resultado("https://audios.test/a.wav", "Primero."))
+        if url == "https://blob.test/b.json?sas":
+            return httpx.Response(200, json=_resultado("https://audios.test/b.wav", "Segundo."))
+        return httpx.Response(404)
+
+
+@pytest.fixture(autouse=True)
+def _sin_esperas(monkeypatch):
+    monkeypatch.setattr(settings, "lote_poll_inicial_s", 0.0)
+    monkeypatch.setattr(settings, "lote_poll_max_s", 0.0)
+    monkeypatch.setattr(settings, "lote_borrar_al_terminar", True)
+
+
+def _ejecutar(api: ApiFalsa):
+    async def escenario():
+        cliente = ClienteLote(BASE, "clave", transport=httpx.MockTransport(api))
+        try:
+            return await transcribir_lote(
+                urls=["https://audios.test/a.wav", "https://audios.test/b.wav"],
+                modo_salida="texto",
+                cliente=cliente,
+            )
+        finally:
+            await cliente.cerrar()
+
+    return asyncio.run(escenario())
+
+
+def test_lote_exitoso_reintenta_el_429_y_recorre_todas_las_paginas():
+    api = ApiFalsa(["NotStarted", "Running", "Succeeded"])
+
+    archivos = _ejecutar(api)
+
+    # Mismo orden que las URLs enviadas, aunque la API los devolvió al revés
+    assert [a["fuente"] for a in archivos] == ["https://audios.test/a.wav", "https://audios.test/b.wav"]
+    assert [a["texto"] for a in archivos] == ["Primero.", "Segundo."]
+    assert archivos[0]["duracion"] == 2.0
+    assert archivos[0]["segmentos"] == [{"texto": "Primero.", "offset": 0.5, "duracion": 1.0}]
+
+    creaciones = [p for p in api.pedidos if p.method == "POST"]
+    assert len(creaciones) == 2  # 429 + reintento
+    definicion = json.loads(creaciones[1].content)
+    assert definicion["contentUrls"] == ["https://audios.test/a.wav", "https://audios.test/b.wav"]
+    assert api.estados == []  # Consultó hasta Succeeded
+    assert any(p.method == "DELETE" for p in api.pedidos)
+
+
+def test_la_clave_no_viaja_a_las_urls_de_resultados():
+    api = ApiFalsa(["Succeeded"])
+
+    _ejecutar(api)
+
+    for pedido in api.pedidos:
+        enviada = "Ocp-Apim-Subscription-Key" in pedido.headers
+        assert enviada == str(pedido.url).startswith(BASE)
+
+
+def test_lote_fallido_informa_el_error_y_borra_el_lote():
+    api = ApiFalsa(["Running", "Failed"])
+
+    with pytest.raises(ErrorLote, match="archivo inválido"):
+        _ejecutar(api)
+
+    assert any(p.method == "DELETE" for p in api.pedidos)
+    assert not any("/files" in str(p.url) for p in api.pedidos)
@@ -0,0 +1,77 @@
+import asyncio
+
+from services import transcripcion_vivo
+from services.transcripcion_vivo import SesionEnVivo
+
+
+class WebSocketFalso:
+    """Entrega `frames` como mensajes binarios y registra lo enviado."""
+
+    def __init__(self, frames=()):
+        self._frames = list(frames)
+        self.recibidos = 0
+        self.enviados = []
+
+    async def receive(self):
+        if self.recibidos == len(self._frames):
+            return {"type": "websocket.disconnect"}
+        self.recibidos += 1
+        return {"type": "websocket.receive", "bytes": self._frames[self.recibidos - 1]}
+
+    async def send_json(self, mensaje):
+        self.enviados.append(mensaje)
+
+
+def test_cola_llena_frena_la_lectura_del_socket(monkeypatch):
+    monkeypatch.setattr(transcripcion_vivo.settings, "vivo_cola_frames", 3)
+    frames = [bytes([i]) * 10 for i in range(10)]
+
+    async def escenario():
+        websocket = WebSocketFalso(frames)
+        sesion = SesionEnVivo(websocket)
+        receptor = asyncio.create_task(sesion._recibir(None))
+        for _ in range(20):
+            await asyncio.sleep(0)
+        # Sin consumidor: 3 frames en la cola y uno esperando lugar; el resto sigue en el socket
+        en_espera = (sesion._entrada.qsize(), websocket.recibidos)
+        recibidos = [datos async for datos in sesion._frames()]
+        await receptor
+        return en_espera, recibidos, sesion.desconectado
+
+    en_espera, recibidos, desconectado = asyncio.run(escenario())
+
+    assert en_espera == (3, 4)
+    assert recibidos == frames
+    assert desconectado
+
+
+def test_parciales_se_coalescen_y_un_final_los_descarta():
+    async def escenario():
+        websocket = WebSocketFalso()
+        sesion = SesionEnVivo(websocket)
+        sesion._publicar_parcial({"tipo": "parcial", "texto": "ho"})
+        sesion._publicar_parcial({"tipo": "parcial", "texto": "hola"})
+        sesion._publicar({"tipo": "final", "texto": "Hola."})
+        sesion._publicar_parcial({"tipo": "parcial", "texto": "qué"})
+        sesion._publicar_parcial({"tipo": "parcial", "texto": "qué tal"})
+        emisor = asyncio.create_task(sesion._emitir())
+        await asyncio.sleep(0)
+        sesion._publicar({"tipo": "fin"})
+        await emisor
+        return websocket.enviados
+
+    enviados = asyncio.run(escenario())
+
+    assert [m["texto"] if "texto" in m else m["tipo"] for m in enviados] == ["Hola.", "qué tal", "fin"]
+
+
+def test_sin_consumo_se_descartan_los_finales_mas_viejos(monkeypatch):
+    monkeypatch.setattr(transcripcion_vivo, "MAX_FINALES_PENDIENTES", 2)
+
+    async def escenario():
+        sesion = SesionEnVivo(WebSocketFalso())
+        for i in range(5):
+            sesion._publicar({"tipo": "final", "texto": str(i)})
+        return [m["texto"] for m in sesion._finales]
+
+    assert asyncio.run(escenario()) == ["3", "4"]
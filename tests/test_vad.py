@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from services.reconocimiento import Palabras, Segmento
+from services.segmentacion import TRAMAS_POR_SEGUNDO
+from services.vad import MapaOffsets, detectar_voz
+
+
+def _mapa() -> MapaOffsets:
+    # Recortado [0, 2) = original [0, 2); recortado [2, 5) = original [10, 13)
+    mapa = MapaOffsets()
+    mapa.agregar(0.0, 0.0)
+    mapa.agregar(2.0, 10.0)
+    return mapa
+
+
+def test_a_original_suma_el_silencio_recortado():
+    mapa = _mapa()
+    assert mapa.a_original(1.5) == pytest.approx(1.5)
+    assert mapa.a_original(2.0) == pytest.approx(10.0)
+    assert mapa.a_original(3.25) == pytest.approx(11.25)
+
+
+def test_mapa_vacio_deja_los_tiempos_igual():
+    assert MapaOffsets().a_original(7.0) == 7.0
+
+
+def test_corregir_remapea_cada_palabra_de_un_segmento_que_cruza_un_corte():
+    palabras = Palabras()
+    palabras.agregar("antes", 0, 400)
+    palabras.agregar("del", 500, 200)
+    palabras.agregar("corte", 1200, 300)  # 2,2 s recortado: ya está del otro lado
+    segmento = Segmento("antes del corte", 1.0, 1.5, palabras)
+
+    corregido, = _mapa().corregir([segmento])
+
+    assert corregido.offset == pytest.approx(1.0)
+    # El fin (2,5 s recortado) cae después del corte: 10,5 s en el original
+    assert corregido.duracion == pytest.approx(9.5)
+    assert list(corregido.palabras) == [("antes", 0, 400), ("del", 500, 200), ("corte", 9200, 300)]
+    # El original no se modifica
+    assert list(segmento.palabras)[2] == ("corte", 1200, 300)
+
+
+def test_corregir_segmento_sin_palabras():
+    corregido, = _mapa().corregir([Segmento("hola", 4.0, 1.0)])
+    assert corregido.offset == pytest.approx(12.0)
+    assert corregido.palabras is None
+
+
+def test_detectar_voz_une_pausas_cortas_y_separa_silencios_largos():
+    tramas = int(10 * TRAMAS_POR_SEGUNDO)
+    energia = np.full(tramas, 0.0, dtype=np.float32)
+    voz = 60.0
+    energia[int(1 * TRAMAS_POR_SEGUNDO):int(2 * TRAMAS_POR_SEGUNDO)] = voz
+    energia[int(2.3 * TRAMAS_POR_SEGUNDO):int(3 * TRAMAS_POR_SEGUNDO)] = voz  # pausa de 300 ms
+    energia[int(7 * TRAMAS_POR_SEGUNDO):int(8 * TRAMAS_POR_SEGUNDO)] = voz  # silencio de 4 s
+
+    regiones = detectar_voz(energia, umbral_db=12.0, margen_ms=240, silencio_min_ms=1000)
+
+    margen = round(240 * TRAMAS_POR_SEGUNDO / 1000)
+    assert regiones == [
+        (int(1 * TRAMAS_POR_SEGUNDO) - margen, int(3 * TRAMAS_POR_SEGUNDO) + margen),
+        (int(7 * TRAMAS_POR_SEGUNDO) - margen, int(8 * TRAMAS_POR_SEGUNDO) + margen),
+    ]
+
+
+def test_detectar_voz_en_silencio_digital():
+    assert detectar_voz(np.zeros(100, dtype=np.float32), 12.0, 250, 1000) == []
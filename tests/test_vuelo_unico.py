@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from services.vuelo_unico import VueloUnico
+
+
+def test_pedidos_concurrentes_comparten_una_ejecucion():
+    async def escenario():
+        vuelo = VueloUnico("test")
+        llamadas = 0
+
+        async def fabrica():
+            nonlocal llamadas
+            llamadas += 1
+            await asyncio.sleep(0.01)
+            return "resultado"
+
+        resultados = await asyncio.gather(*(vuelo.ejecutar("clave", fabrica) for _ in range(5)))
+        return resultados, llamadas, vuelo.estadisticas()
+
+    resultados, llamadas, estadisticas = asyncio.run(escenario())
+    assert resultados == ["resultado"] * 5
+    assert llamadas == 1
+    assert estadisticas == {"en_curso": 0, "ejecutados": 1, "coalescidos": 4}
+
+
+def test_el_error_llega_a_todos_los_que_esperan_y_libera_la_clave():
+    async def escenario():
+        vuelo = VueloUnico("test")
+        llamadas = 0
+
+        async def falla():
+            nonlocal llamadas
+            llamadas += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("video no disponible")
+
+        errores = await asyncio.gather(*(vuelo.ejecutar("clave", falla) for _ in range(3)), return_exceptions=True)
+
+        async def anda():
+            return "ok"
+
+        # La clave quedó libre: el próximo pedido vuelve a ejecutar
+        return errores, llamadas, await vuelo.ejecutar("clave", anda)
+
+    errores, llamadas, siguiente = asyncio.run(escenario())
+    assert llamadas == 1
+    assert all(isinstance(e, ValueError) for e in errores)
+    assert errores[0] is errores[1] is errores[2]
+    assert siguiente == "ok"
+
+
+def test_un_pedido_cancelado_no_cancela_a_los_demas():
+    async def escenario():
+        vuelo = VueloUnico("test")
+
+        async def fabrica():
+            await asyncio.sleep(0.05)
+            return "resultado"
+
+        primero = asyncio.create_task(vuelo.ejecutar("clave", fabrica))
+        segundo = asyncio.create_task(vuelo.ejecutar("clave", fabrica))
+        await asyncio.sleep(0.01)
+        primero.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await primero
+        return await segundo
+
+    assert asyncio.run(escenario()) == "resultado"
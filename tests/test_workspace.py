@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+import pytest
+
+from services import workspace
+from services.workspace import CuotaDiscoExcedida, GestorWorkspaces
+
+
+def test_crear_y_liberar_async_no_bloquean_el_event_loop(tmp_path, monkeypatch):
+    gestor = GestorWorkspaces(tmp_path, cuota_bytes=1_000_000)
+    hilos = []
+    tamano = workspace._tamano_directorio
+    borrar = workspace.shutil.rmtree
+
+    def tamano_registrado(ruta):
+        hilos.append(threading.get_ident())
+        return tamano(ruta)
+
+    def borrar_registrado(ruta, **kwargs):
+        hilos.append(threading.get_ident())
+        borrar(ruta, **kwargs)
+
+    monkeypatch.setattr(workspace, "_tamano_directorio", tamano_registrado)
+    monkeypatch.setattr(workspace.shutil, "rmtree", borrar_registrado)
+
+    async def escenario():
+        ws = await gestor.crear_async("test")
+        ws.archivo("audio.wav").write_bytes(b"0" * 1000)
+        await ws.verificar_cuota_async()
+        await ws.liberar_async()
+        await ws.liberar_async()  # Idempotente
+        return ws, threading.get_ident()
+
+    ws, hilo_loop = asyncio.run(escenario())
+
+    assert not ws.ruta.exists()
+    assert list(tmp_path.iterdir()) == []
+    assert len(hilos) == 3
+    assert hilo_loop not in hilos
+
+
+def test_crear_async_respeta_la_cuota(tmp_path):
+    gestor = GestorWorkspaces(tmp_path, cuota_bytes=100)
+    ocupado = gestor.crear("lleno")
+    ocupado.archivo("audio.wav").write_bytes(b"0" * 1000)
+
+    with pytest.raises(CuotaDiscoExcedida):
+        asyncio.run(gestor.crear_async("otro"))
+
+    asyncio.run(ocupado.liberar_async())
+    asyncio.run(gestor.crear_async("otro"))
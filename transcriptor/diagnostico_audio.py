@@ -9,6 +9,8 @@ import subprocess
 from azure.cognitiveservices.speech import SpeechConfig, AudioConfig, SpeechRecognizer
 import azure.cognitiveservices.speech as speechsdk
 
+from services.reconocimiento import SesionReconocimiento
+
 def verificar_archivo_wav(ruta):
     print("🔍 Verificando archivo WAV...")
     if not os.path.exists(ruta):
@@ -42,7 +44,6 @@ def test_azure_transcripcion(ruta_wav, speech_key, region, language="es-ES"):
         audio_input = speechsdk.audio.AudioConfig(filename=ruta_wav)
         recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_input)
 
-        done = False
         resultado_final = []
 
         def recognized(evt):
@@ -58,19 +59,12 @@ def test_azure_transcripcion(ruta_wav, speech_key, region, language="es-ES"):
             if evt.reason == speechsdk.CancellationReason.Error:
                 print(f"Detalles del error: {evt.error_details}")
 
-        def session_stopped(evt):
-            nonlocal done
-            print("✅ Sesión de transcripción finalizada.")
-            done = True
-
         recognizer.recognized.connect(recognized)
         recognizer.canceled.connect(canceled)
-        recognizer.session_stopped.connect(session_stopped)
 
-        recognizer.start_continuous_recognition()
-        while not done:
-            pass
-        recognizer.stop_continuous_recognition()
+        # Bloquea sobre un evento del SDK (antes: `while not done: pass`, un core al 100%)
+        SesionReconocimiento(recognizer).ejecutar()
+        print("✅ Sesión de transcripción finalizada.")
 
         if not resultado_final:
             print("⚠️ No se obtuvo texto de Azure.")
@@ -17,6 +17,11 @@ from transformers import pipeline
 
 # Importa tus settings configurados
 from Backend_app.config import settings
+from services.reconocimiento import SesionReconocimiento
+from services.formato import formatear_oradores
+from services.speech_clientes import crear_recognizer
+from services.plazos import plazo_por_duracion, duracion_wav
+from services.workspace import gestor_workspaces, CuotaDiscoExcedida
 
 # --- Configuración de Rutas (tomada de settings) ---
 # Estas rutas deben estar definidas en tu .env y cargadas por pydantic-settings
@@ -36,9 +41,9 @@ YT_DLP_EXE = WORK_DIR / "yt-dlp.exe"
 FFMPEG_EXE = WORK_DIR / "ffmpeg.exe"
 FFPROBE_EXE = WORK_DIR / "ffprobe.exe" # Aunque no se usa directamente en subprocess, es buena práctica tenerlo
 
-# Rutas a los archivos de datos temporales (en DATA_WORK)
-AUDIO_FILENAME = DATA_WORK / "audio_descargado.mp3"
-WAV_FILENAME = DATA_WORK / "audio_convertido.wav"
+# Nombres de los archivos temporales; cada request los crea en su propio workspace
+AUDIO_FILENAME = "audio_descargado.mp3"
+WAV_FILENAME = "audio_convertido.wav"
 
 # --- Constantes de Azure y Lenguaje (tomadas de settings) ---
 # Estas también deben estar en tu .env y cargadas por settings
@@ -132,83 +137,24 @@ def convert_mp3_to_wav(mp3_file: Path, wav_file: Path):
 def transcribe_audio_detailed(ruta_wav: Path, azure_key: str, azure_region: str, language: str = "es-ES") -> str:
     """Transcribe audio usando Azure Speech SDK."""
     print("DEBUG: Iniciando transcripción con Azure Speech SDK...")
-    speech_config = speechsdk.SpeechConfig(subscription=azure_key, region=azure_region)
-    speech_config.speech_recognition_language = language
     audio_input = speechsdk.AudioConfig(filename=str(ruta_wav)) # Convertir Path a str
 
-    recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_input)
+    # Config compartida por región/idioma; la conexión se abre al crear el recognizer
+    recognizer = crear_recognizer(audio_input, language, azure_key, azure_region)
 
-    texto = []
-
-    def handle_recognized_event(evt):
-        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
-            texto.append(evt.result.text)
-            # print(f"DEBUG: Texto reconocido parcial: {evt.result.text}") # Debug para ver progreso
-        elif evt.result.reason == speechsdk.ResultReason.NoMatch:
-            print(f"DEBUG: No se pudo reconocer el habla: {evt.result.no_match_details}")
-        elif evt.result.reason == speechsdk.ResultReason.Canceled:
-            cancellation_details = evt.result.cancellation_details
-            print(f"DEBUG: Reconocimiento cancelado: Razón={cancellation_details.reason}")
-            if cancellation_details.reason == speechsdk.CancellationReason.Error:
-                print(f"DEBUG: Código de error={cancellation_details.error_code}")
-                print(f"DEBUG: Detalles de error={cancellation_details.error_details}")
-                raise Exception(f"Error de Azure Speech: {cancellation_details.error_details}")
-
-    recognizer.recognized.connect(handle_recognized_event)
-
-    done = False
-    def stop_cb(evt):
-        nonlocal done
-        done = True
-        print(f"DEBUG: Evento de parada recibido: {evt}")
-
-    recognizer.session_stopped.connect(stop_cb)
-    recognizer.canceled.connect(stop_cb)
-    recognizer.speech_end_detected.connect(stop_cb) # Añadir para detectar el fin del habla
+    # La sesión se basa en eventos: detecta el fin al instante, sin sleep-polling
+    sesion = SesionReconocimiento(recognizer)
 
     print("DEBUG: Iniciando reconocimiento continuo...")
-    recognizer.start_continuous_recognition()
-    # Espera activa para que el hilo de reconocimiento se ejecute
-    timeout_seconds = 300 # Tiempo máximo de espera (ej. 5 minutos)
-    start_time = time.time()
-    while not done and (time.time() - start_time < timeout_seconds):
-        time.sleep(0.5)
-
-    if not done:
-        print("ADVERTENCIA: El reconocimiento continuo no finalizó a tiempo. Deteniendo forzosamente.")
-    
-    recognizer.stop_continuous_recognition()
+    # Plazo proporcional a la duración; si vence se lanza PlazoExcedido en lugar de truncar
+    sesion.ejecutar(timeout=plazo_por_duracion(duracion_wav(ruta_wav)))
     print("DEBUG: Reconocimiento continuo detenido.")
 
-    final_text = " ".join(texto).strip()
+    final_text = sesion.texto
     if not final_text:
         print("ADVERTENCIA: Transcripción vacía.")
     return final_text
 
-def limpiar_y_formatear_dialogo(texto: str) -> str:
-    """
-    Formatea el texto en un formato de diálogo simple.
-    Esta función es muy básica y puede necesitar mejoras
-    dependiendo de la calidad de la transcripción cruda y
-    si Azure Speech ya incluye diarización de oradores.
-    """
-    dialogo = []
-    # Intenta dividir por líneas si hay, sino trata el texto completo
-    lineas = texto.splitlines() if "\n" in texto else [texto]
-
-    for linea in lineas:
-        # Simplificación: si la línea parece tener un orador (ej. "Orador 1:"), úsala
-        # De lo contrario, asume un orador por defecto o simplemente el contenido.
-        if ":" in linea and linea.split(":", 1)[0].strip().endswith("or"): # Heurística simple para "Orador X"
-            orador, contenido = linea.split(":", 1)
-            dialogo.append(f"{orador.strip()}: {contenido.strip()}")
-        else:
-            # Si no hay un orador claro, o se necesita una diarización más avanzada
-            # Esto es un placeholder. La diarización real necesita más lógica o un servicio específico.
-            dialogo.append(linea.strip()) # Por ahora, solo añade la línea
-
-    return "\n".join(dialogo)
-
 # Inicializar una sola vez el modelo summarizer
 # Asegúrate de que los modelos de transformers estén descargados.
 # Esto puede consumir bastante RAM.
@@ -285,18 +231,26 @@ def transcribir_audio(req: TranscripcionRequest):
     if not validar_url_youtube(link_str):
         raise HTTPException(status_code=400, detail="URL inválida de YouTube. Solo se admiten URLs de YouTube.")
 
+    try:
+        ws = gestor_workspaces.crear("yt")
+    except CuotaDiscoExcedida as e:
+        raise HTTPException(status_code=507, detail=str(e))
+    audio_path = ws.archivo(AUDIO_FILENAME)
+    wav_path = ws.archivo(WAV_FILENAME)
+
     try:
         print(f"DEBUG: Iniciando descarga de audio de: {link_str}")
-        download_audio(link_str, AUDIO_FILENAME)
-        print(f"DEBUG: Audio descargado a: {AUDIO_FILENAME}")
+        download_audio(link_str, audio_path)
+        print(f"DEBUG: Audio descargado a: {audio_path}")
+        ws.verificar_cuota()
 
-        print(f"DEBUG: Iniciando conversión a WAV: {AUDIO_FILENAME} -> {WAV_FILENAME}")
-        convert_mp3_to_wav(AUDIO_FILENAME, WAV_FILENAME)
-        print(f"DEBUG: Archivo WAV creado: {WAV_FILENAME}")
+        print(f"DEBUG: Iniciando conversión a WAV: {audio_path} -> {wav_path}")
+        convert_mp3_to_wav(audio_path, wav_path)
+        print(f"DEBUG: Archivo WAV creado: {wav_path}")
 
         print(f"DEBUG: Iniciando transcripción con Azure Speech...")
         # Usa el PATH para el archivo WAV directamente
-        texto_crudo = transcribe_audio_detailed(WAV_FILENAME, AZURE_SPEECH_KEY, AZURE_REGION, LANGUAGE)
+        texto_crudo = transcribe_audio_detailed(wav_path, AZURE_SPEECH_KEY, AZURE_REGION, LANGUAGE)
         print(f"DEBUG: Transcripción de Azure completada. Texto crudo (primeros 200 chars): {texto_crudo[:200]}...")
 
         if not texto_crudo.strip():
@@ -304,7 +258,7 @@ def transcribir_audio(req: TranscripcionRequest):
 
         resultado = ""
         if modo == "dialogo":
-            resultado = limpiar_y_formatear_dialogo(texto_crudo)
+            resultado = formatear_oradores(texto_crudo)
             print("DEBUG: Formato de diálogo aplicado.")
         elif modo == "resumen":
             resultado = resumen_tematico(texto_crudo)
@@ -318,6 +272,8 @@ def transcribir_audio(req: TranscripcionRequest):
     except HTTPException:
         # Relanza HTTPException directamente
         raise
+    except CuotaDiscoExcedida as e:
+        raise HTTPException(status_code=507, detail=str(e))
     except Exception as e:
         # Imprime el traceback completo para depuración
         print(f"ERROR_EN_TRANSCRIPCION: {e}")
@@ -325,12 +281,5 @@ def transcribir_audio(req: TranscripcionRequest):
         raise HTTPException(status_code=500, detail=f"Error al procesar audio: {str(e)}. Consulta los logs del servidor para más detalles.")
 
     finally:
-        print(f"DEBUG: Limpiando archivos temporales...")
-        # Iterar sobre los Path objects y usar .exists() y .unlink()
-        for f in [AUDIO_FILENAME, WAV_FILENAME]:
-            if f.exists():
-                try:
-                    f.unlink() # Elimina el archivo
-                    print(f"DEBUG: Archivo '{f}' eliminado.")
-                except Exception as file_e:
-                    print(f"ADVERTENCIA: No se pudo eliminar el archivo '{f}': {file_e}")
\ No newline at end of file
+        print(f"DEBUG: Limpiando workspace {ws.ruta}...")
+        ws.liberar()
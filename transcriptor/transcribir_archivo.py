@@ -5,14 +5,21 @@
 import os
 import tempfile
 import uuid
+from typing import List
 from dotenv import load_dotenv
-from fastapi import APIRouter, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, Form, Request, Query, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 import azure.cognitiveservices.speech as speechsdk
 import logging
 import traceback
 from Backend_app.config import settings
-from services.azure_transcriptor import transcribir_archivo_azure
+from starlette.background import BackgroundTask
+from services.azure_transcriptor import transcribir_archivo_azure, transcribir_stream_azure, eventos_archivo_azure, eventos_multiples_azure, segmentos_archivo_azure
+from services.cache import cache_transcripciones, hash_upload
+from services.eventos import respuesta_eventos, PATRON_FORMATO
+from services.ingesta import guardar_upload
+from services.subtitulos import exportar_async, FORMATOS_SUBTITULOS, PATRON_SUBTITULOS
+from services.workspace import gestor_workspaces, CuotaDiscoExcedida
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -24,21 +31,27 @@ router = APIRouter()
 # Asegúrate que existe carpeta para guardar audios
 os.makedirs("audios", exist_ok=True)
 
+EXTENSIONES_AUDIO = ('.wav', '.mp3', '.flac', '.ogg', '.m4a')
+
 @router.post("/transcribir-archivo")
-async def transcribir_archivo(audio: UploadFile = File(...), modo_salida: str = Form("dialogo")):
+async def transcribir_archivo(
+    audio: UploadFile = File(...),
+    modo_salida: str = Form("dialogo"),
+    modo_audio: str = Form("archivo", pattern="^(archivo|stream)$"),
+):
     try:
         logger.info("📥 Archivo recibido para transcripción")
         logger.info(f"Nombre del archivo: {audio.filename}")
         logger.info(f"Tamaño del archivo: {audio.size} bytes")
         # Validar tipo de archivo
-        if not audio.filename.lower().endswith(('.wav', '.mp3', '.flac', '.ogg', '.m4a')):
+        if not audio.filename.lower().endswith(EXTENSIONES_AUDIO):
             logger.error("❌ Tipo de archivo no soportado")
             return JSONResponse(status_code=400, content={
                 "error": "Tipo de archivo no soportado. Solo se permiten archivos de audio."
             })
         print(f"modo_salida: {modo_salida}")
         #texto = await transcribir_archivo_azure(audio, modo_salida)
-        texto = await transcribir_archivo_azure(audio)
+        texto = await transcribir_archivo_azure(audio, modo_audio=modo_audio)
 
         print(f"Texto transcrito (transcribir_archivo.py): {texto}")
         if not texto.strip():
@@ -49,8 +62,192 @@ async def transcribir_archivo(audio: UploadFile = File(...), modo_salida: str =
 
         return {"transcripcion": texto.strip(), "modo_salida": modo_salida}
 
+    except HTTPException as e:
+        # 504 (plazo vencido), 507 (sin disco)...: el cliente necesita el motivo real
+        logger.error(f"❌ Error al transcribir: {e.detail}")
+        return JSONResponse(status_code=e.status_code, content={"error": e.detail})
+    except Exception as e:
+        logger.error(f"❌ Error al transcribir: {e}")
+        return JSONResponse(status_code=500, content={
+            "error": "Error interno en el servidor al transcribir."
+        })
+
+
+@router.post("/transcribir-archivo/directo")
+async def transcribir_archivo_directo(
+    request: Request,
+    nombre: str = Query(..., description="Nombre original del archivo (define el formato)"),
+    modo_salida: str = Query("dialogo"),
+    modo_audio: str = Query("archivo", pattern="^(archivo|stream)$"),
+):
+    """
+    Variante sin multipart: el cuerpo del request es el audio crudo
+    (Content-Type: application/octet-stream). Los bloques pasan a ffmpeg a
+    medida que llegan por la red, así la conversión se solapa con la subida.
+    Con multipart, Starlette recibe el archivo completo antes de llamar al endpoint.
+    """
+    logger.info(f"📥 Audio recibido por streaming: {nombre}")
+    if not nombre.lower().endswith(EXTENSIONES_AUDIO):
+        logger.error("❌ Tipo de archivo no soportado")
+        return JSONResponse(status_code=400, content={
+            "error": "Tipo de archivo no soportado. Solo se permiten archivos de audio."
+        })
+
+    try:
+        texto = await transcribir_stream_azure(request.stream(), nombre, modo_salida, modo_audio)
+        if not texto.strip():
+            return JSONResponse(status_code=200, content={
+                "transcripcion": "",
+                "advertencia": "No se detectó voz en el audio."
+            })
+
+        return {"transcripcion": texto.strip(), "modo_salida": modo_salida}
+
+    except HTTPException as e:
+        # 504 (plazo vencido), 507 (sin disco)...: el cliente necesita el motivo real
+        logger.error(f"❌ Error al transcribir: {e.detail}")
+        return JSONResponse(status_code=e.status_code, content={"error": e.detail})
     except Exception as e:
         logger.error(f"❌ Error al transcribir: {e}")
         return JSONResponse(status_code=500, content={
             "error": "Error interno en el servidor al transcribir."
-        })
\ No newline at end of file
+        })
+
+
+@router.post("/transcribir-archivo/stream")
+async def transcribir_archivo_stream(
+    audio: UploadFile = File(...),
+    modo_salida: str = Form("dialogo"),
+    formato: str = Query("sse", pattern=PATRON_FORMATO),
+):
+    """
+    Igual que /transcribir-archivo, pero responde en streaming (SSE o NDJSON):
+    un evento "segmento" por frase reconocida (texto, offset, duración en
+    segundos) y un evento "final" con el texto formateado según modo_salida.
+    """
+    logger.info(f"📥 Archivo recibido para transcripción en streaming: {audio.filename}")
+    if not audio.filename.lower().endswith(EXTENSIONES_AUDIO):
+        logger.error("❌ Tipo de archivo no soportado")
+        return JSONResponse(status_code=400, content={
+            "error": "Tipo de archivo no soportado. Solo se permiten archivos de audio."
+        })
+
+    try:
+        ws = await gestor_workspaces.crear_async("sse")
+    except CuotaDiscoExcedida as e:
+        return JSONResponse(status_code=507, content={"error": str(e)})
+
+    try:
+        hash_audio = await hash_upload(audio)
+        # FastAPI cierra el upload al volver del handler, antes de que se lea el stream
+        ruta = ws.archivo(f"original{os.path.splitext(audio.filename)[1].lower()}")
+        await guardar_upload(audio, ruta)
+    except Exception:
+        await ws.liberar_async()
+        raise
+
+    return respuesta_eventos(
+        eventos_archivo_azure(ws, ruta, modo_salida, hash_audio),
+        formato,
+        # Por si el cliente se desconecta antes de que arranque el generador
+        al_terminar=BackgroundTask(ws.liberar),
+    )
+
+
+@router.post("/transcribir-archivo/subtitulos")
+async def transcribir_archivo_subtitulos(
+    audio: UploadFile = File(...),
+    formato: str = Query("srt", pattern=PATRON_SUBTITULOS),
+):
+    """
+    Transcribe el audio y lo devuelve como subtítulos SRT o WebVTT (o JSON
+    con los tiempos de cada palabra). Cada línea se envía apenas se reconoce
+    el segmento correspondiente.
+    """
+    logger.info(f"📥 Archivo recibido para subtítulos ({formato}): {audio.filename}")
+    if not audio.filename.lower().endswith(EXTENSIONES_AUDIO):
+        logger.error("❌ Tipo de archivo no soportado")
+        return JSONResponse(status_code=400, content={
+            "error": "Tipo de archivo no soportado. Solo se permiten archivos de audio."
+        })
+
+    try:
+        ws = await gestor_workspaces.crear_async("subtitulos")
+    except CuotaDiscoExcedida as e:
+        return JSONResponse(status_code=507, content={"error": str(e)})
+
+    try:
+        # FastAPI cierra el upload al volver del handler, antes de que se lea el stream
+        ruta = ws.archivo(f"original{os.path.splitext(audio.filename)[1].lower()}")
+        await guardar_upload(audio, ruta)
+    except Exception:
+        await ws.liberar_async()
+        raise
+
+    nombre = f"{os.path.splitext(audio.filename)[0]}.{formato}"
+    return StreamingResponse(
+        exportar_async(segmentos_archivo_azure(ws, ruta), formato),
+        media_type=FORMATOS_SUBTITULOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"', "X-Accel-Buffering": "no"},
+        background=BackgroundTask(ws.liberar),
+    )
+
+
+@router.post("/transcribir-archivo/multiple")
+async def transcribir_archivos_multiples(
+    audios: List[UploadFile] = File(...),
+    modo_salida: str = Form("dialogo"),
+    modo_audio: str = Form("archivo", pattern="^(archivo|stream)$"),
+    formato: str = Query("sse", pattern=PATRON_FORMATO),
+):
+    """
+    Varios audios en un solo request. Se procesan en paralelo (hasta
+    MULTIARCHIVO_CONCURRENTES) y la respuesta es un stream SSE o NDJSON: un
+    evento "archivo" por cada uno a medida que termina (indice, nombre,
+    transcripcion o error) y un evento "final" con el documento combinado.
+    """
+    logger.info(f"📥 {len(audios)} archivos recibidos para transcripción")
+    if len(audios) > settings.multiarchivo_max_archivos:
+        return JSONResponse(status_code=400, content={
+            "error": f"Se permiten hasta {settings.multiarchivo_max_archivos} archivos por request."
+        })
+    no_soportados = [a.filename for a in audios if not a.filename.lower().endswith(EXTENSIONES_AUDIO)]
+    if no_soportados:
+        logger.error(f"❌ Tipos de archivo no soportados: {no_soportados}")
+        return JSONResponse(status_code=400, content={
+            "error": "Tipo de archivo no soportado. Solo se permiten archivos de audio.",
+            "archivos": no_soportados,
+        })
+
+    try:
+        ws = await gestor_workspaces.crear_async("multi")
+    except CuotaDiscoExcedida as e:
+        return JSONResponse(status_code=507, content={"error": str(e)})
+
+    try:
+        archivos = []
+        for i, audio in enumerate(audios):
+            hash_audio = await hash_upload(audio)
+            # FastAPI cierra los uploads al volver del handler, antes de que se lea el stream
+            ruta = ws.archivo(f"{i:03d}{os.path.splitext(audio.filename)[1].lower()}")
+            await guardar_upload(audio, ruta)
+            archivos.append((audio.filename, ruta, hash_audio))
+        await ws.verificar_cuota_async()
+    except CuotaDiscoExcedida as e:
+        await ws.liberar_async()
+        return JSONResponse(status_code=507, content={"error": str(e)})
+    except Exception:
+        await ws.liberar_async()
+        raise
+
+    return respuesta_eventos(
+        eventos_multiples_azure(ws, archivos, modo_salida, modo_audio),
+        formato,
+        al_terminar=BackgroundTask(ws.liberar),
+    )
+
+
+@router.get("/transcribir-archivo/cache")
+async def estadisticas_cache():
+    """Aciertos, fallos y ocupación de la caché de transcripciones."""
+    return cache_transcripciones.estadisticas()
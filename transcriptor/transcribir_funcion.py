@@ -3,6 +3,8 @@ import tempfile
 import os
 from dotenv import load_dotenv
 
+from services.reconocimiento import SesionReconocimiento
+
 load_dotenv()
 
 AZURE_SPEECH_KEY = os.getenv("AZURE_SPEECH_KEY")
@@ -37,28 +39,11 @@ async def transcribir_audio_azure_sdk(audio_file, modo_salida="simple"):
         audio_config = speechsdk.audio.AudioConfig(filename=tmp_path)
         recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
 
-        done = False
-        transcripcion = []
-
-        def handle_result(evt):
-            if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                transcripcion.append(evt.result.text)
-
-        recognizer.recognized.connect(handle_result)
-
-        def stop_cb(evt):
-            nonlocal done
-            done = True
-
-        recognizer.session_stopped.connect(stop_cb)
-        recognizer.canceled.connect(stop_cb)
-
-        recognizer.start_continuous_recognition()
-        while not done:
-            await asyncio.sleep(0.5)
-        recognizer.stop_continuous_recognition()
+        # Espera por eventos del SDK en lugar de hacer polling cada 0.5 s
+        sesion = SesionReconocimiento(recognizer)
+        await sesion.ejecutar_async()
 
-        texto_final = " ".join(transcripcion)
+        texto_final = sesion.texto
 
         if not texto_final.strip():
             return "Transcripción vacía. ¿Audio demasiado corto o sin voz?"
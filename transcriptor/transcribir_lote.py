@@ -0,0 +1,51 @@
+### Transcripción por lotes (Azure Speech batch)
+### transcribir_lote.py
+# Para procesar muchas grabaciones de una vez (archivo nocturno): se envían las
+# URLs (con SAS) o un contenedor de blobs como un único job. El estado y el
+# resultado por archivo se consultan con GET /api/transcribir/jobs/{job_id}.
+
+import logging
+from functools import partial
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, status
+from pydantic import BaseModel, Field, HttpUrl, model_validator
+
+from services.jobs import gestor_lotes, ColaLlenaError
+from services.transcripcion_lote import transcribir_lote
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+class LoteRequest(BaseModel):
+    urls: List[HttpUrl] = Field(default_factory=list)
+    contenedor: Optional[HttpUrl] = None
+    idioma: str = Field("es-ES", pattern=r"^[a-z]{2,3}-[A-Z]{2}$")
+    modo_salida: str = Field("dialogo", pattern="^(dialogo|resumen|texto)$")
+
+    @model_validator(mode="after")
+    def _una_fuente(self):
+        if bool(self.urls) == bool(self.contenedor):
+            raise ValueError("Indicá 'urls' o 'contenedor' (uno de los dos).")
+        return self
+
+
+@router.post("/transcribir/lote", status_code=status.HTTP_202_ACCEPTED)
+async def crear_job_lote(req: LoteRequest):
+    try:
+        job = gestor_lotes.enviar(
+            "lote",
+            partial(
+                transcribir_lote,
+                urls=[str(u) for u in req.urls],
+                contenedor=str(req.contenedor) if req.contenedor else None,
+                idioma=req.idioma,
+                modo_salida=req.modo_salida,
+            ),
+        )
+    except ColaLlenaError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    logger.info(f"📦 Job de lote {job.id} encolado ({len(req.urls)} URLs)")
+    return {"job_id": job.id, "estado": job.estado}
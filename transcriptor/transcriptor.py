@@ -6,6 +6,7 @@ import subprocess
 import re
 import traceback # Importar traceback
 import time
+from functools import partial
 # Asegúrate de que yt-dlp está instalado en tu entorno (pip install yt-dlp)
 # Si lo usas como ejecutable, debe estar accesible en el PATH o en la ruta especificada.
 import yt_dlp 
@@ -18,10 +19,24 @@ import shutil
 
 # Importa las configuraciones de tu aplicación (asegúrate de que este archivo exista y esté bien configurado)
 from Backend_app.config import settings
+from services.reconocimiento import SesionReconocimiento, transcribir_pcm, iterar_segmentos_pcm
+from services.speech_clientes import crear_recognizer, estadisticas as estadisticas_speech
+from services.ingesta import duracion_youtube, pcm_desde_youtube, ErrorDescarga
+from services.vad import transcribir_wav_con_vad
+from services.cache import cache_transcripciones, clave_cache, clave_transcripcion
+from services.eventos import respuesta_eventos, PATRON_FORMATO
+from services.azure_format_text import limpiar_y_formatear_dialogo
+from services.resumen import resumir
+from services.vuelo_unico import transcripciones_en_curso, estadisticas as estadisticas_en_curso
+from services.youtube import cache_audio_youtube, extraer_video_id, obtener_audio, url_canonica
 
 # Importa el cliente de OpenAI (asumiendo que está en services/azure_client.py)
 # ESTE ARCHIVO DEBE EXISTIR Y CONFIGURAR 'openai_client'
 from services.azure_client import openai_client 
+from services.jobs import gestor_jobs, obtener_job, ColaLlenaError
+from services.workspace import gestor_workspaces, CuotaDiscoExcedida
+from services.ejecucion import ejecutor
+from services.plazos import PlazoExcedido, con_plazo, en_plazo, iterar_en_plazo, plazo_por_duracion, duracion_wav
 
 router = APIRouter()
 
@@ -48,9 +63,10 @@ YT_DLP_EXE = WORK_DIR / "yt-dlp.exe" # En Linux, no suele llevar .exe
 FFMPEG_EXE = WORK_DIR / "ffmpeg.exe" # En Linux
 FFPROBE_EXE = WORK_DIR / "ffprobe.exe" # En Linux (aunque no se usa directamente aquí, es buena práctica)
 
-# Rutas a los archivos de datos temporales (en DATA_WORK)
-AUDIO_FILENAME = DATA_WORK / "audio_descargado.mp3"
-WAV_FILENAME = DATA_WORK / "audio_convertido.wav"
+# Nombres de los archivos temporales. Cada job los crea dentro de su propio
+# workspace (DATA_WORK/jobs/<id>/), así varias transcripciones pueden correr a la vez.
+AUDIO_FILENAME = "audio_descargado.mp3"
+WAV_FILENAME = "audio_convertido.wav"
 
 # --- Constantes de Azure y Lenguaje (tomadas de settings) ---
 AZURE_SPEECH_KEY = settings.azure_speech_key
@@ -61,17 +77,15 @@ LANGUAGE = "es-ES" # O "es-ES" si no lo tienes en settings
 class TranscripcionRequest(BaseModel):
     link: HttpUrl
     modo_salida: str = Query("dialogo", pattern="^(dialogo|resumen)$")
+    # "archivo": MP3 -> WAV en disco -> reconocimiento.
+    # "stream": yt-dlp -> ffmpeg -> reconocedor por pipes, sin MP3 ni WAV intermedios.
+    modo_audio: str = Query("archivo", pattern="^(archivo|stream)$")
 
 # --- Funciones de Transcripción y Procesamiento ---
 
 def validar_url_youtube(url: str) -> bool:
-    """Valida si la URL es de YouTube (simplificado para el ejemplo)."""
-    # Para una validación robusta de URLs de YouTube, considera usar una librería
-    # o una expresión regular más compleja.
-    # Los ejemplos proporcionados ("http://googleusercontent.com/youtube.com/...")
-    # son poco comunes para URLs directas de YouTube. Un ejemplo típico es:
-    # "https://www.youtube.com/watch?v=..." o "https://youtu.be/..."
-    return "youtube.com" in url or "youtu.be" in url
+    """Valida que la URL apunte a un video de YouTube (watch?v=, youtu.be/, shorts/...)."""
+    return extraer_video_id(url) is not None
 
 def _check_executable(exe_path: Path):
     """Verifica si un ejecutable existe y tiene permisos de ejecución."""
@@ -161,98 +175,24 @@ def transcribe_audio_detailed(ruta_wav: Path, azure_key: str, AZURE_REGION: str,
     if not AZURE_REGION:
         raise ValueError("La región de Azure Speech no puede estar vacía.")
 
-    speech_config = speechsdk.SpeechConfig(subscription=azure_key, region=AZURE_REGION)
-    speech_config.speech_recognition_language = language
     audio_input = speechsdk.AudioConfig(filename=str(ruta_wav)) # Convertir Path a str
 
-    recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_input)
+    # Config compartida por región/idioma; la conexión se abre al crear el recognizer
+    recognizer = crear_recognizer(audio_input, language, azure_key, AZURE_REGION)
 
-    texto = []
-
-    def handle_recognized_event(evt):
-        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
-            texto.append(evt.result.text)
-        elif evt.result.reason == speechsdk.ResultReason.NoMatch:
-            print(f"DEBUG: No se pudo reconocer el habla: {evt.result.no_match_details}")
-        elif evt.result.reason == speechsdk.ResultReason.Canceled:
-            cancellation_details = evt.result.cancellation_details
-            print(f"DEBUG: Reconocimiento cancelado: Razón={cancellation_details.reason}")
-            if cancellation_details.reason == speechsdk.CancellationReason.Error:
-                print(f"DEBUG: Código de error={cancellation_details.error_code}")
-                print(f"DEBUG: Detalles de error={cancellation_details.error_details}")
-                # Lanzar una excepción más específica para este caso
-                raise Exception(f"Error de Azure Speech: {cancellation_details.error_details} (Código: {cancellation_details.error_code})")
-
-    recognizer.recognized.connect(handle_recognized_event)
-
-    done = False
-    def stop_cb(evt):
-        nonlocal done
-        done = True
-        print(f"DEBUG: Evento de parada recibido: {evt}")
-
-    recognizer.session_stopped.connect(stop_cb)
-    recognizer.canceled.connect(stop_cb)
-    recognizer.speech_end_detected.connect(stop_cb) # Añadir para detectar el fin del habla
+    # La sesión se basa en eventos: detecta el fin al instante, sin sleep-polling
+    sesion = SesionReconocimiento(recognizer)
 
     print("DEBUG: Iniciando reconocimiento continuo...")
-    recognizer.start_continuous_recognition()
-    
-    # Espera activa para que el hilo de reconocimiento se ejecute
-    timeout_seconds = 300 # Tiempo máximo de espera (ej. 5 minutos para audios largos)
-    start_time = time.time()
-    while not done and (time.time() - start_time < timeout_seconds):
-        time.sleep(0.5)
-
-    if not done:
-        print("ADVERTENCIA: El reconocimiento continuo no finalizó a tiempo. Deteniendo forzosamente.")
-    
-    recognizer.stop_continuous_recognition()
+    # Plazo proporcional a la duración; si vence se lanza PlazoExcedido en lugar de truncar
+    sesion.ejecutar(timeout=plazo_por_duracion(duracion_wav(ruta_wav)))
     print("DEBUG: Reconocimiento continuo detenido.")
 
-    final_text = " ".join(texto).strip()
+    final_text = sesion.texto
     if not final_text:
         print("ADVERTENCIA: Transcripción vacía.")
     return final_text
 
-def limpiar_y_formatear_dialogo(texto: str) -> str:
-    """
-    Formatea el texto dividiéndolo en frases para mejorar la legibilidad,
-    asumiendo que la diarización no está disponible automáticamente.
-    """
-    dialogo_formateado = []
-    # Divide el texto en frases basándose en puntuación final, y luego limpia espacios.
-    # Usa un regex para manejar múltiples espacios y la puntuación de forma robusta.
-    # Asegúrate de no crear frases vacías.
-    frases = re.split(r'(?<=[.?!])\s*', texto)
-    for frase in frases:
-        frase_limpia = frase.strip()
-        if frase_limpia:
-            dialogo_formateado.append(frase_limpia)
-
-    # Unir las frases con dos saltos de línea para un formato más tipo párrafo
-    return "\n\n".join(dialogo_formateado)
-
-def resumen_tematico(texto: str) -> str:
-    """Genera un resumen temático del texto utilizando Azure OpenAI."""
-    if openai_client is None:
-        print("ERROR: openai_client no está inicializado. No se puede generar resumen.")
-        raise HTTPException(status_code=500, detail="El servicio de resumen no está disponible. Contacta al administrador.")
-
-    prompt = f"Resumí el siguiente texto en pocas frases:\n\n{texto}"
-    try:
-        response = openai_client.chat.completions.create(
-            model=settings.azure_openai_deployment_name,  # Usa el nombre de despliegue de tu modelo
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.5,
-            max_tokens=500,
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"ERROR: Fallo al generar resumen con Azure OpenAI: {e}")
-        print(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=f"Error al generar resumen: {str(e)}")
-
 # --- Endpoints de FastAPI ---
 
 @router.post("/diagnostico/")
@@ -278,73 +218,237 @@ async def analizar_audio(ruta: str):
         raise HTTPException(status_code=500, detail=f"Error al ejecutar el diagnóstico: {str(e)}")
 
 
-@router.post("/transcribir")
-async def transcribir_audio_endpoint(req: TranscripcionRequest): # Cambiado el nombre para evitar conflicto
-    link = req.link
-    modo = req.modo_salida
-
-    print(f"DEBUG: Recibida solicitud de transcripción para el link: {link} con modo: {modo}")
-    print(f"DEBUG: Credenciales de Azure Speech - Key: {AZURE_SPEECH_KEY[:10]}..., Region: {AZURE_REGION}") # Ocultar clave completa por seguridad en logs
-
+def _validar_solicitud_youtube(link_str: str):
+    """Validaciones previas comunes al endpoint síncrono y al de jobs."""
     # Validar credenciales de Azure Speech
     if not AZURE_SPEECH_KEY or not AZURE_REGION:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail="Faltan credenciales de Azure Speech. Verifica tu configuración.")
 
-    link_str = str(link)
-
     if not validar_url_youtube(link_str):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="URL inválida de YouTube. Solo se admiten URLs de YouTube.")
 
+
+async def procesar_transcripcion_youtube(link_str: str, modo: str, modo_audio: str = "archivo") -> str:
+    """Pipeline completo: descarga -> WAV -> Azure Speech -> formato/resumen.
+
+    Pedidos simultáneos del mismo video y modos (por /transcribir o como job)
+    comparten una única ejecución y su resultado o error.
+    """
+    clave = clave_cache("youtube", extraer_video_id(link_str) or link_str, LANGUAGE, modo, modo_audio)
+    return await transcripciones_en_curso.ejecutar(
+        clave, partial(_procesar_transcripcion_youtube, link_str, modo, modo_audio)
+    )
+
+
+async def _procesar_transcripcion_youtube(link_str: str, modo: str, modo_audio: str) -> str:
+    """Cada etapa bloqueante corre en la capa de ejecución (services/ejecucion.py)
+    para no congelar el event loop.
+    """
     try:
-        print(f"DEBUG: Iniciando descarga de audio de: {link_str}")
-        download_audio(link_str, AUDIO_FILENAME)
-        print(f"DEBUG: Audio descargado a: {AUDIO_FILENAME}")
+        ws = await gestor_workspaces.crear_async("yt")
+    except CuotaDiscoExcedida as e:
+        raise HTTPException(status_code=status.HTTP_507_INSUFFICIENT_STORAGE, detail=str(e))
+
+    audio_path = ws.archivo(AUDIO_FILENAME)
+    wav_path = ws.archivo(WAV_FILENAME)
+    # Todas las formas de URL del mismo video comparten caché y descarga
+    video_id = extraer_video_id(link_str)
+    link_str = url_canonica(video_id)
+    clave = clave_transcripcion("youtube", video_id, LANGUAGE, modo, modo_audio=modo_audio)
+
+    # Plazo inicial para descarga y conversión; al conocer la duración se ajusta
+    with con_plazo(settings.plazo_inicial_s) as plazo:
+        try:
+            if (en_cache := await cache_transcripciones.obtener_async(clave)) is not None:
+                print(f"DEBUG: Transcripción de {video_id} servida desde caché.")
+                return en_cache
+
+            if modo_audio == "stream":
+                # yt-dlp -> ffmpeg -> reconocedor en un solo pipeline: se baja el stream de
+                # solo audio, se decodifica una vez a PCM y se reconoce mientras descarga.
+                print(f"DEBUG: Iniciando transcripción por streaming de: {link_str}")
+                async with ejecutor.limite("descarga"), ejecutor.limite("reconocimiento"):
+                    # Sin WAV, la duración sale de los metadatos de yt-dlp antes de descargar
+                    if (duracion := await duracion_youtube(link_str)) is not None:
+                        plazo.extender_a(plazo_por_duracion(duracion))
+                    segmentos = await en_plazo("reconocimiento", transcribir_pcm(
+                        pcm_desde_youtube(link_str, etapa=None), AZURE_SPEECH_KEY, AZURE_REGION, LANGUAGE
+                    ))
+                texto_crudo = " ".join(s.texto for s in segmentos).strip()
+            else:
+                print(f"DEBUG: Obteniendo audio de: {link_str}")
+                # Desde la caché por ID de video, o una única descarga compartida
+                await en_plazo("descarga", obtener_audio(video_id, audio_path, download_audio))
+                print(f"DEBUG: Audio descargado a: {audio_path}")
+                await ws.verificar_cuota_async()
+
+                print(f"DEBUG: Iniciando conversión a WAV: {audio_path} -> {wav_path}")
+                await ejecutor.en_hilo("conversion", convert_mp3_to_wav, audio_path, wav_path)
+                print(f"DEBUG: Archivo WAV creado: {wav_path}")
+
+                # Con la duración (cabecera del WAV) se fija el plazo de reconocimiento y resumen
+                plazo.extender_a(plazo_por_duracion(duracion_wav(wav_path)))
+
+                print(f"DEBUG: Iniciando transcripción con Azure Speech (segmentos en paralelo)...")
+                segmentos = await en_plazo(
+                    "reconocimiento", transcribir_wav_con_vad(ws, wav_path, AZURE_SPEECH_KEY, AZURE_REGION, LANGUAGE)
+                )
+                texto_crudo = " ".join(s.texto for s in segmentos).strip()
+            print(f"DEBUG: Transcripción de Azure completada. Texto crudo (primeros 200 chars): {texto_crudo[:200]}...")
+
+            if not texto_crudo.strip():
+                raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                    detail="No se obtuvo texto de la transcripción. El audio podría estar vacío o ser ininteligible.")
+
+            resultado = ""
+            if modo == "dialogo":
+                resultado = limpiar_y_formatear_dialogo(texto_crudo)
+                print("DEBUG: Formato de diálogo aplicado.")
+            elif modo == "resumen":
+                resultado = await resumir(texto_crudo)  # Map-reduce por fragmentos (services/resumen.py)
+                print("DEBUG: Resumen temático aplicado.")
+            else:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail="Modo inválido. Usa 'dialogo' o 'resumen'.")
+
+            print("DEBUG: Proceso completado exitosamente.")
+            resultado = resultado.strip()
+            await cache_transcripciones.guardar_async(clave, resultado)
+            return resultado
+
+        except HTTPException:
+            # Relanza HTTPException directamente si ya fue capturada y generada
+            raise
+        except CuotaDiscoExcedida as e:
+            raise HTTPException(status_code=status.HTTP_507_INSUFFICIENT_STORAGE, detail=str(e))
+        except PlazoExcedido as e:
+            print(f"ERROR: {e}")
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+        except ErrorDescarga as e:
+            print(f"ERROR: Fallo al descargar con yt-dlp: {e}")
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                detail=f"❌ Error al descargar audio con yt-dlp: {e}")
+        except Exception as e:
+            # Captura cualquier otra excepción inesperada
+            print(f"ERROR_EN_TRANSCRIPCION: {e}")
+            print(traceback.format_exc()) # Imprime el traceback completo para depuración
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                detail=f"Error al procesar audio: {str(e)}. Consulta los logs del servidor para más detalles.")
 
-        print(f"DEBUG: Iniciando conversión a WAV: {AUDIO_FILENAME} -> {WAV_FILENAME}")
-        convert_mp3_to_wav(AUDIO_FILENAME, WAV_FILENAME)
-        print(f"DEBUG: Archivo WAV creado: {WAV_FILENAME}")
+        finally:
+            # Borra el workspace completo del job (audio descargado, WAV y restos de yt-dlp)
+            print(f"DEBUG: Limpiando workspace {ws.ruta}...")
+            await ws.liberar_async()
 
-        print(f"DEBUG: Iniciando transcripción con Azure Speech...")
-        texto_crudo = transcribe_audio_detailed(WAV_FILENAME, AZURE_SPEECH_KEY, AZURE_REGION, LANGUAGE)
-        print(f"DEBUG: Transcripción de Azure completada. Texto crudo (primeros 200 chars): {texto_crudo[:200]}...")
 
-        if not texto_crudo.strip():
+@router.post("/transcribir")
+async def transcribir_audio_endpoint(req: TranscripcionRequest): # Cambiado el nombre para evitar conflicto
+    link = req.link
+    modo = req.modo_salida
+
+    print(f"DEBUG: Recibida solicitud de transcripción para el link: {link} con modo: {modo}")
+    print(f"DEBUG: Credenciales de Azure Speech - Key: {AZURE_SPEECH_KEY[:10]}..., Region: {AZURE_REGION}") # Ocultar clave completa por seguridad en logs
+
+    link_str = str(link)
+    _validar_solicitud_youtube(link_str)
+
+    resultado = await procesar_transcripcion_youtube(link_str, modo, req.modo_audio)
+    return {"transcripcion": resultado}
+
+
+async def eventos_transcripcion_youtube(link_str: str, modo: str):
+    """Pipeline yt-dlp -> ffmpeg -> reconocedor que entrega cada frase apenas se reconoce."""
+    video_id = extraer_video_id(link_str)
+    clave = clave_transcripcion("youtube", video_id, LANGUAGE, modo, modo_audio="stream")  # Mismo pipeline que modo_audio="stream"
+    if (en_cache := await cache_transcripciones.obtener_async(clave)) is not None:
+        yield "final", {"transcripcion": en_cache, "modo_salida": modo, "cache": True}
+        return
+
+    # Plazo inicial hasta conocer la duración; si vence, el cliente recibe un evento "error"
+    with con_plazo(settings.plazo_inicial_s) as plazo:
+        segmentos = []
+        async with ejecutor.limite("descarga"), ejecutor.limite("reconocimiento"):
+            if (duracion := await en_plazo("descarga", duracion_youtube(url_canonica(video_id)))) is not None:
+                plazo.extender_a(plazo_por_duracion(duracion))
+            pcm = pcm_desde_youtube(url_canonica(video_id), etapa=None)
+            async for segmento in iterar_en_plazo(
+                "reconocimiento", iterar_segmentos_pcm(pcm, AZURE_SPEECH_KEY, AZURE_REGION, LANGUAGE)
+            ):
+                segmentos.append(segmento)
+                yield "segmento", segmento.a_dict()
+
+        texto_crudo = " ".join(s.texto for s in segmentos).strip()
+        if not texto_crudo:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                                 detail="No se obtuvo texto de la transcripción. El audio podría estar vacío o ser ininteligible.")
-
-        resultado = ""
-        if modo == "dialogo":
-            resultado = limpiar_y_formatear_dialogo(texto_crudo)
-            print("DEBUG: Formato de diálogo aplicado.")
-        elif modo == "resumen":
-            resultado = resumen_tematico(texto_crudo) # Llama a la función de resumen
-            print("DEBUG: Resumen temático aplicado.")
+        if modo == "resumen":
+            resultado = await resumir(texto_crudo)
         else:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="Modo inválido. Usa 'dialogo' o 'resumen'.")
+            resultado = limpiar_y_formatear_dialogo(texto_crudo)
+        resultado = resultado.strip()
+    await cache_transcripciones.guardar_async(clave, resultado)
+    yield "final", {"transcripcion": resultado, "modo_salida": modo, "cache": False}
 
-        print("DEBUG: Proceso completado exitosamente.")
-        return {"transcripcion": resultado.strip()}
 
-    except HTTPException:
-        # Relanza HTTPException directamente si ya fue capturada y generada
-        raise
-    except Exception as e:
-        # Captura cualquier otra excepción inesperada
-        print(f"ERROR_EN_TRANSCRIPCION: {e}")
-        print(traceback.format_exc()) # Imprime el traceback completo para depuración
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            detail=f"Error al procesar audio: {str(e)}. Consulta los logs del servidor para más detalles.")
-
-    finally:
-        print(f"DEBUG: Limpiando archivos temporales en {DATA_WORK}...")
-        # Iterar sobre los Path objects y usar .exists() y .unlink()
-        for f in [AUDIO_FILENAME, WAV_FILENAME]:
-            if f.exists():
-                try:
-                    f.unlink() # Elimina el archivo
-                    print(f"DEBUG: Archivo '{f.name}' eliminado.")
-                except Exception as file_e:
-                    print(f"ADVERTENCIA: No se pudo eliminar el archivo '{f.name}': {file_e}")
\ No newline at end of file
+@router.post("/transcribir/stream")
+async def transcribir_stream_endpoint(req: TranscripcionRequest, formato: str = Query("sse", pattern=PATRON_FORMATO)):
+    """
+    Variante en streaming de /transcribir (SSE o NDJSON): cada frase se envía
+    como evento "segmento" (texto, offset y duración en segundos) apenas Azure
+    la reconoce, y al final llega un evento "final" con el texto formateado.
+    Siempre usa el pipeline por pipes (modo_audio="stream").
+    """
+    link_str = str(req.link)
+    _validar_solicitud_youtube(link_str)
+    return respuesta_eventos(eventos_transcripcion_youtube(link_str, req.modo_salida), formato)
+
+
+# --- Jobs en segundo plano ---
+# Para videos largos: el POST responde al instante con un job_id y el cliente
+# consulta el estado/resultado con GET hasta que el job termine.
+
+@router.post("/transcribir/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def crear_job_transcripcion(req: TranscripcionRequest):
+    link_str = str(req.link)
+    _validar_solicitud_youtube(link_str)
+
+    try:
+        job = gestor_jobs.enviar(
+            "youtube",
+            partial(procesar_transcripcion_youtube, link_str, req.modo_salida, req.modo_audio),
+        )
+    except ColaLlenaError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    return {"job_id": job.id, "estado": job.estado}
+
+
+@router.get("/transcribir/jobs/{job_id}")
+async def estado_job_transcripcion(job_id: str):
+    job = obtener_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job no encontrado o expirado.")
+    return job.a_dict()
+
+
+@router.get("/transcribir/cache")
+async def estadisticas_cache_youtube():
+    """Estado de las cachés de transcripciones y de audio de YouTube."""
+    return {
+        "transcripciones": cache_transcripciones.estadisticas(),
+        "audio_youtube": cache_audio_youtube.estadisticas(),
+    }
+
+
+@router.get("/transcribir/en-curso")
+async def pedidos_en_curso():
+    """Pedidos en curso y cuántos duplicados se resolvieron esperando al original."""
+    return estadisticas_en_curso()
+
+
+@router.get("/transcribir/speech")
+async def estadisticas_clientes_speech():
+    """Configs de Azure Speech reutilizadas y tiempos de creación/conexión de las sesiones."""
+    return estadisticas_speech()
@@ -1,7 +1,10 @@
 # Backend_app/routers/transcriptor_audio.py
 
+import asyncio
+import shutil
 import tempfile
 import uuid
+from pathlib import Path
 import logging
 import traceback
 from fastapi import APIRouter, UploadFile, File, Form
@@ -9,6 +12,7 @@ from fastapi.responses import JSONResponse
 import azure.cognitiveservices.speech as speechsdk
 
 from Backend_app.config import settings
+from services.ingesta import CHUNK_BYTES
 
 # Logger
 logger = logging.getLogger(__name__)
@@ -22,12 +26,9 @@ router = APIRouter()
 @router.post("/transcribir-archivo")
 async def transcribir_archivo(audio: UploadFile = File(...), modo_salida: str = Form("dialogo")):
     try:
-        # Leer contenido del archivo
-        contents = await audio.read()
-
-        # Guardar archivo temporal
+        # Guardar archivo temporal copiando en bloques (sin cargar el audio entero en memoria)
         with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{audio.filename}") as temp_input:
-            temp_input.write(contents)
+            await asyncio.to_thread(shutil.copyfileobj, audio.file, temp_input, CHUNK_BYTES)
             input_path = temp_input.name
         print(f"Region de setteos: {settings.azure_region}")
         # Configurar Azure Speech SDK
@@ -46,17 +47,16 @@ async def transcribir_archivo(audio: UploadFile = File(...), modo_salida: str =
         logger.info(f"Reconociendo archivo: {audio.filename}")
         result = recognizer.recognize_once()
 
+        # Guardar una copia del audio subido (copia disco a disco, en bloques)
+        output_filename = f"{uuid.uuid4()}.wav"
+        output_path = settings.work_dir / output_filename
+        shutil.copyfile(input_path, output_path)
+
         # Eliminar archivo temporal
         tempfile_path = Path(input_path)
         if tempfile_path.exists():
             tempfile_path.unlink()
 
-        # Guardar una copia del audio subido
-        output_filename = f"{uuid.uuid4()}.wav"
-        output_path = settings.work_dir / output_filename
-        with open(output_path, "wb") as f:
-            f.write(contents)
-
         # Procesar resultado
         if result.reason == speechsdk.ResultReason.RecognizedSpeech:
             texto = result.text.strip()